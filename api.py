@@ -6,9 +6,12 @@ from quer import ask_local_llm, temizle_yanit
 from base import AdvancedDocumentProcessor
 from embedder import MultiModelEmbedder
 from chroma import ChromaDBManager
+from corpus_store import CorpusStore, migrate_legacy_json
+from question_log_writer import QuestionLogWriter
+from evaluation_worker import EvaluationPool
+from term_matcher import match_terms
 from pathlib import Path
 from config import config
-import re
 
 import os
 import datetime
@@ -36,6 +39,13 @@ os.makedirs(EMBEDDINGS_FOLDER, exist_ok=True)
 processor = AdvancedDocumentProcessor()
 embedder = MultiModelEmbedder(primary_model=config.EMBEDDING_MODEL)  # Use LaBSE (768 dim)
 chroma_manager = ChromaDBManager()
+corpus_store = CorpusStore()
+migrate_legacy_json(corpus_store)  # Eski JSON korpus dosyalarından tek seferlik geçiş
+# Soru/oturum kayıtları istek thread'inde değil, arka planda toplu yazılır;
+# stats.json her mesajda değil her toplu yazımdan sonra güncellenir
+question_log_writer = QuestionLogWriter(on_flush=lambda: update_stats_json())
+# Tam yanıt değerlendirmesi arka planda; sonuç aynı yazıcıyla soru kaydının yanına yazılır
+evaluation_pool = EvaluationPool(on_result=question_log_writer.log_evaluation)
 
 
 def allowed_file(filename):
@@ -80,6 +90,49 @@ def embed_query(text: str):
         return model.encode(text, normalize_embeddings=True).tolist()
 
 
+def parse_chat_filters(raw_filters):
+    """/api/chat kapsam filtrelerini retriever formatına çevir
+
+    Kabul edilen alanlar: keyword (doküman anahtar kelimesi), source_files,
+    file_types, page_min, page_max. keyword, corpus store'daki anahtar kelime
+    index'i üzerinden dosya listesine çevrilir. Hatalı girdide ValueError.
+    """
+    if not raw_filters:
+        return None
+    if not isinstance(raw_filters, dict):
+        raise ValueError("filters bir nesne olmalı")
+
+    def as_list(value):
+        if value is None:
+            return None
+        values = [value] if isinstance(value, str) else list(value)
+        return [str(v).strip() for v in values if str(v).strip()]
+
+    filters = {}
+    source_files = as_list(raw_filters.get("source_files") or raw_filters.get("source_file"))
+    keywords = as_list(raw_filters.get("keyword") or raw_filters.get("keywords"))
+    if keywords:
+        keyword_files = corpus_store.filenames_for_keyword(keywords)
+        source_files = (
+            [f for f in source_files if f in set(keyword_files)] if source_files else keyword_files
+        )
+    if source_files is not None:
+        filters["source_files"] = source_files
+
+    file_types = as_list(raw_filters.get("file_types") or raw_filters.get("file_type"))
+    if file_types:
+        filters["file_types"] = [file_type.upper() for file_type in file_types]
+
+    for key in ("page_min", "page_max"):
+        if raw_filters.get(key) is not None:
+            try:
+                filters[key] = int(raw_filters[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} sayı olmalı")
+
+    return filters or None
+
+
 @app.route("/api/chat", methods=["POST"])
 def chat():
     try:
@@ -90,23 +143,28 @@ def chat():
         if not user_query:
             return jsonify({"error": "Boş mesaj gönderildi"}), 400
 
+        try:
+            filters = parse_chat_filters(data.get("filters"))
+        except ValueError as e:
+            return jsonify({"error": f"Geçersiz filtre: {str(e)}"}), 400
+        if filters and filters.get("source_files") == []:
+            return jsonify({"error": "Filtreyle eşleşen doküman bulunamadı"}), 404
+
         # Güncellenmiş RAG sistemi kullan
         from rag_chatbot import AdvancedRAGChatbot
         
         # RAG chatbot'u başlat
         if not hasattr(chat, '_chatbot'):
-            chat._chatbot = AdvancedRAGChatbot()
+            chat._chatbot = AdvancedRAGChatbot(evaluation_pool=evaluation_pool)
         
         # Enhanced chat manager'dan sadece selamlama/veda kontrolü al
         from enhanced_chat_manager import conversation_manager
 
         # 1. Karma mesaj kontrolü (selamlama + soru)
-        has_greeting = any(re.search(pattern, user_query.lower()) for pattern in conversation_manager.greeting_patterns)
-        has_question = any(indicator in user_query.lower() for indicator in [
-            'nasıl', 'ne', 'nerede', 'neden', 'kim', 'hangi', 'kaç', 'ne zaman',
-            'şifre', 'parola', 'kayıt', 'ders', 'sınav', 'not', 'başvuru',
-            'eduroam', 'öğrenci', 'mezuniyet', 'devamsızlık', 'harç', 'burs', '?'
-        ])
+        # Tek geçişte tüm sözlük eşleşmeleri - detect_topic de aynı cache'lenmiş sonucu kullanır
+        term_matches = match_terms(user_query)
+        has_greeting = bool(term_matches.get("greeting"))
+        has_question = bool(term_matches.get("question_indicator"))
         
         # 2. Sadece selamlama kontrolü
         if conversation_manager.is_greeting(user_query):
@@ -135,33 +193,28 @@ def chat():
             })
 
         # 4. Güncellenmiş RAG sistemi ile yanıt al
-        rag_result = chat._chatbot.process_query(user_query)
+        rag_result = chat._chatbot.process_query(user_query, filters=filters)
         
         # Karma mesaj için "Merhaba!" ile başla
         final_response = rag_result["response"]
         if has_greeting and has_question:
             final_response = "Merhaba! " + rag_result["response"]
         
-        # Soru ve yanıtı veritabanına kaydet
+        # Soru ve yanıtı veritabanına kaydet (arka plan yazıcı kuyruğu)
         try:
-            from question_db import add_question, init_db
-            init_db()  # Veritabanını başlat
-            
             # Kaynak bilgisini al
             source_file = rag_result.get("sources", [None])[0] if rag_result.get("sources") else None
             
-            # Soruyu veritabanına kaydet
-            add_question(
+            question_log_writer.log_question(
                 question=user_query,
                 answer=final_response,
                 source_file=source_file,
                 source_keyword=None,  # Gerekirse eklenebilir
-                topic=None  # Otomatik tespit edilecek
+                topic=None,  # Otomatik tespit edilecek
+                embedding=rag_result.get("query_embedding"),  # Soru kümeleme için
+                evaluation_id=rag_result.get("evaluation_id")  # Arka plan değerlendirmesi
             )
             
-            # Stats.json dosyasını güncelle
-            update_stats_json()
-            
         except Exception as e:
             print(f"Soru kaydedilirken hata: {e}")
         
@@ -180,7 +233,8 @@ def chat():
             "confidence": rag_result.get("confidence", 0.5),
             "quality_level": rag_result.get("quality_level", "Normal"),
             "query_analysis": rag_result.get("query_analysis", {}),
-            "retrieval_info": rag_result.get("retrieval_info", {})
+            "retrieval_info": rag_result.get("retrieval_info", {}),
+            "filters": filters or {}
         })
 
     except Exception as e:
@@ -219,8 +273,7 @@ def clear_conversation():
         from enhanced_chat_manager import conversation_manager
         
         # Enhanced chat manager'daki conversation'ı temizle
-        if user_id in conversation_manager.conversations:
-            del conversation_manager.conversations[user_id]
+        conversation_manager.clear_conversation(user_id)
         
         # Chatbot instance'ını da sıfırla (yeni sohbet için temiz başlangıç)
         if hasattr(chat, '_chatbot'):
@@ -304,18 +357,12 @@ def admin_list_documents():
     try:
         docs = []
         
-        # Enhanced JSON dosyalarından keyword bilgilerini yükle
-        keyword_data = {}
-        for enhanced_file in ["enhanced_document_data.json", "enhanced_document_data_with_embeddings.json"]:
-            if os.path.exists(enhanced_file):
-                try:
-                    with open(enhanced_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        for item in data:
-                            if 'filename' in item and 'keyword' in item:
-                                keyword_data[item['filename']] = item['keyword']
-                except Exception as e:
-                    print(f"Enhanced dosya okunamadı {enhanced_file}: {e}")
+        # Corpus store'dan keyword bilgilerini yükle
+        try:
+            keyword_data = corpus_store.get_keywords()
+        except Exception as e:
+            keyword_data = {}
+            print(f"Corpus store okunamadı: {e}")
         
         # Hem uploads hem docs klasöründeki dosyaları listele
         folders_to_scan = [UPLOAD_FOLDER, os.path.join(os.getcwd(), "docs")]
@@ -332,7 +379,7 @@ def admin_list_documents():
                         # ChromaDB'de işlenmiş mi kontrol et
                         status = check_document_status(filename)
                         
-                        # Keyword bilgisini enhanced dosyalardan al
+                        # Keyword bilgisini corpus store'dan al
                         keyword = keyword_data.get(filename, None)
                         
                         docs.append(
@@ -520,6 +567,12 @@ def admin_delete_document(filename):
         except Exception as e:
             print(f"ChromaDB'den kaldırma hatası: {e}")
 
+        # Corpus store'dan da kaldır - yoksa chroma_docs.py dosyayı ChromaDB'ye geri ekler
+        try:
+            corpus_store.remove_documents([filename])
+        except Exception as e:
+            print(f"Corpus store'dan kaldırma hatası: {e}")
+
         return jsonify({"deleted": filename, "message": "Dosya başarıyla silindi"})
 
     except Exception as e:
@@ -532,15 +585,11 @@ def remove_from_chromadb(filename):
         if not chroma_manager.collection:
             return
 
-        # Dosyaya ait tüm chunk'ları bul
-        results = chroma_manager.collection.get(
-            where={"source_file": filename}
-        )
+        # Dosyaya ait tüm chunk'ları sil (collection versiyonu da artar)
+        deleted_count = chroma_manager.delete_documents(where={"source_file": filename})
 
-        if results and results.get("ids"):
-            # Bulunan ID'leri sil
-            chroma_manager.collection.delete(ids=results["ids"])
-            print(f"ChromaDB'den {len(results['ids'])} chunk silindi: {filename}")
+        if deleted_count:
+            print(f"ChromaDB'den {deleted_count} chunk silindi: {filename}")
         else:
             print(f"ChromaDB'de {filename} için chunk bulunamadı")
 
@@ -680,45 +729,14 @@ def admin_bulk_delete():
         deleted = []
         errors = []
 
-        import subprocess
-        import sys
-        python_exe = sys.executable
-
-        # Silme işleminden önce kalan dosyaların anahtar kelime bilgilerini kaydet
-        keyword_backup = {}
-        try:
-            with open("enhanced_document_data.json", "r", encoding="utf-8") as f:
-                current_data = json.load(f)
-                for item in current_data:
-                    filename = item.get("filename")
-                    if filename and filename not in filenames and "keyword" in item:
-                        keyword_backup[filename] = item["keyword"]
-        except Exception as e:
-            errors.append(f"Anahtar kelime backup hatası: {str(e)}")
-
-        # 1. ChromaDB'yi tamamen temizle
-        try:
-            result = subprocess.run([python_exe, "clear_chroma.py"], capture_output=True, text=True, timeout=30)
-            if result.returncode != 0:
-                errors.append(f"clear_chroma.py hatası: {result.stderr}")
-        except Exception as e:
-            errors.append(f"clear_chroma.py çalıştırılamadı: {str(e)}")
-
-        # 2. Enhanced json dosyalarını tamamen boşalt
-        for enhanced_file in ["enhanced_document_data.json", "enhanced_document_data_with_embeddings.json"]:
-            try:
-                with open(enhanced_file, 'w', encoding='utf-8') as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                errors.append(f"{enhanced_file} boşaltılamadı: {str(e)}")
-
-        # 3. Seçili dosyaları docs klasöründen sil
         docs_folder = os.path.join(os.getcwd(), "docs")
         for filename in filenames:
+            if not filename or ".." in filename or "/" in filename:
+                errors.append(f"{filename}: Geçersiz dosya adı")
+                continue
+
+            # 1. Dosyayı docs klasöründen sil
             try:
-                if not filename or ".." in filename or "/" in filename:
-                    errors.append(f"{filename}: Geçersiz dosya adı")
-                    continue
                 path = os.path.join(docs_folder, filename)
                 if os.path.exists(path):
                     os.remove(path)
@@ -727,80 +745,25 @@ def admin_bulk_delete():
                     errors.append(f"{filename}: Dosya bulunamadı (docs)")
             except Exception as e:
                 errors.append(f"{filename}: {str(e)}")
+                continue
 
-        # 4. Sırasıyla base_docs.py, embedder_docs.py, chroma_docs.py çalıştır
-        try:
-            result = subprocess.run([python_exe, "base_docs.py"], capture_output=True, text=True, timeout=60)
-            if result.returncode != 0:
-                errors.append(f"base_docs.py hatası: {result.stderr}")
-            result = subprocess.run([python_exe, "embedder_docs.py"], capture_output=True, text=True, timeout=120)
-            if result.returncode != 0:
-                errors.append(f"embedder_docs.py hatası: {result.stderr}")
-            result = subprocess.run([python_exe, "chroma_docs.py"], capture_output=True, text=True, timeout=60)
-            if result.returncode != 0:
-                errors.append(f"chroma_docs.py hatası: {result.stderr}")
-        except subprocess.TimeoutExpired:
-            errors.append("Pipeline script zaman aşımına uğradı")
-        except Exception as e:
-            errors.append(f"Pipeline script hatası: {str(e)}")
-
-        # 5. data.json içeriğini enhanced_document_data.json'a kopyala ve anahtar kelimeleri geri ekle
-        try:
-            with open("data.json", "r", encoding="utf-8") as f:
-                data_json_content = json.load(f)
-            
-            # Anahtar kelimeleri geri ekle
-            for item in data_json_content:
-                filename = item.get("filename")
-                if filename and filename in keyword_backup:
-                    item["keyword"] = keyword_backup[filename]
-            
-            with open("enhanced_document_data.json", "w", encoding="utf-8") as f:
-                json.dump(data_json_content, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            errors.append(f"data.json'dan enhanced_document_data.json'a kopyalama hatası: {str(e)}")
-
-        # 6. embedded_data.json içeriğini enhanced_document_data_with_embeddings.json'a kopyala ve anahtar kelimeleri geri ekle
-        try:
-            with open("embedded_data.json", "r", encoding="utf-8") as f:
-                embedded_json_content = json.load(f)
-            
-            # Anahtar kelimeleri geri ekle
-            for item in embedded_json_content:
-                filename = item.get("filename")
-                if filename and filename in keyword_backup:
-                    item["keyword"] = keyword_backup[filename]
-            
-            with open("enhanced_document_data_with_embeddings.json", "w", encoding="utf-8") as f:
-                json.dump(embedded_json_content, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            errors.append(f"embedded_data.json'dan enhanced_document_data_with_embeddings.json'a kopyalama hatası: {str(e)}")
-
-        # 7. data.json ve embedded_data.json dosyalarını temizle
-        for temp_file in ["data.json", "embedded_data.json"]:
+            # 2. Sadece bu dosyanın chunk'larını ChromaDB'den kaldır
             try:
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
+                chroma_manager.delete_documents(where={"source_file": filename})
             except Exception as e:
-                errors.append(f"{temp_file} temizlenemedi: {str(e)}")
+                errors.append(f"{filename}: ChromaDB silme hatası - {str(e)}")
 
-        # Sonuç dosyalarını oku ve response'a ekle
+        # 3. Corpus store'dan sadece silinen dosyaların partition'larını kaldır
+        # (kalan dosyaların anahtar kelimeleri ve embedding'leri yerinde kalır)
         try:
-            with open("enhanced_document_data.json", "r", encoding="utf-8") as f:
-                enhanced_data = json.load(f)
-            with open("enhanced_document_data_with_embeddings.json", "r", encoding="utf-8") as f:
-                enhanced_embed_data = json.load(f)
+            corpus_store.remove_documents(deleted)
         except Exception as e:
-            enhanced_data = []
-            enhanced_embed_data = []
-            errors.append(f"Son json dosyaları okunamadı: {str(e)}")
+            errors.append(f"Corpus store silme hatası: {str(e)}")
 
         response = {
             "deleted": deleted,
-            "enhanced_document_data": enhanced_data,
-            "enhanced_document_data_with_embeddings": enhanced_embed_data,
-            "keyword_backup": keyword_backup,
-            "message": "Silme ve pipeline işlemleri tamamlandı, kalan dosyaların anahtar kelimeleri korundu."
+            "documents": corpus_store.list_documents(),
+            "message": "Silme işlemi tamamlandı, kalan dosyaların anahtar kelimeleri korundu."
         }
         if errors:
             response["errors"] = errors
@@ -1107,20 +1070,35 @@ def admin_download_embeddings():
     try:
         file_type = request.args.get(
             "type", "collection"
-        )  # "collection", "metadata", "stats"
+        )  # "collection", "embeddings", "metadata", "stats"
 
-        if file_type == "collection":
-            # ChromaDB collection'ı export et
-            export_file = os.path.join(EMBEDDINGS_FOLDER, "collection_export.json")
-            result = chroma_manager.export_data(export_file, include_embeddings=False)
+        if file_type in ["collection", "embeddings"]:
+            # ChromaDB collection export'u - aynı collection versiyonu için cache'ten servis edilir
+            include_embeddings = file_type == "embeddings"
+            result = chroma_manager.get_export_artifact(
+                EMBEDDINGS_FOLDER, include_embeddings=include_embeddings
+            )
 
+            if result.get("version_changed"):
+                return jsonify({"error": "Collection güncelleniyor, tekrar deneyin"}), 503
             if result.get("error"):
                 return jsonify({"error": result["error"]}), 500
 
+            if include_embeddings:
+                if not result.get("embeddings_file"):
+                    return jsonify({"error": "Embedding bulunamadı"}), 404
+                return send_file(
+                    result["embeddings_file"],
+                    as_attachment=True,
+                    download_name="chromadb_embeddings.npy",
+                    etag=result["collection_version"],
+                )
+
             return send_file(
-                export_file,
+                result["output_file"],
                 as_attachment=True,
-                download_name="chromadb_collection.json",
+                download_name="chromadb_collection.jsonl",
+                etag=result["collection_version"],
             )
 
         elif file_type == "metadata":
@@ -1177,21 +1155,49 @@ def admin_chromadb_backup():
         data = request.get_json() or {}
         backup_name = data.get("name", None)
 
-        backup_path = chroma_manager.create_backup(backup_name)
+        backup_path = chroma_manager.create_backup(
+            backup_name,
+            keep_last=data.get("keep_last"),
+            max_age_days=data.get("max_age_days"),
+        )
 
         return jsonify(
-            {"backup_path": backup_path, "message": "Backup başarıyla oluşturuldu"}
+            {
+                "backup_path": backup_path,
+                "snapshot": chroma_manager.last_backup_info,
+                "message": "Backup başarıyla oluşturuldu",
+            }
         )
     except Exception as e:
         return jsonify({"error": f"Backup hatası: {str(e)}"}), 500
 
 
+@app.route("/api/admin/chromadb/snapshots", methods=["GET"])
+def admin_chromadb_snapshots():
+    """Mevcut ChromaDB snapshot'larını listeler"""
+    try:
+        snapshots = [
+            {key: value for key, value in snapshot.items() if key != "files"}
+            for snapshot in chroma_manager.list_snapshots()
+        ]
+        return jsonify({"snapshots": snapshots, "total": len(snapshots)})
+    except Exception as e:
+        return jsonify({"error": f"Snapshot listesi alınamadı: {str(e)}"}), 500
+
+
 @app.route("/api/admin/chromadb/optimize", methods=["POST"])
 def admin_chromadb_optimize():
-    """ChromaDB optimizasyonu yapar"""
+    """ChromaDB collection'ını ayarlı HNSW parametreleriyle yeniden oluşturur"""
     try:
-        result = chroma_manager.optimize_collection()
+        data = request.get_json(silent=True) or {}
+        result = chroma_manager.optimize_collection(
+            hnsw_params=data.get("hnsw_params"),
+            sample_size=data.get("sample_size"),
+            k=data.get("k"),
+        )
         return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": f"Geçersiz parametre: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"error": f"Optimizasyon hatası: {str(e)}"}), 500
 
@@ -1256,6 +1262,8 @@ def admin_embedder_cache_stats():
 def admin_system_status():
     """Sistem durumu özeti"""
     try:
+        from enhanced_chat_manager import conversation_manager
+
         # Dosya sayıları
         total_files = (
             len([f for f in os.listdir(UPLOAD_FOLDER) if allowed_file(f)])
@@ -1303,6 +1311,9 @@ def admin_system_status():
                     "total_disk_usage_mb": round(chroma_size + upload_size_mb, 2),
                     "status": "healthy",
                 },
+                "question_log": question_log_writer.get_stats(),
+                "response_evaluation": evaluation_pool.get_stats(),
+                "conversations": conversation_manager.store.stats(),
             }
         )
     except Exception as e:
@@ -1319,14 +1330,21 @@ def admin_stats():
             get_top_questions_with_topics,
             get_daily_user_stats,
             get_total_entry_count,
-            clean_obsolete_sources,
-            update_missing_keywords
+            get_daily_question_count,
+            get_stats_version,
+            get_corpus_version,
+            sync_with_corpus
         )
-        import sqlite3
-        from datetime import datetime, timedelta
         
-        # Önce eski kayıtları temizle
-        clean_obsolete_sources()
+        # Doküman listesi değiştiyse eski kayıtları temizle (değişmediyse işlem yapılmaz)
+        sync_with_corpus()
+        
+        # Özet tablolar değişmediyse (aynı gün) panel mevcut verisini kullanır
+        etag = f"stats-{get_stats_version()}-{get_corpus_version()}-{dt.now().strftime('%Y%m%d')}"
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
         
         # Toplam soru sayısı
         total_questions = get_total_questions()
@@ -1344,21 +1362,13 @@ def admin_stats():
         top_questions_list = [{"question": item["question"], "answer": item["answer"], "count": item["count"], "topic": item["topic"]} for item in top_questions]
         
         # Günlük soru sayısı (bugün)
-        today = datetime.now().strftime('%Y-%m-%d')
         try:
-            conn = sqlite3.connect("questions.db")
-            c = conn.cursor()
-            c.execute("""
-                SELECT COUNT(*) FROM questions 
-                WHERE DATE(created_at) = ?
-            """, (today,))
-            daily_questions = c.fetchone()[0]
-            conn.close()
+            daily_questions = get_daily_question_count()
         except Exception as e:
             daily_questions = 0
             print(f"Günlük soru sayısı alınamadı: {e}")
 
-        return jsonify({
+        response = jsonify({
             "totalQuestions": total_questions,
             "dailyQuestions": daily_questions,
             "dailyUsers": user_stats["daily_users"],
@@ -1368,6 +1378,8 @@ def admin_stats():
             "topSources": top_sources_list,
             "topQuestions": top_questions_list
         })
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         return jsonify({"error": f"Soru istatistikleri alınamadı: {str(e)}"}), 500
@@ -1389,47 +1401,30 @@ def admin_upload_and_process():
         save_path = os.path.join(UPLOAD_FOLDER, filename)
         file.save(save_path)
 
-        # 2. uploads klasörünü chunkla ve uploads_base.json'u güncelle
+        # 2. Dosyayı chunkla
         processor = AdvancedDocumentProcessor()
         data = processor.process_documents(save_path, keyword=keyword)
         if not data:
             return jsonify({"error": "Chunklama başarısız"}), 500
 
-        # uploads_base.json'u güncelle (duplicate dosya engelle)
-        uploads_base_path = "uploads_base.json"
-        if os.path.exists(uploads_base_path):
-            with open(uploads_base_path, "r", encoding="utf-8") as f:
-                all_data = json.load(f)
-        else:
-            all_data = []
-        # Duplicate filename'leri çıkar
-        new_filenames = {item.get("filename") for item in data}
-        all_data = [item for item in all_data if item.get("filename") not in new_filenames]
-        all_data.extend(data)
-        with open(uploads_base_path, "w", encoding="utf-8") as f:
-            json.dump(all_data, f, ensure_ascii=False, indent=2)
-
-        # 3. Embedding işlemini tetikle ve uploads_with_embed.json'u güncelle
-        from embedder import process_documents_with_embeddings
-        stats = process_documents_with_embeddings(
-            input_file="uploads_base.json",
-            output_file="uploads_with_embed.json",
-            model_config={
-                "primary_model": config.EMBEDDING_MODEL,
-                "use_ensemble": False,
-                "use_cache": True,
-                "use_gpu": True,
-            },
-        )
-        # Embedding sonrası uploads_with_embed.json'da dosya var mı kontrol et, yoksa hata dön
-        with open("uploads_with_embed.json", "r", encoding="utf-8") as f:
-            embed_data = json.load(f)
-        if not any(item.get("filename") == filename for item in embed_data):
-            return jsonify({"error": "Embedding sonrası dosya uploads_with_embed.json'a eklenemedi."}), 500
+        # 3. Sadece içeriği değişen ya da embedding'i olmayan dosyalar için embedding
+        # hesapla - chunk'lar ve embedding'ler aynı transaction'da yazılır
+        total_chunks = 0
+        missing = set(corpus_store.filenames_missing_embeddings(config.EMBEDDING_MODEL))
+        for item in data:
+            checksum = (item.get("document_metadata") or {}).get("checksum")
+            stored_checksum = corpus_store.get_checksum(item["filename"])
+            if item["filename"] in missing or not checksum or stored_checksum != checksum:
+                item = dict(item, embeddings=embedder.embed_batch(item.get("chunks", [])))
+                total_chunks += len(item.get("chunks", []))
+            corpus_store.upsert_document(item, config.EMBEDDING_MODEL)
+        new_filenames = [item["filename"] for item in data]
 
         # 4. ChromaDB'ye ekle
-        chroma_manager = ChromaDBManager()
-        chroma_manager.add_documents_batch(embed_data, batch_size=1000, skip_duplicates=True)
+        embed_data = list(corpus_store.iter_documents(new_filenames, include_embeddings=True))
+        if not any(item.get("embeddings") for item in embed_data):
+            return jsonify({"error": "Embedding sonrası dosya corpus store'a eklenemedi."}), 500
+        chroma_result = chroma_manager.add_documents_batch(embed_data, batch_size=1000, skip_duplicates=True)
 
         # 5. Dosyayı işlenmiş ana klasöre (docs/) taşı
         docs_folder = os.path.join(os.getcwd(), "docs")
@@ -1440,75 +1435,25 @@ def admin_upload_and_process():
         except Exception as e:
             app.logger.warning(f"Dosya docs klasörüne taşınamadı: {e}")
 
-        # 6. uploads_base.json içeriğini enhanced_document_data.json'a EKLE (mevcut veriyi koruyarak)
-        enhanced_base_path = "enhanced_document_data.json"
-        try:
-            if os.path.exists("uploads_base.json"):
-                with open("uploads_base.json", "r", encoding="utf-8") as f:
-                    uploads_base_data = json.load(f)
-            else:
-                uploads_base_data = []
-            if os.path.exists(enhanced_base_path):
-                with open(enhanced_base_path, "r", encoding="utf-8") as f:
-                    enhanced_base_data = json.load(f)
-            else:
-                enhanced_base_data = []
-            # uploads_base.json içeriğini mevcut enhanced veriye ekle (duplicate filename engelle)
-            existing_filenames = {item.get("filename") for item in enhanced_base_data}
-            new_items = [item for item in uploads_base_data if item.get("filename") not in existing_filenames]
-            enhanced_base_data.extend(new_items)
-            with open(enhanced_base_path, "w", encoding="utf-8") as f:
-                json.dump(enhanced_base_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            app.logger.error(f"enhanced_document_data.json güncellenemedi: {e}")
-
-        # 7. uploads_with_embed.json içeriğini enhanced_document_data_with_embeddings.json'a EKLE (mevcut veriyi koruyarak)
-        enhanced_embed_path = "enhanced_document_data_with_embeddings.json"
-        try:
-            if os.path.exists("uploads_with_embed.json"):
-                with open("uploads_with_embed.json", "r", encoding="utf-8") as f:
-                    uploads_embed_data = json.load(f)
-            else:
-                uploads_embed_data = []
-            if os.path.exists(enhanced_embed_path):
-                with open(enhanced_embed_path, "r", encoding="utf-8") as f:
-                    enhanced_embed_data = json.load(f)
-            else:
-                enhanced_embed_data = []
-            # uploads_with_embed.json içeriğini mevcut enhanced veriye ekle (duplicate filename engelle)
-            existing_filenames = {item.get("filename") for item in enhanced_embed_data}
-            new_items = [item for item in uploads_embed_data if item.get("filename") not in existing_filenames]
-            enhanced_embed_data.extend(new_items)
-            with open(enhanced_embed_path, "w", encoding="utf-8") as f:
-                json.dump(enhanced_embed_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            app.logger.error(f"enhanced_document_data_with_embeddings.json güncellenemedi: {e}")
-
-        # 8. uploads_base.json ve uploads_with_embed.json dosyalarını sil
-        try:
-            if os.path.exists("uploads_base.json"):
-                os.remove("uploads_base.json")
-            if os.path.exists("uploads_with_embed.json"):
-                os.remove("uploads_with_embed.json")
-        except Exception as e:
-            app.logger.error(f"uploads_base.json veya uploads_with_embed.json silinemedi: {e}")
-
-        # 9. uploads klasöründeki dosyaları docs klasörüne taşı
-        docs_folder = os.path.join(os.getcwd(), "docs")
-        os.makedirs(docs_folder, exist_ok=True)
+        # 6. uploads klasöründeki dosyaları docs klasörüne taşı
         try:
             for f in os.listdir(UPLOAD_FOLDER):
                 src_path = os.path.join(UPLOAD_FOLDER, f)
                 dst_path = os.path.join(docs_folder, f)
                 if os.path.isfile(src_path):
                     try:
-                        import shutil
                         shutil.move(src_path, dst_path)
                     except Exception as e:
                         app.logger.warning(f"{f} docs klasörüne taşınamadı: {e}")
         except Exception as e:
             app.logger.error(f"uploads klasöründen docs klasörüne taşıma hatası: {e}")
 
+        stats = {
+            "total_documents": len(new_filenames),
+            "embedded_chunks": total_chunks,
+            "chromadb": chroma_result,
+        }
+
         return jsonify({"success": True, "filename": filename, "stats": stats})
 
     except Exception as e:
@@ -1521,6 +1466,7 @@ def clear_questions():
     """Tüm soru veritabanını temizler"""
     try:
         from question_db import clear_all_questions
+        question_log_writer.flush()  # Kuyrukta bekleyen kayıtlar silmeden önce yazılsın
         clear_all_questions()
         return jsonify({"message": "Tüm sorular başarıyla temizlendi"})
     except Exception as e:
@@ -1535,6 +1481,7 @@ def clear_questions_advanced():
         period_type = data.get("period_type", "all")  # "all" veya "today"
         
         from question_db import clear_questions_by_period
+        question_log_writer.flush()  # Kuyrukta bekleyen kayıtlar silmeden önce yazılsın
         affected_rows = clear_questions_by_period(period_type)
         
         if period_type == "today":
@@ -1559,8 +1506,7 @@ def track_user_session():
         data = request.get_json()
         user_id = data.get("user_id", "anonymous")
         
-        from question_db import track_user_session
-        track_user_session(user_id, question_asked=False)
+        question_log_writer.track_session(user_id, question_asked=False)
         
         return jsonify({"status": "session_tracked"}), 200
     except Exception as e:
@@ -1582,7 +1528,7 @@ def update_stats_json():
             "totalQuestions": total_questions,
             "uniqueQuestions": total_questions,  # Şimdilik total ile aynı
             "topSources": [{"source": source, "count": count} for source, keyword, count in top_sources],
-            "topQuestions": [{"question": question, "count": count} for question, count in top_questions],
+            "topQuestions": [{"question": question, "count": count} for question, answer, count in top_questions],
             "lastUpdated": dt.now().isoformat()
         }
         
@@ -1607,13 +1553,18 @@ def get_daily_questions():
         limit = int(request.args.get('limit', 10))
         
         # Günlük soruları al
-        result = get_daily_questions_paginated(page, limit)
+        cursor = request.args.get('cursor')  # Keyset sayfalama (önceki yanıtın nextCursor'ı)
+        try:
+            result = get_daily_questions_paginated(page, limit, cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         return jsonify({
             "questions": result["questions"],
             "totalPages": result["total_pages"],
             "currentPage": page,
-            "totalQuestions": result["total_questions"]
+            "totalQuestions": result["total_questions"],
+            "nextCursor": result["next_cursor"]
         })
         
     except Exception as e:
@@ -1633,19 +1584,46 @@ def get_all_questions():
         limit = int(request.args.get('limit', 10))
         
         # Tüm soruları al
-        result = get_all_questions_paginated(page, limit)
+        cursor = request.args.get('cursor')  # Keyset sayfalama (önceki yanıtın nextCursor'ı)
+        try:
+            result = get_all_questions_paginated(page, limit, cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         return jsonify({
             "questions": result["questions"],
             "totalPages": result["total_pages"],
             "currentPage": page,
-            "totalQuestions": result["total_questions"]
+            "totalQuestions": result["total_questions"],
+            "nextCursor": result["next_cursor"]
         })
         
     except Exception as e:
         return jsonify({"error": f"Tüm sorular alınamadı: {str(e)}"}), 500
 
 
+@app.route("/api/admin/evaluations", methods=["GET"])
+def admin_evaluations():
+    """Arka planda yapılan yanıt değerlendirmelerinin özeti ve son değerlendirilen sorular"""
+    try:
+        from question_db import get_evaluation_summary, get_recent_evaluations
+
+        try:
+            limit = int(request.args.get("limit", 20))
+            max_score = request.args.get("max_score")
+            max_score = float(max_score) if max_score is not None else None
+        except ValueError:
+            return jsonify({"error": "limit ve max_score sayı olmalı"}), 400
+
+        return jsonify({
+            "summary": get_evaluation_summary(),
+            "recent": get_recent_evaluations(limit, max_score),
+            "pool": evaluation_pool.get_stats()
+        })
+    except Exception as e:
+        return jsonify({"error": f"Değerlendirmeler alınamadı: {str(e)}"}), 500
+
+
 if __name__ == "__main__":
     print("🚀 RAG Chatbot API başlatılıyor...")
     print("📍 API URL: http://localhost:5001")
@@ -16,6 +16,27 @@ from config import config
 
 logger = logging.getLogger(__name__)
 
+# advanced_clean_text desenleri - ingest'te her sayfa için çalışır, bir kez derlenir
+STRUCTURE_MARKER_RE = re.compile(r"\[(?:SAYFA|BAŞLIK|TABLO|GÖRSEL)[^\]]*\]")
+SPECIAL_CHAR_RE = re.compile(r'[^\w\sçÇğĞıİöÖşŞüÜ.,;:!?\-\(\)\[\]"\'\/]+')
+# \bSayfa\s*\d+\b / \bPage\s*\d+\b (IGNORECASE) ile aynı eşleşmeler: desen harf sınıfıyla
+# başladığında sre hızlı tarar, \b kontrolü ilk harften sonra lookbehind'la yapılır
+SAYFA_NUMBER_RE = re.compile(r"[Ssſ](?<=\b[Ssſ])[Aa][Yy][Ff][Aa]\s*\d+\b")
+PAGE_NUMBER_RE = re.compile(r"[Pp](?<=\b[Pp])[Aa][Gg][Ee]\s*\d+\b")
+HEADING_NUMBER_RE = re.compile(r"^\d+(?:\.\d+)*\s+")
+
+
+def _collapse_whitespace(text: str) -> str:
+    """re.sub(r"\\s+", " ", text) ile aynı sonuç - str.split ile birkaç kat hızlı"""
+    collapsed = " ".join(text.split())
+    if not collapsed:
+        return " " if text else ""
+    if text[0].isspace():
+        collapsed = " " + collapsed
+    if text[-1].isspace():
+        collapsed += " "
+    return collapsed
+
 
 @dataclass
 class DocumentMetadata:
@@ -294,44 +315,24 @@ class AdvancedDocumentProcessor:
 
         original_text = text
 
-        # Türkçe-spesifik düzeltmeler
-        turkish_corrections = {
-            "İ": "i",
-            "I": "ı",
-            "Ğ": "ğ",
-            "Ü": "ü",
-            "Ş": "ş",
-            "Ö": "ö",
-            "Ç": "ç",
-        }
-
-        # Yapısal etiketleri geçici olarak koru
-        structure_markers = re.findall(r"\[(?:SAYFA|BAŞLIK|TABLO|GÖRSEL)[^\]]*\]", text)
-
-        if preserve_structure:
-            # Yapısal bilgileri koru
-            pass
-        else:
+        if not preserve_structure:
             # Yapısal etiketleri kaldır
-            text = re.sub(r"\[(?:SAYFA|BAŞLIK|TABLO|GÖRSEL)[^\]]*\]", "", text)
+            text = STRUCTURE_MARKER_RE.sub("", text)
 
         # Temel temizlik
-        # Çoklu boşlukları tek boşluk yap
-        text = re.sub(r"\s+", " ", text)
+        # Çoklu boşlukları tek boşluk yap (bundan sonra metinde satır sonu kalmaz)
+        text = _collapse_whitespace(text)
 
-        # Özel karakterleri temizle (Türkçe karakterleri koru)
-        text = re.sub(r'[^\w\sçÇğĞıİöÖşŞüÜ.,;:!?\-\(\)\[\]"\'\/]', "", text)
+        # Özel karakterleri temizle (Türkçe karakterleri koru) - ardışık olanlar tek seferde
+        text = SPECIAL_CHAR_RE.sub("", text)
 
         # Gereksiz sayfa numaralarını temizle (ama önemli sayıları koru)
-        text = re.sub(r"\bSayfa\s*\d+\b", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"\bPage\s*\d+\b", "", text, flags=re.IGNORECASE)
+        text = SAYFA_NUMBER_RE.sub("", text)
+        text = PAGE_NUMBER_RE.sub("", text)
 
         # Başlık numaralarını kontrollü temizle
-        # Sadece satır başındaki numaralandırmayı temizle
-        text = re.sub(r"^\d+(\.\d+)*\s+", "", text, flags=re.MULTILINE)
-
-        # Çoklu satır sonlarını normalize et
-        text = re.sub(r"\n\s*\n+", "\n\n", text)
+        # Satır sonları yukarıda kalktığı için sadece metin başındaki numaralandırma
+        text = HEADING_NUMBER_RE.sub("", text)
 
         # Başındaki ve sonundaki boşlukları temizle
         text = text.strip()
@@ -396,7 +397,7 @@ class AdvancedDocumentProcessor:
                         start_pos=match.start(),
                         end_pos=match.end(),
                         chunk_type="page",
-                        metadata={"page_number": page_num},
+                        metadata={"page_number": int(page_num)},
                     )
                 )
             else:
@@ -410,7 +411,7 @@ class AdvancedDocumentProcessor:
                             start_pos=match.start(),
                             end_pos=match.end(),
                             chunk_type="page_part",
-                            metadata={"page_number": page_num, "part": i + 1},
+                            metadata={"page_number": int(page_num), "part": i + 1},
                         )
                     )
 
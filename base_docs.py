@@ -1,24 +1,44 @@
 # base_docs.py
 """
-Sadece docs klasöründeki dosyaları işler ve data.json olarak kaydeder.
+Sadece docs klasöründeki dosyaları işler ve corpus store'a kaydeder.
+İçeriği (checksum) değişmemiş dosyalar yeniden işlenmez; docs (ve işlenmeyi
+bekleyen uploads) klasöründe artık olmayan dosyalar store'dan silinir.
 """
 import os
-import json
 from base import AdvancedDocumentProcessor
+from corpus_store import CorpusStore
 
 def main():
     DOCS_FOLDER = "docs"
-    OUTPUT_JSON = "data.json"
+    UPLOAD_FOLDER = "uploads"
     if not os.path.exists(DOCS_FOLDER):
         print(f"[base_docs] {DOCS_FOLDER} klasörü yok.")
         return
     
     processor = AdvancedDocumentProcessor()
-    data = processor.process_documents(DOCS_FOLDER)
+    store = CorpusStore()
     
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"[base_docs] {OUTPUT_JSON} kaydedildi. {len(data)} dosya işlendi.")
+    processed = 0
+    skipped = 0
+    present = set()
+    for file_path in processor._get_supported_files(DOCS_FOLDER):
+        filename = os.path.basename(file_path)
+        present.add(filename)
+        checksum = processor._calculate_checksum(file_path)
+        if checksum and store.get_checksum(filename) == checksum:
+            skipped += 1
+            continue
+        
+        for item in processor.process_documents(file_path):
+            store.upsert_document(item)
+            processed += 1
+    
+    # Upload pipeline'ı dosyayı store'a yazdıktan sonra docs'a taşır - uploads'takiler korunur
+    if os.path.exists(UPLOAD_FOLDER):
+        present.update(os.listdir(UPLOAD_FOLDER))
+    removed = store.remove_documents([name for name in store.list_filenames() if name not in present])
+    
+    print(f"[base_docs] corpus store güncellendi. {processed} dosya işlendi, {skipped} dosya değişmediği için atlandı, {removed} silinen dosya kaldırıldı.")
 
 if __name__ == "__main__":
     main()
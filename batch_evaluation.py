@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Kayıtlı soru/yanıtlar için toplu kalite denetimi
+questions tablosu id sırasıyla sayfa sayfa okunur, kayıtlar parçalar halinde süreç
+havuzunda ResponseEvaluator.evaluate_batch ile değerlendirilir ve her parça
+bittiğinde sonuçlar question_audits'e yazılır (parça başına tek commit).
+Yarıda kesilen denetim tekrar çalıştırıldığında kaldığı yerden devam eder.
+Context yaklaşık kurulduğu için sonuçlar arka plan değerlendirmelerinin
+(question_evaluations) yerine geçmez, onlardan ayrı tutulur.
+
+Kullanım: python batch_evaluation.py [--all] [--workers N] [--chunk-size N] [--limit N]
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import config
+from evaluator import ResponseEvaluator
+from turkish_analyzer import analyze
+import question_db
+
+_worker_evaluator: Optional[ResponseEvaluator] = None
+
+
+def _init_worker():
+    """Her süreçte tek değerlendirici - chunk istatistik cache'i parçalar arasında paylaşılır"""
+    global _worker_evaluator
+    _worker_evaluator = ResponseEvaluator()
+
+
+def _evaluate_chunk(chunk: List[Tuple[Any, Dict[str, Any]]]) -> List[Tuple[Any, Dict[str, Any]]]:
+    if _worker_evaluator is None:
+        _init_worker()
+    evaluations = _worker_evaluator.evaluate_batch([item for _, item in chunk])
+    return [(key, evaluation) for (key, _), evaluation in zip(chunk, evaluations)]
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def evaluate_many(
+    items: Iterable[Tuple[Any, Dict[str, Any]]],
+    on_results: Callable[[List[Tuple[Any, Dict[str, Any]]]], Any],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> int:
+    """(anahtar, kayıt) çiftlerini süreçlere dağıtarak değerlendir
+
+    Kayıt: {"query", "response", "sources", "documents"}. Her parça bitince
+    on_results(parçanın (anahtar, değerlendirme) listesi) çağrılır. Aynı anda en
+    fazla workers * 2 parça bekler; items bir iterator olabilir. Değerlendirilen
+    kayıt sayısını döndürür.
+    """
+    workers = workers or config.AUDIT_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or config.AUDIT_CHUNK_SIZE
+    chunks = _chunked(items, chunk_size)
+    total = 0
+
+    if workers == 1:
+        for chunk in chunks:
+            results = _evaluate_chunk(chunk)
+            on_results(results)
+            total += len(results)
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_evaluate_chunk, chunk))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results = future.result()
+                    on_results(results)
+                    total += len(results)
+        for future in pending:
+            results = future.result()
+            on_results(results)
+            total += len(results)
+    return total
+
+
+class _ContextLoader:
+    """Kayıtlı soru için kaynak dosyadan en alakalı chunk'ları seç
+
+    Sorulma anındaki retrieval sonucu saklanmadığı için context, soruyla en çok
+    ortak gövdeye sahip AUDIT_CONTEXT_CHUNKS chunk ile yaklaşık olarak kurulur.
+    """
+
+    def __init__(self, max_chunks: Optional[int] = None, max_files: int = 64):
+        self.max_chunks = max_chunks or config.AUDIT_CONTEXT_CHUNKS
+        self.max_files = max_files
+        self._files: Dict[str, List[Tuple[str, set]]] = {}
+
+    def _file_chunks(self, source_file: str) -> List[Tuple[str, set]]:
+        chunks = self._files.get(source_file)
+        if chunks is None:
+            try:
+                texts = question_db._get_corpus_store().get_chunks(source_file)
+            except Exception:
+                texts = []
+            chunks = [(text, set(analyze(text))) for text in texts]
+            if len(self._files) >= self.max_files:
+                self._files.pop(next(iter(self._files)))
+            self._files[source_file] = chunks
+        return chunks
+
+    def documents_for(self, question: str, source_file: Optional[str]) -> List[str]:
+        if not source_file:
+            return []
+        chunks = self._file_chunks(source_file)
+        if not chunks:
+            return []
+        query_terms = set(analyze(question or ""))
+        ranked = sorted(chunks, key=lambda chunk: len(query_terms & chunk[1]), reverse=True)
+        return [text for text, _ in ranked[: self.max_chunks]]
+
+
+def _audit_items(
+    only_missing: bool, limit: Optional[int], page_size: int = 1000
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """questions tablosundan denetim kayıtları - anahtar soru id"""
+    loader = _ContextLoader()
+    after_id = 0
+    produced = 0
+    while limit is None or produced < limit:
+        size = page_size if limit is None else min(page_size, limit - produced)
+        rows = question_db.get_questions_for_audit(after_id, size, only_missing)
+        if not rows:
+            return
+        for question_id, question, answer, source_file in rows:
+            yield question_id, {
+                "query": question,
+                "response": answer,
+                "sources": [source_file] if source_file else [],
+                "documents": loader.documents_for(question, source_file),
+            }
+        produced += len(rows)
+        after_id = rows[-1][0]
+
+
+def run_audit(
+    only_missing: bool = True,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Kayıtlı soruları değerlendir ve sonuçları parça parça question_audits'e yaz"""
+    question_db.init_db()
+    start = time.perf_counter()
+    written = 0
+
+    def save(results):
+        nonlocal written
+        question_db.save_audit_evaluations(results)
+        written += len(results)
+        print(f"   💾 {written} değerlendirme yazıldı ({time.perf_counter() - start:.1f} sn)")
+
+    total = evaluate_many(_audit_items(only_missing, limit), save, workers, chunk_size)
+    elapsed = time.perf_counter() - start
+    return {
+        "evaluated": total,
+        "elapsed_seconds": round(elapsed, 2),
+        "per_second": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıtlı soru/yanıtların toplu kalite denetimi")
+    parser.add_argument("--all", action="store_true", help="Değerlendirmesi/denetimi olanlar dahil tüm soruları yeniden denetle")
+    parser.add_argument("--workers", type=int, default=None, help="Süreç sayısı (varsayılan: AUDIT_WORKERS / CPU sayısı)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Süreç başına parça boyutu")
+    parser.add_argument("--limit", type=int, default=None, help="En fazla bu kadar soru değerlendir")
+    args = parser.parse_args()
+
+    print("🔍 Toplu kalite denetimi başlıyor...")
+    result = run_audit(
+        only_missing=not args.all,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        limit=args.limit,
+    )
+    print(
+        f"✅ {result['evaluated']} soru değerlendirildi - "
+        f"{result['elapsed_seconds']} sn ({result['per_second']} kayıt/sn)"
+    )
+    summary = question_db.get_evaluation_summary(audit=True)
+    print(f"📊 Ortalama skor: {summary['averages'].get('overall_score')} | Seviyeler: {summary['quality_levels']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Metin son işleme mikro benchmark'ı
+Sohbet yolu (temizle_yanit, _post_process_response, _filter_response_for_single_query)
+ve ingest yolu (advanced_clean_text) için çağrı başına süreyi ölçer; derlenmiş
+desenlerin önceki (her çağrıda re.sub) sürümle aynı çıktıyı verdiğini de kontrol eder.
+
+Kullanım: python bench_text_cleanup.py [tekrar_sayısı]
+"""
+import re
+import sys
+import time
+
+from config import config
+from quer import temizle_yanit
+from rag_chatbot import AdvancedRAGChatbot
+from base import AdvancedDocumentProcessor
+
+ANSWERS = [
+    "<think>Kullanıcı sınav kurallarını soruyor, belgeye bakmalıyım.</think>"
+    "**Bilgisayar laboratuvarlarında** yapılan sınavlarda her türlü yiyecek ve içecek "
+    "(su dâhil) bulundurulması yasaktır. Bu kural Sınav Uygulama Yönergesi'nin 14. "
+    "maddesinde belirtilmiştir.\n\nKaynak: [sinav_yonergesi.pdf] Sayfa 3",
+    "Öğrenciler bir yarıyılda en fazla 45 AKTS krediye kayıt olabilir.   Ancak not "
+    "ortalaması 3.00 ve üzeri olan öğrenciler üst yarıyıldan ders alabilir...\n"
+    "[Anasayfa > Öğrenci İşleri]\nKaynak belge: lisans_egitim_yonetmeligi.docx  ",
+    "Mazeret sınavı başvurusu, mazeretin bitiminden itibaren __beş iş günü__ içinde "
+    "ilgili birime yapılır. Eğer rapor alınmışsa rapor aslı dilekçeye eklenir. "
+    "Başvurular fakülte yönetim kurulunca değerlendirilir. Kaynak: mazeret_sinavi.pdf",
+    "Belgede bu konuyla ilgili kurallar bulunmaktadır. Devam zorunluluğu teorik "
+    "derslerde %70, uygulamalı derslerde %80'dir. Devamsızlık sınırını aşan öğrenci "
+    "dönem sonu sınavına giremez. Yaz okulu ücretleri her yıl yeniden belirlenir.",
+]
+
+QUERIES = [
+    "bilgisayar laboratuvarında sınavda su içebilir miyim",
+    "bir dönemde kaç AKTS alabilirim",
+    "mazeret sınavına nasıl başvurulur",
+    "devam zorunluluğu yüzde kaç",
+]
+
+PAGE = (
+    "[SAYFA 1]\n1.2 GENEL HÜKÜMLER\n\nMADDE 14 – (1) Bilgisayar laboratuvarlarında "
+    "yapılan sınavlarda her türlü yiyecek ve içecek (su dâhil) bulundurulması "
+    "yasaktır.\n(2) Sınav süresince öğrenciler kimlik kartlarını masalarının üzerinde "
+    "bulundururlar. • Cep telefonları kapalı tutulur ★\n\nSayfa 1\nPage 1 of 12\n"
+    "[TABLO 1]\nDers | Kredi | AKTS\nMatematik I | 4 | 6\n[/TABLO 1]\n[/SAYFA 1]\n"
+) * 20
+
+
+# Önceki sürüm (her çağrıda derlenmemiş re.sub) - çıktı karşılaştırması ve hız farkı için
+def legacy_temizle_yanit(yazi: str) -> str:
+    if not yazi:
+        return ""
+    yazi = re.sub(r"<think>.*?</think>", "", yazi, flags=re.DOTALL | re.IGNORECASE)
+    yazi = re.sub(r"<.*?>", "", yazi, flags=re.DOTALL)
+    yazi = re.sub(r"\*\*|__|~~|`", "", yazi)
+    yazi = re.sub(r"\s+", " ", yazi).strip()
+    if len(yazi) > config.MAX_ANSWER_LENGTH:
+        words = yazi.split()
+        yazi = " ".join(words[: config.MAX_ANSWER_LENGTH // 5]) + "..."
+    return yazi
+
+
+def legacy_post_process_response(response: str) -> str:
+    flags = re.IGNORECASE | re.MULTILINE
+    response = re.sub(r'\s*Kaynak:\s*\[.*?\].*?$', '', response, flags=flags)
+    response = re.sub(r'\s*Kaynak:\s*.*?\.pdf.*?$', '', response, flags=flags)
+    response = re.sub(r'\s*Kaynak:\s*.*?\.docx.*?$', '', response, flags=flags)
+    response = re.sub(r'\s*Kaynak belge:\s*.*?$', '', response, flags=flags)
+    response = re.sub(r'\s*\[.*?\.pdf\].*?$', '', response, flags=flags)
+    response = re.sub(r'\s*\[.*?\.docx\].*?$', '', response, flags=flags)
+    response = re.sub(r'\s*\[Anasayfa.*?\].*?$', '', response, flags=flags)
+    response = re.sub(r'\.{3,}.*?$', '', response, flags=re.MULTILINE)
+    response = re.sub(r'\s+$', '', response, flags=re.MULTILINE)
+    if len(response) < config.MIN_ANSWER_LENGTH:
+        response += " Bu konuda daha detaylı bilgi için ilgili belgeleri inceleyebilirsiniz."
+    return response.strip()
+
+
+def legacy_remove_irrelevant_phrases(response: str) -> str:
+    for pattern in (
+        r'^[^.]*belgede[^.]*kurallar[^.]*\.',
+        r'^[^.]*ancak[^.]*\.',
+        r'^[^.]*eğer[^.]*\.',
+    ):
+        response = re.sub(pattern, '', response, flags=re.IGNORECASE)
+    response = re.sub(r'\s+', ' ', response)
+    response = re.sub(r'\.+', '.', response)
+    response = re.sub(r'\s*\.\s*', '. ', response)
+    response = response.strip(' .')
+    if response and not response.endswith('.'):
+        response += '.'
+    return response
+
+
+def legacy_advanced_clean_text(text: str) -> str:
+    original_text = text
+    re.findall(r"\[(?:SAYFA|BAŞLIK|TABLO|GÖRSEL)[^\]]*\]", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r'[^\w\sçÇğĞıİöÖşŞüÜ.,;:!?\-\(\)\[\]"\'\/]', "", text)
+    text = re.sub(r"\bSayfa\s*\d+\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\bPage\s*\d+\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"^\d+(\.\d+)*\s+", "", text, flags=re.MULTILINE)
+    text = re.sub(r"\n\s*\n+", "\n\n", text)
+    text = text.strip()
+    if len(text) < len(original_text) * 0.1:
+        return original_text.strip()
+    return text
+
+
+def bench(func, inputs, repeat: int) -> float:
+    """Çağrı başına ortalama süre (mikrosaniye)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in inputs:
+            func(*args)
+    return (time.perf_counter() - start) / (repeat * len(inputs)) * 1e6
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    # Modelleri yüklemeden sadece metin işleme metotlarını kullan
+    chatbot = AdvancedRAGChatbot.__new__(AdvancedRAGChatbot)
+    processor = AdvancedDocumentProcessor.__new__(AdvancedDocumentProcessor)
+
+    cases = [
+        (
+            "temizle_yanit",
+            temizle_yanit,
+            legacy_temizle_yanit,
+            [(answer,) for answer in ANSWERS],
+        ),
+        (
+            "_post_process_response",
+            lambda response: chatbot._post_process_response(response, []),
+            legacy_post_process_response,
+            [(answer,) for answer in ANSWERS],
+        ),
+        (
+            "_remove_irrelevant_phrases",
+            lambda response: chatbot._remove_irrelevant_phrases(response, ""),
+            legacy_remove_irrelevant_phrases,
+            [(answer,) for answer in ANSWERS],
+        ),
+        (
+            "advanced_clean_text",
+            processor.advanced_clean_text,
+            legacy_advanced_clean_text,
+            [(PAGE,)],
+        ),
+    ]
+
+    print(f"⏱️ Metin son işleme benchmark'ı ({repeat} tekrar)\n")
+    print(f"{'fonksiyon':<30} {'önceki µs':>10} {'yeni µs':>10} {'hızlanma':>9}")
+    for name, func, legacy, inputs in cases:
+        for args in inputs:
+            if func(*args) != legacy(*args):
+                print(f"❌ {name}: çıktı önceki sürümden farklı")
+                return 1
+        count = repeat if name != "advanced_clean_text" else max(repeat // 20, 1)
+        legacy_us = bench(legacy, inputs, count)
+        new_us = bench(func, inputs, count)
+        print(f"{name:<30} {legacy_us:>10.1f} {new_us:>10.1f} {legacy_us / new_us:>8.2f}x")
+
+    # Sohbet yolunun tamamı (filtreleme + son işleme) - önceki sürüm karşılığı yok
+    pipeline_us = bench(
+        lambda answer, query: chatbot._post_process_response(
+            chatbot._filter_response_for_single_query(temizle_yanit(answer), query), []
+        ),
+        list(zip(ANSWERS, QUERIES)),
+        repeat,
+    )
+    print(f"\n{'sohbet yolu (toplam)':<30} {'':>10} {pipeline_us:>10.1f}")
+    print(f"advanced_clean_text sayfa uzunluğu: {len(PAGE)} karakter")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,7 @@
-import sqlite3
 from tabulate import tabulate
+from question_db import get_connection
 
-conn = sqlite3.connect('questions.db')
-c = conn.cursor()
+c = get_connection().cursor()
 
 print('--- questions tablosu (son 5) ---')
 c.execute('SELECT id, question, answer, answer_hash, keywords, created_at FROM questions ORDER BY id DESC LIMIT 5')
@@ -19,4 +18,4 @@ c.execute('SELECT source_file, usage_count FROM source_usage ORDER BY usage_coun
 rows = c.fetchall()
 print(tabulate(rows, headers=['source_file','usage_count']))
 
-conn.close()
+c.close()
@@ -1,8 +1,13 @@
 import os
 import json
 import shutil
+import sqlite3
+import functools
 import hashlib
-from typing import List, Dict, Any, Optional, Tuple
+import time
+import uuid
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 import logging
 import chromadb
@@ -10,9 +15,68 @@ from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 import numpy as np
 from config import config
+from chunk_stats import compute_chunk_stats
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_MANIFEST = "snapshot_manifest.json"
+SWAP_MARKER = "collection_swap.json"
+
+# optimize_collection ile değiştirilebilen HNSW parametreleri: anahtar -> (tip, min, max)
+# hnsw:space dahil değil - benzerlik skorları cosine mesafesine göre hesaplanıyor
+HNSW_TUNABLE_PARAMS = {
+    "hnsw:M": (int, 2, 128),
+    "hnsw:construction_ef": (int, 10, 2000),
+    "hnsw:search_ef": (int, 1, 2000),
+    "hnsw:num_threads": (int, 1, 64),
+    "hnsw:resize_factor": (float, 1.0, 10.0),
+    "hnsw:batch_size": (int, 1, 100000),
+    "hnsw:sync_threshold": (int, 1, 1000000),
+}
+
+
+def validate_hnsw_params(hnsw_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """İstekten gelen HNSW parametrelerini izinli anahtar, tip ve aralığa göre doğrula
+
+    Anahtarlar "hnsw:" önekli ya da öneksiz verilebilir. Hatalı girdide ValueError.
+    """
+    if hnsw_params is None:
+        return {}
+    if not isinstance(hnsw_params, dict):
+        raise ValueError("hnsw_params bir nesne olmalı")
+    params = {}
+    for key, value in hnsw_params.items():
+        name = str(key) if str(key).startswith("hnsw:") else f"hnsw:{key}"
+        if name not in HNSW_TUNABLE_PARAMS:
+            raise ValueError(f"{key} ayarlanabilir bir HNSW parametresi değil")
+        kind, low, high = HNSW_TUNABLE_PARAMS[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{key} sayı olmalı")
+        if kind is int and not float(value).is_integer():
+            raise ValueError(f"{key} tam sayı olmalı")
+        value = kind(value)
+        if not low <= value <= high:
+            raise ValueError(f"{key} {low} ile {high} arasında olmalı")
+        params[name] = value
+    return params
+
+
+def _positive_int(name: str, value: Any, maximum: int) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= maximum:
+        raise ValueError(f"{name} 1 ile {maximum} arasında bir tam sayı olmalı")
+    return value
+
+
+def _quiesce_writes(method):
+    """Yazma metodlarını snapshot alınırken bekletmek için write lock ile sar"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class ChromaDBManager:
     """Gelişmiş ChromaDB yönetim sınıfı"""
@@ -31,6 +95,13 @@ class ChromaDBManager:
             "index_size_mb": 0,
             "last_updated": None,
         }
+        self.version_file = os.path.join(self.chroma_path, "collection_version.json")
+        self._version_lock = threading.Lock()
+        self._version_cache: Tuple[int, str] = (-1, "")
+        self._synced_version: Optional[str] = None
+        self.snapshot_root = f"{self.chroma_path.rstrip(os.sep)}_snapshots"
+        self._write_lock = threading.RLock()
+        self.last_backup_info: Dict[str, Any] = {}
 
         self._initialize_client()
 
@@ -52,26 +123,204 @@ class ChromaDBManager:
 
             # Yeni ChromaDB client konfigürasyonu
             self.client = chromadb.PersistentClient(path=self.chroma_path)
+            self._recover_collection_swap()
 
             # Collection oluştur/al
             self.collection = self.client.get_or_create_collection(
                 name=self.collection_name,
-                metadata={
-                    "hnsw:space": "cosine",  # Cosine similarity için optimize
-                    "expected_dimension": str(config.EMBEDDING_DIMENSION)  # Expected dimension metadata
-                },
+                metadata=self._collection_metadata(),
             )
             
             # Dimension uyumluluğunu kontrol et
             self._validate_collection_dimension()
+            self._migrate_page_numbers()
 
             logger.info(f"✅ ChromaDB başlatıldı: {self.chroma_path}")
+            self._synced_version = self.get_collection_version()
             self._update_stats()
 
         except Exception as e:
             logger.error(f"❌ ChromaDB başlatma hatası: {e}")
             raise
 
+    def _collection_metadata(
+        self, hnsw_params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """HNSW parametreleriyle collection metadata'sı oluştur
+
+        Config varsayılanlarının üzerine optimize_collection ile kaydedilmiş
+        parametreler, onların üzerine de verilen hnsw_params uygulanır. Böylece
+        get_or_create_collection çağrıları ayarlı değerleri geri almaz.
+        """
+        metadata = {
+            "hnsw:space": config.HNSW_SPACE,  # Cosine similarity için optimize
+            "hnsw:M": config.HNSW_M,
+            "hnsw:construction_ef": config.HNSW_CONSTRUCTION_EF,
+            "hnsw:search_ef": config.HNSW_SEARCH_EF,
+            "expected_dimension": str(config.EMBEDDING_DIMENSION),  # Expected dimension metadata
+        }
+        metadata.update(self._stored_hnsw_params())
+        metadata.update(validate_hnsw_params(hnsw_params))
+        return metadata
+
+    def _stored_hnsw_params(self) -> Dict[str, Any]:
+        """optimize_collection ile kaydedilmiş HNSW parametreleri (versiyon dosyasında)"""
+        try:
+            return validate_hnsw_params(self._read_version_file().get("hnsw_params"))
+        except ValueError as e:
+            logger.warning(f"⚠️ Kayıtlı HNSW parametreleri geçersiz, varsayılanlar kullanılıyor: {e}")
+            return {}
+
+    def _swap_marker_path(self) -> str:
+        return os.path.join(self.chroma_path, SWAP_MARKER)
+
+    def _recover_collection_swap(self):
+        """optimize_collection değişimi yarıda kaldıysa (çökme) collection'ları toparla
+
+        Değişim öncesi yazılan işaret dosyasına göre: asıl isim boşsa eski collection
+        geri adlandırılır; yeni collection asıl isme taşınmışsa eski silinir; değişim
+        hiç başlamamışsa yarım kalan kopya silinir.
+        """
+        marker_path = self._swap_marker_path()
+        if not os.path.exists(marker_path):
+            return
+        try:
+            with open(marker_path, "r", encoding="utf-8") as f:
+                marker = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Collection değişim işareti okunamadı: {e}")
+            return
+
+        live, retired, rebuild = marker["live"], marker["retired"], marker["rebuild"]
+        names = {getattr(c, "name", c) for c in self.client.list_collections()}  # type: ignore
+        if live not in names:
+            # İlk adlandırmadan sonra çökmüş - eski collection'ı geri al (yoksa tam kopyayı kullan)
+            restore = retired if retired in names else rebuild
+            if restore in names:
+                self.client.get_collection(restore).modify(name=live)  # type: ignore
+                logger.warning(f"⚠️ Yarım kalan optimizasyon toparlandı: {restore} -> {live}")
+                names = (names - {restore}) | {live}
+        elif retired in names:
+            # Yeni collection asıl isimde - değişim tamamlanmış, eskisini kaldır
+            self.client.delete_collection(retired)  # type: ignore
+            names.discard(retired)
+            logger.info(f"🧹 Yarım kalan optimizasyon tamamlandı, eski collection silindi: {retired}")
+            self._bump_version()
+        if rebuild in names:
+            self.client.delete_collection(rebuild)  # type: ignore
+            logger.info(f"🧹 Yarım kalan optimizasyon kopyası silindi: {rebuild}")
+        os.remove(marker_path)
+
+    def _read_version_file(self) -> Dict[str, Any]:
+        """Versiyon dosyasını oku - yoksa yeni bir token ile oluştur"""
+        try:
+            with open(self.version_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {"token": uuid.uuid4().hex[:8], "version": 0}
+            self._write_version_file(state)
+            return state
+
+    def _write_version_file(self, state: Dict[str, Any]):
+        """Versiyon dosyasını atomik olarak yaz"""
+        os.makedirs(self.chroma_path, exist_ok=True)
+        tmp_path = f"{self.version_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.version_file)
+
+    def get_collection_version(self) -> str:
+        """Collection içeriği değiştikçe değişen versiyon anahtarı
+
+        Versiyon chroma dizininde tutulur, böylece aynı dizini kullanan tüm
+        süreçler (api, *_docs.py script'leri) aynı değeri görür. Dizin silinirse
+        yeni token üretildiği için eski versiyonlarla çakışmaz.
+        """
+        try:
+            mtime = os.stat(self.version_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = -1
+        if mtime != -1 and mtime == self._version_cache[0]:
+            return self._version_cache[1]
+
+        with self._version_lock:
+            state = self._read_version_file()
+            version = f"{state['token']}-{state['version']}"
+            try:
+                self._version_cache = (os.stat(self.version_file).st_mtime_ns, version)
+            except FileNotFoundError:
+                pass
+            return version
+
+    def _bump_version(self, hnsw_params: Optional[Dict[str, Any]] = None) -> str:
+        """İçerik değişikliğinden sonra collection versiyonunu artır
+
+        hnsw_params verilirse aynı yazımda kalıcı HNSW parametreleri olarak kaydedilir.
+        """
+        with self._version_lock:
+            state = self._read_version_file()
+            state["version"] = int(state.get("version", 0)) + 1
+            if hnsw_params is not None:
+                state["hnsw_params"] = hnsw_params
+            self._write_version_file(state)
+        version = self.get_collection_version()
+        self._synced_version = version
+        return version
+
+    def _sync_collection(self):
+        """Başka bir süreç/instance collection'ı değiştirdiyse (ör. optimize) handle'ı yenile"""
+        version = self.get_collection_version()
+        if version == self._synced_version or not self.client:
+            return
+        try:
+            self.collection = self.client.get_or_create_collection(
+                name=self.collection_name, metadata=self._collection_metadata()
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Collection yenilenemedi: {e}")
+            return
+        self._synced_version = version
+
+    def _migrate_page_numbers(self, batch_size: int = 1000):
+        """Eski chunk'lardaki string page_number değerlerini bir kereliğine int'e çevir
+
+        page_min/page_max filtreleri ($gte/$lte) string değerleri sessizce dışarıda
+        bırakır. Dönüşüm yapıldığı versiyon dosyasına işlenir; sonraki başlangıçlarda
+        tarama tekrarlanmaz.
+        """
+        with self._version_lock:
+            if self._read_version_file().get("page_numbers_migrated"):
+                return
+        try:
+            with self._write_lock:
+                total_count = self.collection.count()  # type: ignore
+                updated = 0
+                for offset in range(0, total_count, batch_size):
+                    batch = self.collection.get(  # type: ignore
+                        limit=min(batch_size, total_count - offset),
+                        offset=offset,
+                        include=["metadatas"],  # type: ignore
+                    )
+                    ids, metadatas = [], []
+                    for doc_id, metadata in zip(batch.get("ids") or [], batch.get("metadatas") or []):
+                        page_number = (metadata or {}).get("page_number")
+                        if isinstance(page_number, str) and page_number.strip().isdigit():
+                            ids.append(doc_id)
+                            metadatas.append(dict(metadata, page_number=int(page_number)))
+                    if ids:
+                        self.collection.update(ids=ids, metadatas=metadatas)  # type: ignore
+                        updated += len(ids)
+
+                with self._version_lock:
+                    state = self._read_version_file()
+                    state["page_numbers_migrated"] = True
+                    self._write_version_file(state)
+                if updated:
+                    self._bump_version()
+                    logger.info(f"🔢 {updated} chunk'ın page_number değeri sayıya çevrildi")
+        except Exception as e:
+            logger.warning(f"⚠️ page_number dönüşümü yapılamadı, sayfa filtreleri eski chunk'ları kaçırabilir: {e}")
+
     def _validate_collection_dimension(self):
         """Collection'ın expected dimension ile uyumlu olduğunu kontrol et"""
         try:
@@ -137,42 +386,243 @@ class ChromaDBManager:
                     total_size += os.path.getsize(filepath)
         return total_size / (1024 * 1024)
 
-    def create_backup(self, backup_path: Optional[str] = None) -> str:
-        """Database backup oluştur"""
+    def create_backup(
+        self,
+        backup_path: Optional[str] = None,
+        keep_last: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+    ) -> str:
+        """Artımlı snapshot oluştur
+
+        Bir önceki snapshot'a göre değişmeyen segment dosyaları hard-link ile
+        paylaşılır, yalnızca değişenler kopyalanır. Canlı dizindeki dosyalara asla
+        link verilmez (HNSW dosyaları yerinde güncellenir). SQLite veritabanı online
+        backup API ile tutarlı şekilde kopyalanır; işlem süresince bu süreçteki
+        yazmalar bekletilir. Eksik kalan HNSW güncellemeleri açılışta Chroma'nın
+        embedding kuyruğundan tamamlanır.
+        """
+        if not os.path.exists(self.chroma_path):
+            logger.warning("Backup alınacak veri yok")
+            return ""
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         if backup_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = f"{self.chroma_path}_backup_{timestamp}"
-
+            backup_path = os.path.join(self.snapshot_root, f"snapshot_{timestamp}")
+            suffix = 1
+            while os.path.exists(backup_path):
+                backup_path = os.path.join(self.snapshot_root, f"snapshot_{timestamp}_{suffix}")
+                suffix += 1
+        elif not os.path.dirname(backup_path):
+            backup_path = os.path.join(self.snapshot_root, backup_path)
+        if os.path.exists(backup_path):
+            raise FileExistsError(f"Backup zaten var: {backup_path}")
+
+        tmp_path = f"{backup_path}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(backup_path)), exist_ok=True)
+        start = time.time()
         try:
-            if os.path.exists(self.chroma_path):
-                shutil.copytree(self.chroma_path, backup_path)
-                backup_size = self._get_directory_size(backup_path)
-                logger.info(
-                    f"✅ Backup oluşturuldu: {backup_path} ({backup_size:.2f} MB)"
-                )
-                return backup_path
-            else:
-                logger.warning("Backup alınacak veri yok")
-                return ""
+            previous = self._latest_snapshot()
+            prev_path = previous["path"] if previous else None
+            prev_files = previous.get("files", {}) if previous else {}
+
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            files: Dict[str, Dict[str, int]] = {}
+            linked = copied = 0
+            copied_bytes = 0
+
+            with self._write_lock:
+                version = self.get_collection_version()
+                for dirpath, _dirnames, filenames in os.walk(self.chroma_path):
+                    rel_dir = os.path.relpath(dirpath, self.chroma_path)
+                    os.makedirs(os.path.join(tmp_path, rel_dir), exist_ok=True)
+                    for filename in filenames:
+                        if not self._is_snapshot_file(filename):
+                            continue
+                        src = os.path.join(dirpath, filename)
+                        rel = os.path.normpath(os.path.join(rel_dir, filename))
+                        dst = os.path.join(tmp_path, rel)
+
+                        if filename.endswith(".sqlite3"):
+                            self._backup_sqlite(src, dst)
+                            copied += 1
+                            copied_bytes += os.path.getsize(dst)
+                            continue
+
+                        st = os.stat(src)
+                        files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+                        prev_file = os.path.join(prev_path, rel) if prev_path else None
+                        if (
+                            prev_file
+                            and prev_files.get(rel) == files[rel]
+                            and os.path.exists(prev_file)
+                        ):
+                            try:
+                                os.link(prev_file, dst)
+                                linked += 1
+                                continue
+                            except OSError:
+                                pass  # Farklı dosya sistemi vb. - kopyala
+                        shutil.copy2(src, dst)
+                        copied += 1
+                        copied_bytes += st.st_size
+
+            manifest = {
+                "created_at": datetime.now().isoformat(),
+                "collection_version": version,
+                "source": os.path.abspath(self.chroma_path),
+                "files": files,
+            }
+            with open(os.path.join(tmp_path, SNAPSHOT_MANIFEST), "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, backup_path)
+
+            self.last_backup_info = {
+                "path": backup_path,
+                "collection_version": version,
+                "linked_files": linked,
+                "copied_files": copied,
+                "copied_mb": round(copied_bytes / (1024 * 1024), 2),
+                "duration_seconds": round(time.time() - start, 2),
+            }
+            logger.info(
+                f"✅ Snapshot oluşturuldu: {backup_path} "
+                f"({linked} link, {copied} kopya, {self.last_backup_info['copied_mb']:.2f} MB)"
+            )
+
+            if os.path.dirname(os.path.abspath(backup_path)) == os.path.abspath(self.snapshot_root):
+                removed = self.prune_snapshots(keep_last, max_age_days)
+                self.last_backup_info["pruned"] = removed
+            return backup_path
         except Exception as e:
+            shutil.rmtree(tmp_path, ignore_errors=True)
             logger.error(f"❌ Backup hatası: {e}")
             raise
 
+    @staticmethod
+    def _is_snapshot_file(filename: str) -> bool:
+        """Snapshot'a alınacak dosya mı (SQLite yan dosyaları ve versiyon dosyası hariç)"""
+        if filename in ("collection_version.json", SNAPSHOT_MANIFEST):
+            return False
+        return not filename.endswith(("-wal", "-shm", "-journal", ".tmp"))
+
+    @staticmethod
+    def _backup_sqlite(src: str, dst: str):
+        """SQLite dosyasını online backup API ile tutarlı şekilde kopyala"""
+        source = sqlite3.connect(f"file:{src}?mode=ro", uri=True)
+        target = sqlite3.connect(dst)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """Snapshot dizinindeki snapshot'ları eskiden yeniye listele"""
+        snapshots = []
+        if not os.path.isdir(self.snapshot_root):
+            return snapshots
+        for name in os.listdir(self.snapshot_root):
+            path = os.path.join(self.snapshot_root, name)
+            manifest_path = os.path.join(path, SNAPSHOT_MANIFEST)
+            if not os.path.isfile(manifest_path):
+                continue
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            snapshots.append(
+                {
+                    "name": name,
+                    "path": path,
+                    "created_at": manifest.get("created_at", ""),
+                    "collection_version": manifest.get("collection_version"),
+                    "files": manifest.get("files", {}),
+                }
+            )
+        snapshots.sort(key=lambda item: item["created_at"])
+        return snapshots
+
+    def _latest_snapshot(self) -> Optional[Dict[str, Any]]:
+        snapshots = self.list_snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def prune_snapshots(
+        self, keep_last: Optional[int] = None, max_age_days: Optional[float] = None
+    ) -> List[str]:
+        """Saklama politikasına göre eski snapshot'ları sil - en yenisi her zaman kalır
+
+        Hard-link kullanıldığı için bir snapshot'ı silmek diğerlerinin paylaştığı
+        dosyaları etkilemez.
+        """
+        keep_last = keep_last if keep_last is not None else config.CHROMA_SNAPSHOT_KEEP_LAST
+        max_age_days = (
+            max_age_days if max_age_days is not None else config.CHROMA_SNAPSHOT_MAX_AGE_DAYS
+        )
+        snapshots = self.list_snapshots()
+        now = datetime.now()
+        removed = []
+        for index, snapshot in enumerate(reversed(snapshots)):
+            if index == 0:
+                continue
+            too_many = keep_last is not None and index >= max(keep_last, 1)
+            too_old = False
+            if max_age_days is not None:
+                try:
+                    created = datetime.fromisoformat(snapshot["created_at"])
+                    too_old = (now - created).total_seconds() > max_age_days * 86400
+                except ValueError:
+                    pass
+            if too_many or too_old:
+                shutil.rmtree(snapshot["path"], ignore_errors=True)
+                removed.append(snapshot["name"])
+        if removed:
+            logger.info(f"🧹 {len(removed)} eski snapshot silindi")
+        return removed
+
+    @_quiesce_writes
     def restore_from_backup(self, backup_path: str):
-        """Backup'tan geri yükle"""
+        """Snapshot'tan geri yükle - hazırlanan kopya dizin değişimiyle devreye alınır"""
         try:
+            if not os.path.exists(backup_path) and os.path.exists(
+                os.path.join(self.snapshot_root, backup_path)
+            ):
+                backup_path = os.path.join(self.snapshot_root, backup_path)
             if not os.path.exists(backup_path):
                 raise FileNotFoundError(f"Backup bulunamadı: {backup_path}")
 
-            # Mevcut veriyi temizle
-            if os.path.exists(self.chroma_path):
-                shutil.rmtree(self.chroma_path)
+            # Snapshot dosyaları başka snapshot'larla paylaşıldığı için gerçek kopya hazırla
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            base_path = self.chroma_path.rstrip(os.sep)
+            staging_path = f"{base_path}_restore_{timestamp}"
+            retired_path = f"{base_path}_retired_{timestamp}"
+            shutil.copytree(
+                backup_path,
+                staging_path,
+                ignore=shutil.ignore_patterns(SNAPSHOT_MANIFEST, "collection_version.json"),
+            )
 
-            # Backup'ı geri yükle
-            shutil.copytree(backup_path, self.chroma_path)
+            # Açık client'ı bırak
+            clear_cache = getattr(self.client, "clear_system_cache", None)
+            if callable(clear_cache):
+                clear_cache()
+            self.client = None
+            self.collection = None
 
-            # Client'ı yeniden başlat
+            # Dizin değişimi
+            if os.path.exists(self.chroma_path):
+                os.rename(self.chroma_path, retired_path)
+            try:
+                os.rename(staging_path, self.chroma_path)
+            except Exception:
+                if os.path.exists(retired_path):
+                    os.rename(retired_path, self.chroma_path)
+                raise
+
+            # Client'ı yeniden başlat - yeni versiyon token'ı eski cache'lerle çakışmaz
             self._initialize_client()
+            self._bump_version()
+            shutil.rmtree(retired_path, ignore_errors=True)
 
             logger.info(f"✅ Backup geri yüklendi: {backup_path}")
 
@@ -180,6 +630,7 @@ class ChromaDBManager:
             logger.error(f"❌ Restore hatası: {e}")
             raise
 
+    @_quiesce_writes
     def clear_collection(self):
         """Collection'ı temizle"""
         try:
@@ -188,8 +639,9 @@ class ChromaDBManager:
                 return
             self.client.delete_collection(self.collection_name)  # type: ignore
             self.collection = self.client.get_or_create_collection(
-                name=self.collection_name, metadata={"hnsw:space": "cosine"}
+                name=self.collection_name, metadata=self._collection_metadata()
             )
+            self._bump_version()
             self._update_stats()
             logger.info("✅ Collection temizlendi")
         except Exception as e:
@@ -224,6 +676,7 @@ class ChromaDBManager:
             logger.error(f"❌ Duplicate kontrol hatası: {e}")
             return {"error": str(e)}
 
+    @_quiesce_writes
     def add_documents_batch(
         self,
         data: List[Dict[str, Any]],
@@ -327,6 +780,9 @@ class ChromaDBManager:
                 errors.append(error_msg)
                 continue
 
+        if total_added > 0:
+            self._bump_version()
+
         # İstatistikleri güncelle
         self._update_stats()
 
@@ -401,6 +857,13 @@ class ChromaDBManager:
                 # Chunk-specific metadata ekle
                 if chunk_metadata and idx < len(chunk_metadata):
                     metadata.update(chunk_metadata[idx])
+                # Sayfa aralığı filtresi için sayfa numarası sayı olarak saklanır
+                page_number = metadata.get("page_number")
+                if isinstance(page_number, str) and page_number.isdigit():
+                    metadata["page_number"] = int(page_number)
+
+                # Sorgu anında tekrar hesaplanmaması için türetilmiş chunk verileri
+                metadata.update(compute_chunk_stats(chunk))
 
                 ids.append(unique_id)
                 embeddings.append(embedding)
@@ -409,6 +872,29 @@ class ChromaDBManager:
 
         return ids, embeddings, metadatas, documents
 
+    @_quiesce_writes
+    def delete_documents(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """ID listesi veya where koşuluna uyan chunk'ları sil, silinen sayısını döndür"""
+        if not self.collection:
+            logger.error("ChromaDB collection None, silme yapılamadı.")
+            return 0
+        if ids is None:
+            if not where:
+                raise ValueError("ids veya where belirtilmeli")
+            found = self.collection.get(where=where, include=[])  # type: ignore
+            ids = (found.get("ids") or []) if found else []
+        if not ids:
+            return 0
+
+        self.collection.delete(ids=ids)
+        self._bump_version()
+        self._update_stats()
+        return len(ids)
+
     def search_similar(
         self,
         query_embedding: List[float],
@@ -417,6 +903,7 @@ class ChromaDBManager:
     ) -> Dict[str, Any]:
         """Gelişmiş similarity search"""
         try:
+            self._sync_collection()
             if not self.collection:
                 logger.error("ChromaDB collection None, arama yapılamadı.")
                 return {
@@ -455,23 +942,170 @@ class ChromaDBManager:
                 "total_found": 0,
             }
 
+    def search_many(
+        self,
+        query_embeddings: Union[np.ndarray, List[List[float]]],
+        n_results: int = 5,
+        filters: Optional[Union[Dict[str, Any], List[Optional[Dict[str, Any]]]]] = None,
+        include_documents: bool = False,
+    ) -> Dict[str, Any]:
+        """(N, D) sorgu matrisi için toplu similarity search
+
+        Tüm sorgular tek bir backend çağrısıyla aranır; sorgu başına farklı filtre
+        verilirse aynı filtreyi paylaşan sorgular tek çağrıda gruplanır.
+        Sonuçlar kompakt diziler olarak döner:
+          ids: (N, k) object array, boş hücreler None
+          distances: (N, k) float32 array, boş hücreler inf
+          counts: (N,) int32 array, her sorgu için bulunan sonuç sayısı
+        include_documents=True ise sorgu başına documents/metadatas listeleri eklenir.
+        """
+        matrix = np.asarray(query_embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        n_queries = matrix.shape[0]
+
+        result = {
+            "ids": np.full((n_queries, n_results), None, dtype=object),
+            "distances": np.full((n_queries, n_results), np.inf, dtype=np.float32),
+            "counts": np.zeros(n_queries, dtype=np.int32),
+        }
+        if include_documents:
+            result["documents"] = [[] for _ in range(n_queries)]
+            result["metadatas"] = [[] for _ in range(n_queries)]
+
+        if n_queries == 0:
+            return result
+        self._sync_collection()
+        if not self.collection:
+            logger.error("ChromaDB collection None, arama yapılamadı.")
+            return result
+
+        # Aynı where clause'u paylaşan sorguları grupla
+        if filters is None or isinstance(filters, dict):
+            where_clause = self._build_where_clause(filters) if filters else None
+            groups = [(where_clause, list(range(n_queries)))]
+        else:
+            if len(filters) != n_queries:
+                raise ValueError(
+                    f"Filtre sayısı sorgu sayısıyla eşleşmiyor ({len(filters)} vs {n_queries})"
+                )
+            grouped: Dict[str, Tuple[Optional[Dict[str, Any]], List[int]]] = {}
+            for row, query_filters in enumerate(filters):
+                where_clause = self._build_where_clause(query_filters) if query_filters else None
+                key = json.dumps(where_clause, sort_keys=True, ensure_ascii=False)
+                grouped.setdefault(key, (where_clause, []))[1].append(row)
+            groups = list(grouped.values())
+
+        include = ["distances"]
+        if include_documents:
+            include += ["documents", "metadatas"]
+
+        try:
+            for where_clause, rows in groups:
+                response = self.collection.query(
+                    query_embeddings=matrix[rows].tolist(),
+                    n_results=n_results,
+                    include=include,  # type: ignore
+                    where=where_clause,
+                )  # type: ignore
+                response_ids = response.get("ids") or []
+                response_distances = response.get("distances") or []
+                for pos, row in enumerate(rows):
+                    row_ids = response_ids[pos] if pos < len(response_ids) else []
+                    found = len(row_ids)
+                    if found == 0:
+                        continue
+                    result["ids"][row, :found] = row_ids
+                    result["distances"][row, :found] = response_distances[pos]
+                    result["counts"][row] = found
+                    if include_documents:
+                        result["documents"][row] = (response.get("documents") or [[]])[pos]
+                        result["metadatas"][row] = (response.get("metadatas") or [[]])[pos]
+        except Exception as e:
+            logger.error(f"❌ Toplu search hatası: {e}")
+
+        return result
+
+    def get_documents(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Chunk ID -> (doküman, metadata); bulunamayan ID'ler sonuçta yer almaz"""
+        self._sync_collection()
+        if not ids or not self.collection:
+            return {}
+        try:
+            found = self.collection.get(
+                ids=list(dict.fromkeys(ids)), include=["documents", "metadatas"]  # type: ignore
+            )
+        except Exception as e:
+            logger.error(f"❌ Doküman okuma hatası: {e}")
+            return {}
+        return {
+            doc_id: (doc, metadata or {})
+            for doc_id, doc, metadata in zip(
+                found.get("ids") or [],
+                found.get("documents") or [],
+                found.get("metadatas") or [],
+            )
+            if doc
+        }
+
+    def get_embeddings(self, ids: List[str]) -> np.ndarray:
+        """Verilen chunk ID'lerinin embedding'leri - (N, D) float32, ID sırasıyla
+
+        Bulunamayan ID'lerin satırı sıfır vektördür.
+        """
+        self._sync_collection()
+        if not ids or not self.collection:
+            return np.zeros((len(ids), 0), dtype=np.float32)
+
+        unique_ids = list(dict.fromkeys(ids))
+        try:
+            found = self.collection.get(ids=unique_ids, include=["embeddings"])  # type: ignore
+        except Exception as e:
+            logger.error(f"❌ Embedding okuma hatası: {e}")
+            return np.zeros((len(ids), 0), dtype=np.float32)
+
+        found_ids = found.get("ids") or []
+        found_embeddings = found.get("embeddings")
+        if not found_ids or found_embeddings is None or len(found_embeddings) == 0:
+            return np.zeros((len(ids), 0), dtype=np.float32)
+
+        vectors = np.asarray(found_embeddings, dtype=np.float32)
+        row_by_id = {doc_id: row for row, doc_id in enumerate(found_ids)}
+        matrix = np.zeros((len(ids), vectors.shape[1]), dtype=np.float32)
+        for row, doc_id in enumerate(ids):
+            source_row = row_by_id.get(doc_id)
+            if source_row is not None:
+                matrix[row] = vectors[source_row]
+        return matrix
+
     def _build_where_clause(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Filter'ları ChromaDB where clause'una çevir"""
-        where = {}
+        """Filter'ları ChromaDB where clause'una çevir
+
+        Desteklenen anahtarlar: source_files, file_types, page_min, page_max,
+        min_chunk_length, max_chunk_length ve metadata alanına birebir eşitlik.
+        Birden fazla koşul $and ile birleştirilir.
+        """
+        conditions = []
         for key, value in filters.items():
+            if value is None:
+                continue
             if key == "source_files" and isinstance(value, list):
-                where["source_file"] = {"$in": value}
+                conditions.append({"source_file": {"$in": value}})
             elif key == "file_types" and isinstance(value, list):
-                where["file_type"] = {"$in": value}
+                conditions.append({"file_type": {"$in": value}})
+            elif key == "page_min":
+                conditions.append({"page_number": {"$gte": int(value)}})
+            elif key == "page_max":
+                conditions.append({"page_number": {"$lte": int(value)}})
             elif key == "min_chunk_length":
-                where["chunk_length"] = {"$gte": value}
+                conditions.append({"chunk_length": {"$gte": value}})
             elif key == "max_chunk_length":
-                where["chunk_length"] = {"$lte": value}
-            elif isinstance(value, str):
-                where[key] = {"$eq": value}
-            elif isinstance(value, (int, float)):
-                where[key] = {"$eq": value}
-        return where if where else None
+                conditions.append({"chunk_length": {"$lte": value}})
+            elif isinstance(value, (str, int, float)):
+                conditions.append({key: {"$eq": value}})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
 
     def get_collection_info(self) -> Dict[str, Any]:
         """Collection bilgilerini al"""
@@ -508,100 +1142,372 @@ class ChromaDBManager:
             logger.error(f"❌ Collection info hatası: {e}")
             return {"error": str(e)}
 
-    def optimize_collection(self) -> Dict[str, Any]:
-        """Collection optimizasyonu"""
+    @_quiesce_writes
+    def optimize_collection(
+        self,
+        hnsw_params: Optional[Dict[str, Any]] = None,
+        sample_size: Optional[int] = None,
+        k: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> Dict[str, Any]:
+        """Collection'ı ayarlı HNSW parametreleriyle yeniden oluştur ve yenisiyle değiştir
+
+        Silinen kayıtlardan kalan boşluklar yeni index'e taşınmaz. Değişimden önce ve
+        sonra bir sorgu örneği üzerinde recall@k (brute-force cosine'a göre) ve
+        ortalama gecikme ölçülür. Hatalı parametrede ValueError.
+        """
         logger.info("🔧 Collection optimizasyonu başlıyor...")
 
+        if not self.client or not self.collection:
+            logger.error("ChromaDB collection None, optimizasyon yapılamadı.")
+            return {"error": "collection is None", "optimization_completed": False}
+
+        hnsw_params = validate_hnsw_params(hnsw_params)
+        sample_size = _positive_int("sample_size", sample_size or config.HNSW_OPTIMIZE_SAMPLE_SIZE, 1000)
+        k = _positive_int("k", k or config.DEFAULT_N_RESULTS, 100)
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        rebuild_name = f"{self.collection_name}_rebuild_{stamp}"
+        retired_name = f"{self.collection_name}_retired_{stamp}"
+        new_collection = None
+
         try:
             before_size = self._get_directory_size(self.chroma_path)
+            total_count = self.collection.count()  # type: ignore
+            if total_count == 0:
+                logger.info("⚠️ Collection boş, optimizasyon atlandı")
+                return {"optimization_completed": False, "reason": "empty collection"}
 
-            # ChromaDB'nin kendi optimizasyon fonksiyonları varsa çağır
-            # (Bu özellik ChromaDB versiyonuna göre değişebilir)
+            new_metadata = self._collection_metadata(hnsw_params)
+            new_collection = self.client.create_collection(
+                name=rebuild_name, metadata=new_metadata
+            )  # type: ignore
+
+            # Ölçüm sorguları önceden seçilir, kopyalama sırasında toplanır
+            rng = np.random.default_rng(42)
+            sample_rows = set(
+                rng.choice(total_count, size=min(sample_size, total_count), replace=False).tolist()
+            )
+            queries = []
 
+            # Tüm kayıtları batch'ler halinde yeni collection'a kopyala
+            copied = 0
+            for offset in range(0, total_count, batch_size):
+                batch = self.collection.get(
+                    limit=min(batch_size, total_count - offset),
+                    offset=offset,
+                    include=["embeddings", "metadatas", "documents"],  # type: ignore
+                )
+                if not batch or not batch.get("ids"):
+                    continue
+                new_collection.add(
+                    ids=batch["ids"],
+                    embeddings=batch["embeddings"],  # type: ignore
+                    metadatas=batch["metadatas"],  # type: ignore
+                    documents=batch["documents"],
+                )
+                for i, embedding in enumerate(batch["embeddings"]):  # type: ignore
+                    if copied + i in sample_rows:
+                        queries.append(embedding)
+                copied += len(batch["ids"])
+                logger.info(f"📦 Kopyalanan: {copied}/{total_count}")
+
+            if copied != total_count:
+                raise RuntimeError(f"Kopyalama eksik: {copied}/{total_count}")
+
+            queries = np.asarray(queries, dtype=np.float32)
+            ground_truth = self._exact_top_k(self.collection, queries, k, batch_size)
+
+            before = self._measure_recall_latency(self.collection, queries, ground_truth, k)
+            after = self._measure_recall_latency(new_collection, queries, ground_truth, k)
+
+            # Değişim: eski collection'ı kenara al, yenisini asıl isme taşı. Chroma iki
+            # adlandırmayı tek işlemde yapamadığı için araya düşen bir çökme başlangıçta
+            # işaret dosyasından toparlanır (_recover_collection_swap).
+            with open(self._swap_marker_path(), "w", encoding="utf-8") as f:
+                json.dump({"live": self.collection_name, "retired": retired_name, "rebuild": rebuild_name}, f)
+            self.collection.modify(name=retired_name)
+            try:
+                new_collection.modify(name=self.collection_name)
+            except Exception:
+                self.collection.modify(name=self.collection_name)
+                raise
+            self.client.delete_collection(retired_name)  # type: ignore
+            os.remove(self._swap_marker_path())
+            self.collection = new_collection
+            new_collection = None
+            tuned_params = {
+                key: value for key, value in new_metadata.items() if key in HNSW_TUNABLE_PARAMS
+            }
+            self._bump_version(hnsw_params=tuned_params)
+
+            self._update_stats()
             after_size = self._get_directory_size(self.chroma_path)
 
             result = {
                 "before_size_mb": before_size,
                 "after_size_mb": after_size,
                 "size_reduction_mb": before_size - after_size,
+                "total_chunks": copied,
+                "hnsw_params": {
+                    key: value for key, value in new_metadata.items() if key.startswith("hnsw:")
+                },
+                "sample_size": len(queries),
+                "k": k,
+                "before": before,
+                "after": after,
                 "optimization_completed": True,
             }
 
             logger.info(
-                f"✅ Optimizasyon tamamlandı: {before_size:.2f}MB -> {after_size:.2f}MB"
+                f"✅ Optimizasyon tamamlandı: {before_size:.2f}MB -> {after_size:.2f}MB, "
+                f"recall@{k} {before['recall']:.3f} -> {after['recall']:.3f}, "
+                f"latency {before['avg_latency_ms']:.1f}ms -> {after['avg_latency_ms']:.1f}ms"
             )
             return result
 
         except Exception as e:
             logger.error(f"❌ Optimizasyon hatası: {e}")
+            if new_collection is not None:
+                try:
+                    self.client.delete_collection(rebuild_name)  # type: ignore
+                except Exception:
+                    pass
             return {"error": str(e), "optimization_completed": False}
 
+    @staticmethod
+    def _exact_top_k(collection, queries: np.ndarray, k: int, batch_size: int = 1000) -> List[set]:
+        """Brute-force cosine ile sorguların gerçek en yakın k komşusunun id'lerini bul
+
+        Collection batch batch okunur; bellekte sadece sorgu başına k aday tutulur.
+        """
+        normalized = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        top_sims = np.empty((len(queries), 0), dtype=np.float32)
+        top_ids = np.empty((len(queries), 0), dtype=object)
+        total_count = collection.count()
+        for offset in range(0, total_count, batch_size):
+            batch = collection.get(
+                limit=min(batch_size, total_count - offset),
+                offset=offset,
+                include=["embeddings"],  # type: ignore
+            )
+            if not batch or not batch.get("ids"):
+                continue
+            matrix = np.asarray(batch["embeddings"], dtype=np.float32)
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            sims = np.hstack([top_sims, normalized @ matrix.T])
+            batch_ids = np.asarray(batch["ids"], dtype=object)
+            ids = np.hstack([top_ids, np.broadcast_to(batch_ids, (len(queries), len(batch_ids)))])
+            keep = min(k, sims.shape[1])
+            best = np.argpartition(-sims, keep - 1, axis=1)[:, :keep]
+            top_sims = np.take_along_axis(sims, best, axis=1)
+            top_ids = np.take_along_axis(ids, best, axis=1)
+        return [set(row.tolist()) for row in top_ids]
+
+    @staticmethod
+    def _measure_recall_latency(
+        collection,
+        queries: np.ndarray,
+        ground_truth: List[set],
+        k: int,
+    ) -> Dict[str, float]:
+        """Bir collection üzerinde recall@k ve ortalama sorgu gecikmesini ölç"""
+        hits = 0
+        latencies = []
+        for query, truth in zip(queries, ground_truth):
+            start = time.perf_counter()
+            results = collection.query(
+                query_embeddings=[query.tolist()], n_results=k, include=[]
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(set((results.get("ids") or [[]])[0]) & truth)
+
+        total = sum(len(truth) for truth in ground_truth)
+        return {
+            "recall": hits / total if total else 0.0,
+            "avg_latency_ms": float(np.mean(latencies)) if latencies else 0.0,
+            "p95_latency_ms": float(np.percentile(latencies, 95)) if latencies else 0.0,
+        }
+
+    @_quiesce_writes
     def export_data(
-        self, output_file: str, include_embeddings: bool = False
+        self, output_file: str, include_embeddings: bool = False, batch_size: int = 1000
     ) -> Dict[str, Any]:
-        """Collection'ı dışa aktar"""
+        """Collection'ı bounded bellekle dışa aktar
+
+        Doküman ve metadata'lar output_file'a JSONL olarak (satır başına bir kayıt)
+        batch batch yazılır. include_embeddings=True ise embedding'ler aynı sırayla
+        `<output_file>.npy` yan dosyasına float32 (N, D) matris olarak yazılır;
+        JSONL kayıtlarındaki "row" alanı bu matrisin satırını gösterir.
+
+        Bu süreçteki yazmalar export boyunca bekletilir; başka bir süreç collection'ı
+        değiştirirse (versiyon değişir) yarım export atılır ve "version_changed" döner.
+        """
         logger.info(f"📤 Collection dışa aktarılıyor: {output_file}")
 
+        embeddings_file = self._embeddings_sidecar_path(output_file)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_output = output_file + suffix
+        tmp_embeddings = embeddings_file + suffix
+
         try:
             if not self.collection:
                 logger.error("ChromaDB collection None, export yapılamadı.")
                 return {"error": "collection is None"}
+            version = self.get_collection_version()
             total_count = self.collection.count()  # type: ignore
-            batch_size = 1000
+            include_fields = ["documents", "metadatas"]
+            if include_embeddings:
+                include_fields.append("embeddings")
+
+            os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+            embedding_matrix = None
             exported_count = 0
-            exported_data = []
-            for offset in range(0, total_count, batch_size):
-                include_fields = ["ids", "documents", "metadatas"]
-                if include_embeddings:
-                    include_fields.append("embeddings")
-                batch = self.collection.get(
-                    limit=min(batch_size, total_count - offset),
-                    offset=offset,
-                    include=include_fields,  # type: ignore
-                )
-                if batch and batch.get("ids"):
-                    for i in range(len(batch["ids"])):
-                        doc_list = batch.get("documents") or []
-                        meta_list = batch.get("metadatas") or []
-                        emb_list = batch.get("embeddings") or []
-                        item = {
-                            "id": batch["ids"][i],
-                            "document": doc_list[i] if i < len(doc_list) else None,
-                            "metadata": meta_list[i] if i < len(meta_list) else None,
-                        }
-                        if include_embeddings and emb_list and i < len(emb_list):
-                            item["embedding"] = emb_list[i]
-                        exported_data.append(item)
-                        exported_count += 1
-                logger.info(f"📦 Exported: {exported_count}/{total_count}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    {
-                        "collection_name": self.collection_name,
-                        "export_timestamp": datetime.now().isoformat(),
-                        "total_items": exported_count,
-                        "includes_embeddings": include_embeddings,
-                        "data": exported_data,
-                    },
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                )
+
+            with open(tmp_output, "w", encoding="utf-8") as f:
+                for offset in range(0, total_count, batch_size):
+                    batch = self.collection.get(
+                        limit=min(batch_size, total_count - offset),
+                        offset=offset,
+                        include=include_fields,  # type: ignore
+                    )
+                    if not batch or not batch.get("ids"):
+                        continue
+
+                    doc_list = batch.get("documents") or []
+                    meta_list = batch.get("metadatas") or []
+                    emb_list = batch.get("embeddings") or []
+
+                    if include_embeddings and emb_list:
+                        if embedding_matrix is None:
+                            embedding_matrix = np.lib.format.open_memmap(
+                                tmp_embeddings,
+                                mode="w+",
+                                dtype=np.float32,
+                                shape=(total_count, len(emb_list[0])),
+                            )
+                        rows = min(len(emb_list), total_count - exported_count)
+                        embedding_matrix[exported_count : exported_count + rows] = np.asarray(
+                            emb_list[:rows], dtype=np.float32
+                        )
+
+                    lines = []
+                    for i, doc_id in enumerate(batch["ids"]):
+                        lines.append(
+                            json.dumps(
+                                {
+                                    "id": doc_id,
+                                    "row": exported_count + i,
+                                    "document": doc_list[i] if i < len(doc_list) else None,
+                                    "metadata": meta_list[i] if i < len(meta_list) else None,
+                                },
+                                ensure_ascii=False,
+                            )
+                        )
+                    f.write("\n".join(lines) + "\n")
+                    exported_count += len(batch["ids"])
+                    logger.info(f"📦 Exported: {exported_count}/{total_count}")
+
+            if embedding_matrix is not None:
+                embedding_matrix.flush()
+                del embedding_matrix
+
+            if self.get_collection_version() != version:
+                logger.warning("⚠️ Export sırasında collection değişti, export atılıyor")
+                for tmp_path in (tmp_output, tmp_embeddings):
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                return {"error": "collection export sırasında değişti", "version_changed": True}
+
+            if os.path.exists(tmp_embeddings):
+                os.replace(tmp_embeddings, embeddings_file)
+            os.replace(tmp_output, output_file)
+
             file_size = os.path.getsize(output_file) / (1024 * 1024)
             result = {
                 "exported_count": exported_count,
                 "output_file": output_file,
                 "file_size_mb": file_size,
                 "includes_embeddings": include_embeddings,
+                "collection_name": self.collection_name,
+                "collection_version": version,
+                "export_timestamp": datetime.now().isoformat(),
             }
+            if include_embeddings and os.path.exists(embeddings_file):
+                result["embeddings_file"] = embeddings_file
+                result["embeddings_size_mb"] = os.path.getsize(embeddings_file) / (1024 * 1024)
+
             logger.info(
                 f"✅ Export tamamlandı: {exported_count} item, {file_size:.2f}MB"
             )
             return result
         except Exception as e:
             logger.error(f"❌ Export hatası: {e}")
+            for tmp_path in (tmp_output, tmp_embeddings):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
             return {"error": str(e)}
 
+    @staticmethod
+    def _embeddings_sidecar_path(output_file: str) -> str:
+        """Export dosyası için embedding yan dosyasının yolu"""
+        return os.path.splitext(output_file)[0] + ".npy"
+
+    def get_export_artifact(
+        self, export_dir: str, include_embeddings: bool = False, max_attempts: int = 3
+    ) -> Dict[str, Any]:
+        """Collection versiyonuna göre cache'lenmiş export dosyasını döndür
+
+        Aynı versiyon için export daha önce üretildiyse dosya yeniden yazılmaz;
+        versiyon değiştiğinde eski export dosyaları silinir. Export sırasında
+        collection değişirse yeni versiyonla en fazla max_attempts kez denenir;
+        versiyon hiç sabitlenmezse "version_changed" hatası döner. max_attempts < 1
+        ise ValueError.
+        """
+        if isinstance(max_attempts, bool) or not isinstance(max_attempts, int) or max_attempts < 1:
+            raise ValueError("max_attempts en az 1 olmalı")
+        prefix = "collection_export_emb_" if include_embeddings else "collection_export_"
+        for _ in range(max_attempts):
+            version = self.get_collection_version()
+            output_file = os.path.join(export_dir, f"{prefix}{version}.jsonl")
+            embeddings_file = self._embeddings_sidecar_path(output_file)
+
+            if os.path.exists(output_file) and (
+                not include_embeddings or os.path.exists(embeddings_file)
+            ):
+                return {
+                    "output_file": output_file,
+                    "embeddings_file": embeddings_file if include_embeddings else None,
+                    "collection_version": version,
+                    "cached": True,
+                }
+
+            result = self.export_data(output_file, include_embeddings=include_embeddings)
+            if not result.get("version_changed"):
+                break
+        else:
+            logger.warning(f"⚠️ Export {max_attempts} denemede tutarlı bir versiyona denk gelmedi")
+            return {"error": "collection export sırasında sürekli değişti", "version_changed": True}
+        if result.get("error"):
+            return result
+
+        # Eski versiyonlara ait export dosyalarını temizle
+        keep = {os.path.basename(output_file), os.path.basename(embeddings_file)}
+        for filename in os.listdir(export_dir):
+            if (
+                filename.startswith(prefix)
+                and filename not in keep
+                and not filename.endswith(".tmp")
+                and (include_embeddings or not filename.startswith("collection_export_emb_"))
+            ):
+                try:
+                    os.remove(os.path.join(export_dir, filename))
+                except OSError:
+                    pass
+
+        result["embeddings_file"] = result.get("embeddings_file")
+        result["cached"] = False
+        return result
+
     def get_stats(self) -> Dict[str, Any]:
         """İstatistikleri döndür"""
         self._update_stats()
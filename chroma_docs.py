@@ -1,45 +1,45 @@
 # chroma_docs.py
 """
-Sadece embedded_data.json'u ChromaDB'ye ekler (docs klasöründeki dosyalar için).
+Corpus store'daki embedding'li dokümanları ChromaDB'ye ekler (docs klasöründeki dosyalar için).
 """
-import os
-import json
 from chroma import ChromaDBManager
+from corpus_store import CorpusStore
 import logging
 
 def main():
-    INPUT_JSON = "embedded_data.json"
-    if not os.path.exists(INPUT_JSON):
-        print(f"[chroma_docs] {INPUT_JSON} yok.")
-        return
-    
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
     logger = logging.getLogger(__name__)
     
-    chroma_manager = ChromaDBManager()
-    
-    logger.info(f"📄 JSON dosyası yükleniyor: {INPUT_JSON}")
-    with open(INPUT_JSON, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    if not data:
-        logger.warning(f"⚠️ JSON dosyası boş: {INPUT_JSON}")
+    store = CorpusStore()
+    filenames = store.list_filenames()
+    if not filenames:
+        logger.warning("⚠️ Corpus store boş")
         return
     
-    logger.info(f"📊 {len(data)} doküman bulundu")
-    
-    # Batch import
-    result = chroma_manager.add_documents_batch(
-        data=data, batch_size=1000, skip_duplicates=True
-    )
+    chroma_manager = ChromaDBManager()
     
+    logger.info(f"📊 {len(filenames)} doküman bulundu")
+    
+    # Dosya dosya import - tüm korpus belleğe alınmaz
+    totals = {"total_processed": 0, "total_added": 0, "skipped": 0}
+    for item in store.iter_documents(filenames, include_embeddings=True):
+        if not item.get("embeddings"):
+            logger.warning(f"⚠️ {item['filename']}: embedding yok, atlandı")
+            continue
+        result = chroma_manager.add_documents_batch(
+            data=[item], batch_size=1000, skip_duplicates=True
+        )
+        for key in totals:
+            totals[key] += result.get(key, 0)
+    
+    success_rate = totals["total_added"] / totals["total_processed"] if totals["total_processed"] else 0
     logger.info("📊 IMPORT RAPORU:")
-    logger.info(f"   İşlenen: {result['total_processed']}")
-    logger.info(f"   Eklenen: {result['total_added']}")
-    logger.info(f"   Atlanan: {result['skipped']}")
-    logger.info(f"   Başarı oranı: {result['success_rate']:.1%}")
+    logger.info(f"   İşlenen: {totals['total_processed']}")
+    logger.info(f"   Eklenen: {totals['total_added']}")
+    logger.info(f"   Atlanan: {totals['skipped']}")
+    logger.info(f"   Başarı oranı: {success_rate:.1%}")
     
-    print(f"[chroma_docs] {INPUT_JSON} ChromaDB'ye eklendi.")
+    print("[chroma_docs] Corpus store ChromaDB'ye eklendi.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,75 @@
+"""
+Chunk başına ingest sırasında hesaplanan türetilmiş veriler
+Normalize metin, token sayısı, terim frekansları ve sayılar ChromaDB metadata'sında
+"stat_" önekiyle saklanır; sorgu anında aynı chunk için tekrar hesaplanmaz.
+"""
+import re
+import json
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from cache_utils import LRUCache
+from token_counter import count_tokens
+from turkish_analyzer import ANALYZER_VERSION, analyze, fold_case
+
+NUMBER_RE = re.compile(r"\d+")
+
+# ChromaDB metadata sadece str/int/float/bool kabul eder - listeler string olarak tutulur
+STAT_NORM_TEXT = "stat_norm_text"
+STAT_TOKEN_COUNT = "stat_token_count"
+STAT_TERM_FREQS = "stat_term_freqs"
+STAT_NUMBERS = "stat_numbers"
+STAT_ANALYZER_VERSION = "stat_analyzer_version"
+
+_parsed_cache = LRUCache(20000)
+
+
+def compute_chunk_stats(text: str) -> Dict[str, Any]:
+    """Chunk metadata'sına eklenecek (primitive tipli) istatistikler"""
+    return {
+        STAT_NORM_TEXT: fold_case(text),
+        STAT_TOKEN_COUNT: count_tokens(text),
+        STAT_TERM_FREQS: json.dumps(Counter(analyze(text)), ensure_ascii=False),
+        STAT_NUMBERS: " ".join(NUMBER_RE.findall(text)),
+        STAT_ANALYZER_VERSION: ANALYZER_VERSION,
+    }
+
+
+def get_chunk_stats(document: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Chunk istatistiklerini metadata'dan oku (yoksa hesapla)
+
+    Dönüş: norm_text (str), token_count (int), term_freqs (dict), numbers (list)
+    Eski ingest edilmiş chunk'larda metadata alanları yoksa ya da terim frekansları
+    farklı analyzer sürümüyle üretildiyse değerler metinden hesaplanır. Sonuç cache'lenir, değiştirilmemelidir.
+    """
+    metadata = metadata or {}
+    cache_key = None
+    if metadata.get("chunk_hash"):
+        cache_key = (
+            metadata.get("source_file"),
+            metadata.get("chunk_index"),
+            metadata["chunk_hash"],
+            len(document),
+        )
+        cached = _parsed_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    current = (
+        STAT_TERM_FREQS in metadata
+        and metadata.get(STAT_ANALYZER_VERSION) == ANALYZER_VERSION
+    )
+    raw = metadata if current else compute_chunk_stats(document)
+    try:
+        term_freqs = json.loads(raw[STAT_TERM_FREQS])
+    except (TypeError, ValueError):
+        term_freqs = dict(Counter(analyze(document)))
+    stats = {
+        "norm_text": raw.get(STAT_NORM_TEXT) or fold_case(document),
+        "token_count": int(raw.get(STAT_TOKEN_COUNT) or 0),
+        "term_freqs": term_freqs,
+        "numbers": (raw.get(STAT_NUMBERS) or "").split(),
+    }
+    if cache_key is not None:
+        _parsed_cache.set(cache_key, stats)
+    return stats
@@ -1,28 +1,28 @@
-import sqlite3
 import os
-
-DB_PATH = "questions.db"
+from question_db import rebuild_stats, transaction
 
 def clear_all_tables():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM question_similarity")
-    c.execute("DELETE FROM question_sources")
-    c.execute("DELETE FROM questions")
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("DELETE FROM question_similarity")
+        c.execute("DELETE FROM question_sources")
+        c.execute("DELETE FROM questions")
+        c.execute("DELETE FROM question_evaluations")
+        c.execute("DELETE FROM question_audits")
+        c.execute("DELETE FROM question_clusters")
+        rebuild_stats()
     print("Tüm veritabanı tabloları temizlendi.")
 
 def clear_all_tables_and_stats():
     # Veritabanı tablolarını temizle
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM question_similarity")
-    c.execute("DELETE FROM question_sources")
-    c.execute("DELETE FROM questions")
-    c.execute("DELETE FROM source_usage")
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("DELETE FROM question_similarity")
+        c.execute("DELETE FROM question_sources")
+        c.execute("DELETE FROM questions")
+        c.execute("DELETE FROM question_evaluations")
+        c.execute("DELETE FROM question_audits")
+        c.execute("DELETE FROM question_clusters")
+        c.execute("DELETE FROM source_usage")
+        rebuild_stats()
     # İstatistik dosyasını sıfırla
     stats_path = "stats.json"
     if os.path.exists(stats_path):
@@ -18,12 +18,61 @@ class RAGConfig:
     DEFAULT_N_RESULTS = 10  # Increased from 5
     MAX_N_RESULTS = 20  # Increased from 10
     SIMILARITY_THRESHOLD = 0.01  # Much lower threshold - daha fazla chunk dahil et
-    RERANK_TOP_K = 3
+    RERANK_TOP_K = 3  # Rerank sonrası context'e giden chunk sayısı
+
+    # Cross-Encoder Rerank Configuration (reranker.py)
+    RERANK_ENABLED = False  # Açıldığında model ilk kullanımda yüklenir
+    RERANK_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"  # Çok dilli (Türkçe dahil)
+    RERANK_MAX_CANDIDATES = 20  # Skorlanacak en fazla aday (füzyon sırasına göre)
+    RERANK_BATCH_SIZE = 8
+    RERANK_MAX_LATENCY_MS = 400  # Bu süre aşılırsa kalan adaylar füzyon sırasıyla eklenir
+    RERANK_CACHE_SIZE = 10000  # (query, chunk id) skor cache boyutu
+    FUSION_MODE = "weighted"  # "weighted" (skor ağırlıklı) veya "rrf" (Reciprocal Rank Fusion)
+    RRF_K = 60  # RRF sabit terimi - büyük değer alt sıralara daha fazla ağırlık verir
+    RETRIEVAL_CACHE_SIZE = 1000  # (normalize sorgu, n, filtre, collection versiyonu) -> sıralı chunk ID'leri
+
+    # HNSW Index Configuration (ChromaDB)
+    HNSW_SPACE = "cosine"
+    HNSW_M = 16  # Graf bağlantı sayısı - yüksek değer = daha iyi recall, daha fazla bellek
+    HNSW_CONSTRUCTION_EF = 200  # Index oluşturma kalitesi (Chroma default: 100)
+    HNSW_SEARCH_EF = 64  # Arama sırasında aday listesi (Chroma default: 10)
+    HNSW_OPTIMIZE_SAMPLE_SIZE = 50  # optimize_collection recall/latency ölçümü için sorgu örneği
+
+    # ChromaDB Snapshot Configuration
+    CHROMA_SNAPSHOT_KEEP_LAST = 24  # Saklanacak en yeni snapshot sayısı
+    CHROMA_SNAPSHOT_MAX_AGE_DAYS = 7  # Bundan eski snapshot'lar silinir (en yenisi hariç)
 
     # Text Processing Configuration
     MAX_CHUNK_SIZE = 1024  # Increased from 512 - daha büyük chunk'lar
     CHUNK_OVERLAP = 100  # Increased from 50 - daha fazla overlap
     MAX_CONTEXT_LENGTH = 4000  # Increased from 2000 - daha fazla context
+    QUERY_ANALYSIS_CACHE_SIZE = 512  # process_query sonuçları için LRU boyutu
+    QUESTION_CLUSTER_THRESHOLD = 0.85  # Soru, merkezine bu cosine benzerlikteki kümeye atanır
+
+    # Soru / oturum kayıtları için arka plan yazıcı (question_log_writer.py)
+    QUESTION_LOG_QUEUE_SIZE = 10000  # Kuyruk doluysa yeni olaylar düşürülür
+    QUESTION_LOG_FLUSH_MS = 200  # Olaylar bu aralıkla tek transaction'da yazılır
+    QUESTION_LOG_BATCH_SIZE = 500  # Bir transaction'daki en fazla olay
+    CONVERSATION_BACKEND = "memory"  # "memory" (süreç içi) veya "sqlite" (worker'lar arası ortak)
+    CONVERSATION_DB_PATH = "conversations.db"  # sqlite backend dosyası
+    CONVERSATION_MAX_USERS = 5000  # Aşılırsa en uzun süredir boşta olan kullanıcı atılır
+    CONVERSATION_TTL_SECONDS = 3600  # Bu kadar boşta kalan sohbet silinir
+    CONVERSATION_MAX_TURNS = 10  # Kullanıcı başına tutulan son mesaj sayısı
+    RESPONSE_EVAL_WORKERS = 2  # Tam yanıt değerlendirmesi yapan arka plan thread sayısı
+    RESPONSE_EVAL_MAX_PENDING = 1000  # Bekleyen değerlendirme bu sayıya ulaşınca yenileri atlanır
+    AUDIT_WORKERS = 0  # Toplu kalite denetimi süreç sayısı (0: CPU sayısı)
+    AUDIT_CHUNK_SIZE = 200  # Bir sürece tek seferde gönderilen kayıt sayısı (her parça ayrı commit)
+    AUDIT_CONTEXT_CHUNKS = 5  # Kayıtlı soru için kaynak dosyadan alınan en alakalı chunk sayısı
+    AUDIT_DOC_STATS_CACHE_SIZE = 20000  # Süreç başına chunk istatistiği cache boyutu
+
+    # MMR (Maximal Marginal Relevance) Context Selection
+    MMR_ENABLED = True
+    MMR_LAMBDA = 0.7  # 1.0 = sadece alaka, 0.0 = sadece çeşitlilik
+    CONTEXT_TOKEN_BUDGET = 2500  # LLM'e gönderilecek context için token bütçesi
+
+    # Corpus Store Configuration (corpus_store.py)
+    CORPUS_STORE_PATH = "corpus_store"
+    CORPUS_EMBEDDING_DTYPE = "float32"  # "float16" disk/bellek kullanımını yarıya indirir
 
     # LLM Configuration - OpenAI API
     LLM_MODEL = "gpt-4o"  # OpenAI GPT model
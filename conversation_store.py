@@ -0,0 +1,243 @@
+"""
+Sohbet geçmişi deposu - kullanıcı başına halka tampon (son N mesaj)
+MemoryConversationStore: süreç içi, LRU + boşta kalma süresi (TTL) ile sınırlı
+SQLiteConversationStore: worker'lar arasında paylaşılan dosya (WAL), aynı sınırlar
+"""
+import os
+import time
+import sqlite3
+import datetime
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+
+def _make_entry(user_message: str, bot_response: str) -> Dict[str, Any]:
+    return {
+        "user": user_message,
+        "assistant": bot_response,
+        "timestamp": datetime.datetime.now().isoformat(),
+    }
+
+
+class MemoryConversationStore:
+    """Thread-safe, kullanıcı sayısı ve boşta kalma süresi sınırlı bellek deposu
+
+    OrderedDict son erişim sırasını tutar: en eski kullanıcı baştadır, süresi
+    dolanlar baştan atılır ve kapasite aşılınca en eski kullanıcı çıkarılır.
+    """
+
+    def __init__(self, max_users: int = 5000, ttl_seconds: float = 3600, max_turns: int = 10):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self._data: "OrderedDict[str, list]" = OrderedDict()  # user_id -> [deque, son erişim]
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _evict(self, now: float):
+        """Süresi dolan ve kapasiteyi aşan kullanıcıları at (kilit altında çağrılır)"""
+        while self._data:
+            user_id, (_, last_access) = next(iter(self._data.items()))
+            if now - last_access <= self.ttl_seconds and len(self._data) <= self.max_users:
+                break
+            del self._data[user_id]
+            self.evicted += 1
+
+    def append(self, user_id: str, user_message: str, bot_response: str):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(user_id)
+            if item is None:
+                item = [deque(maxlen=self.max_turns), now]
+                self._data[user_id] = item
+            item[0].append(_make_entry(user_message, bot_response))
+            item[1] = now
+            self._data.move_to_end(user_id)
+            self._evict(now)
+
+    def get(self, user_id: str) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            item = self._data.get(user_id)
+            if item is None:
+                return []
+            item[1] = now
+            self._data.move_to_end(user_id)
+            return list(item[0])
+
+    def clear(self, user_id: str):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "users": len(self._data),
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl_seconds,
+            "max_turns": self.max_turns,
+            "evicted": self.evicted,
+        }
+
+
+class SQLiteConversationStore:
+    """Worker'lar arasında paylaşılan SQLite deposu (thread başına bağlantı)
+
+    Her eklemede kullanıcının son max_turns mesajı dışındakiler silinir; süresi
+    dolan ve kapasiteyi aşan kullanıcılar en fazla purge_interval saniyede bir
+    temizlenir. Süre hesapları worker'lar arasında ortak olması için duvar
+    saatiyle (time.time) yapılır.
+    """
+
+    def __init__(
+        self,
+        path: str = "conversations.db",
+        max_users: int = 5000,
+        ttl_seconds: float = 3600,
+        max_turns: int = 10,
+        purge_interval: float = 60,
+    ):
+        self.path = path
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._last_purge = 0.0
+        with self._transaction() as c:
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_users (
+                user_id TEXT PRIMARY KEY,
+                last_activity REAL NOT NULL
+            )
+            """)
+            c.execute(
+                "CREATE INDEX IF NOT EXISTS idx_conversation_users_activity "
+                "ON conversation_users(last_activity)"
+            )
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_turns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                user_message TEXT,
+                assistant TEXT,
+                timestamp TEXT
+            )
+            """)
+            c.execute(
+                "CREATE INDEX IF NOT EXISTS idx_conversation_turns_user "
+                "ON conversation_turns(user_id, id)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Cursor döndüren transaction - hata olursa geri alınır"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _purge(self, c, now: float):
+        """Süresi dolan ve kapasiteyi aşan kullanıcıları sil"""
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        c.execute("DELETE FROM conversation_users WHERE last_activity < ?", (now - self.ttl_seconds,))
+        c.execute("""
+            DELETE FROM conversation_users WHERE user_id IN (
+                SELECT user_id FROM conversation_users
+                ORDER BY last_activity DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_users,))
+        c.execute("""
+            DELETE FROM conversation_turns
+            WHERE user_id NOT IN (SELECT user_id FROM conversation_users)
+        """)
+
+    def append(self, user_id: str, user_message: str, bot_response: str):
+        now = time.time()
+        entry = _make_entry(user_message, bot_response)
+        with self._transaction() as c:
+            c.execute("""
+                INSERT INTO conversation_users (user_id, last_activity) VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET last_activity = excluded.last_activity
+            """, (user_id, now))
+            c.execute(
+                "INSERT INTO conversation_turns (user_id, user_message, assistant, timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                (user_id, entry["user"], entry["assistant"], entry["timestamp"]),
+            )
+            # Halka tampon: son max_turns mesaj kalır
+            c.execute("""
+                DELETE FROM conversation_turns
+                WHERE user_id = ? AND id <= (
+                    SELECT id FROM conversation_turns WHERE user_id = ?
+                    ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+            """, (user_id, user_id, self.max_turns))
+            self._purge(c, now)
+
+    def get(self, user_id: str) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._transaction() as c:
+            c.execute(
+                "UPDATE conversation_users SET last_activity = ? "
+                "WHERE user_id = ? AND last_activity >= ?",
+                (now, user_id, now - self.ttl_seconds),
+            )
+            if c.rowcount == 0:
+                return []
+            c.execute("""
+                SELECT user_message, assistant, timestamp FROM conversation_turns
+                WHERE user_id = ? ORDER BY id
+            """, (user_id,))
+            return [
+                {"user": user_message, "assistant": assistant, "timestamp": timestamp}
+                for user_message, assistant, timestamp in c.fetchall()
+            ]
+
+    def clear(self, user_id: str):
+        with self._transaction() as c:
+            c.execute("DELETE FROM conversation_turns WHERE user_id = ?", (user_id,))
+            c.execute("DELETE FROM conversation_users WHERE user_id = ?", (user_id,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._transaction() as c:
+            c.execute("SELECT COUNT(*) FROM conversation_users")
+            users = c.fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "users": users,
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl_seconds,
+            "max_turns": self.max_turns,
+        }
+
+
+def create_conversation_store(backend: str = "memory", **options):
+    """Config'teki CONVERSATION_BACKEND değerine göre depo oluştur"""
+    if backend == "sqlite":
+        return SQLiteConversationStore(**options)
+    options.pop("path", None)
+    return MemoryConversationStore(**options)
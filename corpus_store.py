@@ -0,0 +1,529 @@
+"""
+Corpus store - doküman/chunk verisi için tek kalıcı format
+
+enhanced_document_data.json, enhanced_document_data_with_embeddings.json,
+uploads_base.json, uploads_with_embed.json, data.json ve embedded_data.json
+yerine kullanılır:
+  - corpus.db: doküman ve chunk tabloları (SQLite)
+  - embeddings/<partition>.npy: dosya başına embedding matrisi (float32/float16),
+    np.load(mmap_mode="r") ile sadece gerektiğinde belleğe eşlenir
+
+Her dosya kendi partition'ında tutulduğu için yükleme/silme işlemleri sadece
+ilgili dosyanın satırlarını ve embedding dosyasını yazar.
+"""
+import os
+import json
+import sqlite3
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator, Union
+
+import numpy as np
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+LEGACY_JSON_FILES = [
+    "enhanced_document_data_with_embeddings.json",
+    "enhanced_document_data.json",
+    "uploads_with_embed.json",
+    "uploads_base.json",
+    "embedded_data.json",
+    "data.json",
+]
+
+
+class CorpusStore:
+    """SQLite chunk tablosu + memory-mapped embedding partition'ları"""
+
+    def __init__(
+        self,
+        store_path: Optional[str] = None,
+        embedding_dtype: Optional[str] = None,
+    ):
+        self.store_path = store_path or config.CORPUS_STORE_PATH
+        self.embedding_dtype = np.dtype(embedding_dtype or config.CORPUS_EMBEDDING_DTYPE)
+        self.db_path = os.path.join(self.store_path, "corpus.db")
+        self.embeddings_dir = os.path.join(self.store_path, "embeddings")
+        self._write_lock = threading.Lock()
+
+        os.makedirs(self.embeddings_dir, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_schema(self):
+        """Tabloları oluştur"""
+        conn = self._connect()
+        try:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    filename TEXT PRIMARY KEY,
+                    file_type TEXT,
+                    file_size INTEGER,
+                    keyword TEXT,
+                    checksum TEXT,
+                    content TEXT,
+                    character_count INTEGER,
+                    chunk_count INTEGER,
+                    document_metadata TEXT,
+                    embedding_model TEXT,
+                    embedding_file TEXT,
+                    updated_at TIMESTAMP
+                );
+                CREATE TABLE IF NOT EXISTS chunks (
+                    filename TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    metadata TEXT,
+                    PRIMARY KEY (filename, chunk_index)
+                );
+                CREATE INDEX IF NOT EXISTS idx_documents_keyword
+                    ON documents (keyword COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_documents_file_type
+                    ON documents (file_type);
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                );
+                """
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection):
+        """Doküman listesi / anahtar kelimeler / embedding'ler değişti - versiyonu artır (commit öncesi)"""
+        conn.execute(
+            "INSERT INTO store_meta (name, value) VALUES ('version', 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1"
+        )
+
+    @staticmethod
+    def _partition_name(filename: str) -> str:
+        """Dosya adından güvenli embedding partition adı üret
+
+        Her yazımda yeni ad üretilir: eski partition, yeni satırlar commit edilene
+        kadar okunabilir kalır ve sonra silinir.
+        """
+        prefix = hashlib.sha1(filename.encode("utf-8")).hexdigest()[:16]
+        return f"{prefix}-{uuid.uuid4().hex[:8]}.npy"
+
+    def _save_partition(self, filename: str, embeddings: Any) -> str:
+        """Embedding matrisini yeni bir partition dosyasına yaz, partition adını döndür"""
+        matrix = np.asarray(embeddings, dtype=self.embedding_dtype)
+        if matrix.ndim != 2:
+            raise ValueError(f"{filename}: embedding matrisi 2 boyutlu olmalı")
+
+        partition = self._partition_name(filename)
+        final_path = os.path.join(self.embeddings_dir, partition)
+        tmp_path = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp_path, final_path)
+        return partition
+
+    def _remove_partition(self, partition: Optional[str]):
+        if partition:
+            path = os.path.join(self.embeddings_dir, partition)
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ------------------------------------------------------------------
+    # Yazma
+    # ------------------------------------------------------------------
+    def upsert_document(self, item: Dict[str, Any], embedding_model: Optional[str] = None):
+        """Bir dokümanı (base.py process_documents formatında) ekle veya güncelle
+
+        item içinde "keyword" yoksa mevcut anahtar kelime korunur. item içinde
+        "embeddings" varsa partition chunk'larla aynı transaction'da bağlanır;
+        chunk'lar değiştiyse ve embedding verilmediyse eski partition silinir.
+        """
+        filename = item.get("filename")
+        if not filename:
+            raise ValueError("filename gerekli")
+
+        chunks = item.get("chunks", [])
+        chunk_metadata = item.get("chunk_metadata", [])
+        doc_metadata = item.get("document_metadata", {}) or {}
+        checksum = doc_metadata.get("checksum")
+        embeddings = item.get("embeddings")
+
+        with self._write_lock:
+            new_partition = None
+            if embeddings is not None and len(embeddings):
+                new_partition = self._save_partition(filename, embeddings)
+            conn = self._connect()
+            try:
+                existing = conn.execute(
+                    "SELECT keyword, checksum, embedding_file, embedding_model FROM documents WHERE filename = ?",
+                    (filename,),
+                ).fetchone()
+                keyword = item.get("keyword")
+                if keyword is None and existing:
+                    keyword = existing["keyword"]
+
+                # Aynı içerik zaten varsa embedding'i koru
+                embedding_file = None
+                stored_model = None
+                if new_partition:
+                    embedding_file = new_partition
+                    stored_model = embedding_model or config.EMBEDDING_MODEL
+                elif existing and existing["checksum"] and existing["checksum"] == checksum:
+                    embedding_file = existing["embedding_file"]
+                    stored_model = existing["embedding_model"]
+                stale_partition = existing["embedding_file"] if existing else None
+
+                conn.execute("DELETE FROM chunks WHERE filename = ?", (filename,))
+                conn.executemany(
+                    "INSERT INTO chunks (filename, chunk_index, content, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            filename,
+                            idx,
+                            chunk,
+                            json.dumps(
+                                chunk_metadata[idx] if idx < len(chunk_metadata) else {},
+                                ensure_ascii=False,
+                            ),
+                        )
+                        for idx, chunk in enumerate(chunks)
+                    ],
+                )
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO documents
+                        (filename, file_type, file_size, keyword, checksum, content,
+                         character_count, chunk_count, document_metadata,
+                         embedding_model, embedding_file, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        filename,
+                        item.get("file_type"),
+                        item.get("file_size"),
+                        keyword,
+                        checksum,
+                        item.get("content"),
+                        item.get("character_count"),
+                        len(chunks),
+                        json.dumps(doc_metadata, ensure_ascii=False),
+                        stored_model,
+                        embedding_file,
+                        datetime.now().isoformat(),
+                    ),
+                )
+                self._bump_version(conn)
+                conn.commit()
+            except Exception:
+                self._remove_partition(new_partition)
+                raise
+            finally:
+                conn.close()
+            if stale_partition != embedding_file:
+                self._remove_partition(stale_partition)
+
+    def write_embeddings(self, filename: str, embeddings: Any, embedding_model: str):
+        """Mevcut dokümanın embedding partition'ını değiştir"""
+        with self._write_lock:
+            partition = self._save_partition(filename, embeddings)
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT embedding_file FROM documents WHERE filename = ?", (filename,)
+                ).fetchone()
+                if not row:
+                    raise ValueError(f"{filename}: store'da böyle bir doküman yok")
+                conn.execute(
+                    "UPDATE documents SET embedding_file = ?, embedding_model = ?, updated_at = ? WHERE filename = ?",
+                    (partition, embedding_model, datetime.now().isoformat(), filename),
+                )
+                self._bump_version(conn)
+                conn.commit()
+            except Exception:
+                self._remove_partition(partition)
+                raise
+            finally:
+                conn.close()
+            self._remove_partition(row["embedding_file"])
+
+    def remove_documents(self, filenames: List[str]) -> int:
+        """Dosyaları chunk'ları ve embedding partition'larıyla birlikte sil"""
+        if not filenames:
+            return 0
+        partitions = []
+        with self._write_lock:
+            conn = self._connect()
+            try:
+                for filename in filenames:
+                    row = conn.execute(
+                        "SELECT embedding_file FROM documents WHERE filename = ?", (filename,)
+                    ).fetchone()
+                    if not row:
+                        continue
+                    conn.execute("DELETE FROM chunks WHERE filename = ?", (filename,))
+                    conn.execute("DELETE FROM documents WHERE filename = ?", (filename,))
+                    partitions.append(row["embedding_file"])
+                if partitions:
+                    self._bump_version(conn)
+                conn.commit()
+            finally:
+                conn.close()
+            for partition in partitions:
+                self._remove_partition(partition)
+        return len(partitions)
+
+    # ------------------------------------------------------------------
+    # Okuma
+    # ------------------------------------------------------------------
+    def get_version(self) -> int:
+        """Doküman listesi/anahtar kelime değişikliklerinde artan sayaç"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM store_meta WHERE name = 'version'").fetchone()
+            return row[0] if row else 0
+        finally:
+            conn.close()
+
+    def list_filenames(self) -> List[str]:
+        """Store'daki tüm dosya adları"""
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT filename FROM documents ORDER BY filename")]
+        finally:
+            conn.close()
+
+    def get_keywords(self) -> Dict[str, str]:
+        """filename -> anahtar kelime eşlemesi"""
+        conn = self._connect()
+        try:
+            return {
+                row[0]: row[1] or ""
+                for row in conn.execute("SELECT filename, keyword FROM documents")
+            }
+        finally:
+            conn.close()
+
+    def filenames_for_keyword(self, keywords: Union[str, List[str]]) -> List[str]:
+        """Anahtar kelimesi verilenlerden biri olan dosyalar (büyük/küçük harf duyarsız)"""
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        keywords = [keyword.strip() for keyword in keywords if keyword and keyword.strip()]
+        if not keywords:
+            return []
+        placeholders = ", ".join("?" for _ in keywords)
+        conn = self._connect()
+        try:
+            return [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT filename FROM documents WHERE keyword COLLATE NOCASE IN ({placeholders}) "
+                    "ORDER BY filename",
+                    keywords,
+                )
+            ]
+        finally:
+            conn.close()
+
+    def get_checksum(self, filename: str) -> Optional[str]:
+        """Dosyanın kayıtlı checksum'ı (yoksa None)"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT checksum FROM documents WHERE filename = ?", (filename,)
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """Doküman özetleri (metin ve embedding olmadan)"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """
+                SELECT filename, file_type, file_size, keyword, chunk_count,
+                       character_count, embedding_model, embedding_file, updated_at
+                FROM documents ORDER BY filename
+                """
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                "filename": row["filename"],
+                "file_type": row["file_type"],
+                "file_size": row["file_size"],
+                "keyword": row["keyword"],
+                "chunk_count": row["chunk_count"],
+                "character_count": row["character_count"],
+                "embedding_model": row["embedding_model"],
+                "has_embeddings": bool(row["embedding_file"]),
+                "updated_at": row["updated_at"],
+            }
+            for row in rows
+        ]
+
+    def filenames_missing_embeddings(self, embedding_model: Optional[str] = None) -> List[str]:
+        """Embedding'i olmayan ya da farklı modelle üretilmiş dosyalar"""
+        embedding_model = embedding_model or config.EMBEDDING_MODEL
+        conn = self._connect()
+        try:
+            return [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT filename FROM documents
+                    WHERE embedding_file IS NULL OR embedding_model IS NULL OR embedding_model != ?
+                    ORDER BY filename
+                    """,
+                    (embedding_model,),
+                )
+            ]
+        finally:
+            conn.close()
+
+    def get_chunks(self, filename: str) -> List[str]:
+        """Dosyanın chunk metinleri (chunk_index sırasıyla)"""
+        conn = self._connect()
+        try:
+            return [
+                row[0]
+                for row in conn.execute(
+                    "SELECT content FROM chunks WHERE filename = ? ORDER BY chunk_index",
+                    (filename,),
+                )
+            ]
+        finally:
+            conn.close()
+
+    def load_embeddings(self, filename: str) -> Optional[np.ndarray]:
+        """Dosyanın embedding matrisini memory-mapped olarak aç"""
+        # Okuma sırasında partition değiştirilip eskisi silinebilir - bir kez daha dene
+        for _ in range(2):
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT embedding_file FROM documents WHERE filename = ?", (filename,)
+                ).fetchone()
+            finally:
+                conn.close()
+            if not row or not row[0]:
+                return None
+            try:
+                return np.load(os.path.join(self.embeddings_dir, row[0]), mmap_mode="r")
+            except FileNotFoundError:
+                continue
+        return None
+
+    def iter_documents(
+        self,
+        filenames: Optional[List[str]] = None,
+        include_embeddings: bool = False,
+        include_content: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Dokümanları ChromaDBManager.add_documents_batch'in beklediği formatta üret
+
+        Her seferinde tek dosya okunur; böylece tüm korpus belleğe alınmaz.
+        """
+        if filenames is None:
+            filenames = self.list_filenames()
+
+        for filename in filenames:
+            conn = self._connect()
+            try:
+                doc = conn.execute(
+                    "SELECT * FROM documents WHERE filename = ?", (filename,)
+                ).fetchone()
+                if not doc:
+                    continue
+                chunk_rows = conn.execute(
+                    "SELECT content, metadata FROM chunks WHERE filename = ? ORDER BY chunk_index",
+                    (filename,),
+                ).fetchall()
+            finally:
+                conn.close()
+
+            item = {
+                "filename": doc["filename"],
+                "file_type": doc["file_type"],
+                "file_size": doc["file_size"],
+                "chunks": [row["content"] for row in chunk_rows],
+                "chunk_metadata": [json.loads(row["metadata"] or "{}") for row in chunk_rows],
+                "chunk_count": doc["chunk_count"],
+                "character_count": doc["character_count"],
+                "document_metadata": json.loads(doc["document_metadata"] or "{}"),
+            }
+            if doc["keyword"] is not None:
+                item["keyword"] = doc["keyword"]
+            if include_content:
+                item["content"] = doc["content"]
+            if include_embeddings:
+                embeddings = self.load_embeddings(filename)
+                item["embeddings"] = (
+                    np.asarray(embeddings, dtype=np.float32).tolist()
+                    if embeddings is not None
+                    else []
+                )
+            yield item
+
+    # ------------------------------------------------------------------
+    # Eski JSON dosyalarından geçiş
+    # ------------------------------------------------------------------
+    def import_legacy_json(self, json_path: str) -> int:
+        """Eski formatlı JSON dosyasını store'a aktar, aktarılan doküman sayısını döndür"""
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ {json_path} okunamadı: {e}")
+            return 0
+
+        imported = 0
+        for item in data or []:
+            if not item.get("filename"):
+                continue
+            embeddings = item.get("embeddings")
+            chunks = item.get("chunks", [])
+            if embeddings and len(embeddings) != len(chunks):
+                item = {key: value for key, value in item.items() if key != "embeddings"}
+            self.upsert_document(item)
+            imported += 1
+        logger.info(f"📥 {json_path}: {imported} doküman store'a aktarıldı")
+        return imported
+
+    def is_empty(self) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM documents LIMIT 1").fetchone() is None
+        finally:
+            conn.close()
+
+
+def migrate_legacy_json(store: Optional[CorpusStore] = None) -> int:
+    """Store boşsa eski JSON dosyalarındaki korpusu store'a aktar"""
+    store = store or CorpusStore()
+    if not store.is_empty():
+        return 0
+    imported = 0
+    for json_path in LEGACY_JSON_FILES:
+        imported += store.import_legacy_json(json_path)
+    return imported
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    corpus = CorpusStore()
+    count = migrate_legacy_json(corpus)
+    print(f"[corpus_store] {count} doküman aktarıldı. Toplam: {len(corpus.list_filenames())} dosya")
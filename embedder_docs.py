@@ -1,39 +1,29 @@
 # embedder_docs.py
 """
-Sadece data.json'u embedleyip embedded_data.json olarak kaydeder.
+Corpus store'da embedding'i olmayan dosyaları embedler.
 """
-import json
-import os
 from embedder import MultiModelEmbedder
+from corpus_store import CorpusStore
 from config import config
 
 def main():
-    INPUT_JSON = "data.json"
-    OUTPUT_JSON = "embedded_data.json"
-    if not os.path.exists(INPUT_JSON):
-        print(f"[embedder_docs] {INPUT_JSON} yok.")
+    store = CorpusStore()
+    filenames = store.filenames_missing_embeddings(config.EMBEDDING_MODEL)
+    if not filenames:
+        print("[embedder_docs] Embedlenecek dosya yok.")
         return
     
-    with open(INPUT_JSON, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
     embedder = MultiModelEmbedder(primary_model=config.EMBEDDING_MODEL)
     
-    for item in data:
-        chunks = item.get("chunks", [])
-        if chunks:
-            # Her chunk için embedding hesapla
-            embeddings = []
-            for chunk in chunks:
-                embedding = embedder.embed_single(chunk)
-                embeddings.append(embedding.tolist())
-            item["embeddings"] = embeddings
-        else:
-            item["embeddings"] = []
+    for filename in filenames:
+        chunks = store.get_chunks(filename)
+        if not chunks:
+            continue
+        # Dosyanın tüm chunk'ları için tek batch'te embedding hesapla
+        embeddings = embedder.embed_batch(chunks)
+        store.write_embeddings(filename, embeddings, config.EMBEDDING_MODEL)
     
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"[embedder_docs] {OUTPUT_JSON} kaydedildi. {len(data)} dosya embedlendi.")
+    print(f"[embedder_docs] corpus store güncellendi. {len(filenames)} dosya embedlendi.")
 
 if __name__ == "__main__":
     main()
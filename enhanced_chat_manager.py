@@ -4,9 +4,11 @@ Sohbet hafızası, selamlama/veda yanıtları ve kategorize edilmiş cevaplar
 """
 import re
 import json
-import datetime
 from typing import Dict, List, Any, Optional
 
+from term_matcher import match_terms
+from conversation_store import create_conversation_store
+
 # Güvenli import blokları
 try:
     from config import config
@@ -27,51 +29,31 @@ except ImportError:
 class ConversationManager:
     """Sohbet geçmişi ve bağlam yöneticisi"""
     
-    def __init__(self):
-        self.conversations = {}  # user_id -> conversation_history
-        self.greeting_patterns = [
-            r'\b(merhaba|selam|hello|hi|hey|iyi günler|günaydın|iyi akşamlar)\b',
-            r'\b(nasılsın|naber|how are you)\b'
-        ]
-        self.goodbye_patterns = [
-            r'\b(güle güle|hoşça kal|görüşürüz|bye|goodbye|teşekkür|sağol|hoşça kalın)\b',
-            r'\b(teşekkürler|thanks|thank you|tşk)\b'
-        ]
+    def __init__(self, store=None):
+        # user_id -> son mesajlar (halka tampon); LRU + boşta kalma süresiyle sınırlı
+        self.store = store or create_conversation_store(
+            getattr(config, "CONVERSATION_BACKEND", "memory"),
+            path=getattr(config, "CONVERSATION_DB_PATH", "conversations.db"),
+            max_users=getattr(config, "CONVERSATION_MAX_USERS", 5000),
+            ttl_seconds=getattr(config, "CONVERSATION_TTL_SECONDS", 3600),
+            max_turns=getattr(config, "CONVERSATION_MAX_TURNS", 10),
+        )
+        # Selamlama/veda ve soru ifadeleri term_matcher otomatında (tek geçişte eşleşir)
 
     def is_greeting(self, message: str) -> bool:
         """Selamlama mesajı mı kontrol et - sadece selamlama içeren mesajları algıla"""
-        message_lower = message.lower().strip()
-        
-        # Soru belirten kelimeler
-        question_indicators = [
-            'nasıl', 'ne', 'nerede', 'neden', 'kim', 'hangi', 'kaç', 'ne zaman',
-            'şifre', 'parola', 'kayıt', 'ders', 'sınav', 'not', 'başvuru',
-            'eduroam', 'öğrenci', 'mezuniyet', 'devamsızlık', 'harç', 'burs',
-            '?'  # Soru işareti
-        ]
-        
+        matches = match_terms(message)
+
         # Eğer mesajda soru belirten kelimeler varsa, bu sadece selamlama değil
-        for indicator in question_indicators:
-            if indicator in message_lower:
-                return False
-        
-        # Selamlama kelimelerini kontrol et
-        for pattern in self.greeting_patterns:
-            if re.search(pattern, message_lower):
-                # Eğer mesaj çok kısaysa (5 kelimeden az) ve sadece selamlama içeriyorsa
-                words = message_lower.split()
-                if len(words) <= 5:
-                    return True
-        
-        return False
+        if matches.get("question_indicator"):
+            return False
+
+        # Eğer mesaj çok kısaysa (5 kelimeden az) ve sadece selamlama içeriyorsa
+        return bool(matches.get("greeting")) and len(message.split()) <= 5
 
     def is_goodbye(self, message: str) -> bool:
         """Veda mesajı mı kontrol et"""
-        message_lower = message.lower()
-        for pattern in self.goodbye_patterns:
-            if re.search(pattern, message_lower):
-                return True
-        return False
+        return bool(match_terms(message).get("goodbye"))
 
     def get_greeting_response(self) -> str:
         """Selamlama yanıtı"""
@@ -82,23 +64,16 @@ class ConversationManager:
         return "Görüşmek üzere! Sorularınız için her zaman buradayım. İyi günler dilerim."
 
     def add_to_conversation(self, user_id: str, user_message: str, bot_response: str):
-        """Sohbet geçmişine ekle"""
-        if user_id not in self.conversations:
-            self.conversations[user_id] = []
-        
-        self.conversations[user_id].append({
-            "user": user_message,
-            "assistant": bot_response,
-            "timestamp": datetime.datetime.now().isoformat()
-        })
-        
-        # Son 10 mesajı tut (hafıza sınırı)
-        if len(self.conversations[user_id]) > 10:
-            self.conversations[user_id] = self.conversations[user_id][-10:]
+        """Sohbet geçmişine ekle (son CONVERSATION_MAX_TURNS mesaj tutulur)"""
+        self.store.append(user_id, user_message, bot_response)
 
     def get_conversation_history(self, user_id: str) -> List[Dict]:
         """Sohbet geçmişini getir"""
-        return self.conversations.get(user_id, [])
+        return self.store.get(user_id)
+
+    def clear_conversation(self, user_id: str):
+        """Kullanıcının sohbet geçmişini sil"""
+        self.store.clear(user_id)
 
     def get_conversation_context(self, user_id: str, limit: int = 3) -> str:
         """Son N mesajı bağlam olarak formatla"""
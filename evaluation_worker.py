@@ -0,0 +1,126 @@
+"""
+Yanıt değerlendirmesini istek yolundan çıkaran arka plan havuzu
+Yanıt ucuz bir güven skoruyla (ResponseEvaluator.quick_evaluate) hemen döner; tam
+değerlendirme (tüm metrikler, belge taraması) thread havuzunda çalışır ve sonucu
+evaluation_id ile kaydedilir (question_db.question_evaluations).
+"""
+import uuid
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from config import config
+from evaluator import ResponseEvaluator
+import question_db
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationPool:
+    """Sınırlı sayıda bekleyen işle çalışan değerlendirme havuzu
+
+    on_result(evaluation_id, evaluation) sonucu kaydeder; verilmezse sonuç
+    doğrudan question_db.save_evaluation ile yazılır. Bekleyen iş sayısı
+    max_pending'e ulaştıysa yeni iş düşürülür ve sayılır.
+    """
+
+    def __init__(
+        self,
+        evaluator: Optional[ResponseEvaluator] = None,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        on_result: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+    ):
+        self.evaluator = evaluator or ResponseEvaluator()
+        self.max_workers = max_workers or config.RESPONSE_EVAL_WORKERS
+        self.max_pending = max_pending or config.RESPONSE_EVAL_MAX_PENDING
+        self.on_result = on_result
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="response-eval"
+            )
+            atexit.register(self.shutdown)
+        return self._executor
+
+    def submit(
+        self,
+        response: str,
+        query: str,
+        sources: List[str],
+        documents: List[str],
+        document_stats: Optional[List[Optional[Dict[str, Any]]]] = None,
+    ) -> Optional[str]:
+        """Tam değerlendirmeyi kuyruğa al - evaluation_id döner (havuz doluysa None)"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 100 == 0:
+                    logger.warning(f"⚠️ Değerlendirme kuyruğu dolu, {self.dropped} iş düşürüldü")
+                return None
+            self.pending += 1
+            executor = self._get_executor()
+
+        evaluation_id = uuid.uuid4().hex
+        try:
+            executor.submit(
+                self._run,
+                evaluation_id,
+                response,
+                query,
+                list(sources),
+                list(documents),
+                list(document_stats or []),
+            )
+        except RuntimeError:  # Kapanış sırasında havuz yeni iş kabul etmez
+            with self._lock:
+                self.pending -= 1
+                self.dropped += 1
+            return None
+        return evaluation_id
+
+    def _run(self, evaluation_id, response, query, sources, documents, document_stats):
+        try:
+            evaluation = self.evaluator.evaluate_response(
+                response, query, sources, documents, document_stats
+            )
+            if self.on_result is not None:
+                self.on_result(evaluation_id, evaluation)
+            else:
+                question_db.save_evaluation(evaluation_id, evaluation)
+            with self._lock:
+                self.completed += 1
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.error(f"❌ Yanıt değerlendirme hatası: {e}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        """Bekleyen değerlendirmeleri bitir ve havuzu kapat (atexit ile çağrılır)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
@@ -1,11 +1,37 @@
 import re
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 from config import config
+from cache_utils import LRUCache
+from chunk_stats import NUMBER_RE, get_chunk_stats
+from turkish_analyzer import analyze
+
+WORD_RE = re.compile(r"\w+")
+
+
+def response_features(response: str) -> Dict[str, Any]:
+    """Metriklerin ortak kullandığı yanıt türevleri - yanıt başına bir kez hesaplanır"""
+    lower = response.lower()
+    return {
+        "lower": lower,
+        "word_set": set(WORD_RE.findall(lower)),
+        "numbers": NUMBER_RE.findall(response),
+        "word_count": len(response.split()),
+        "lower_words": lower.split(),
+        "sentence_lengths": [len(sentence.split()) for sentence in response.split(".")],
+    }
 
 
 class ResponseEvaluator:
     """RAG sistemi yanıtlarının kalitesini değerlendiren sınıf"""
 
+    OVERALL_WEIGHTS = {
+        "relevance_score": 0.25,
+        "completeness_score": 0.20,
+        "accuracy_score": 0.25,
+        "clarity_score": 0.15,
+        "source_support_score": 0.15,
+    }
+
     def __init__(self):
         self.quality_metrics = {
             "relevance": 0.0,
@@ -55,21 +81,37 @@ class ResponseEvaluator:
             "başarı",
         ]
 
+        # evaluate_batch için chunk istatistikleri (belge metni -> istatistik)
+        self._batch_doc_stats = LRUCache(config.AUDIT_DOC_STATS_CACHE_SIZE)
+
     def evaluate_response(
-        self, response: str, query: str, sources: List[str], retrieved_docs: List[str]
+        self,
+        response: str,
+        query: str,
+        sources: List[str],
+        retrieved_docs: List[str],
+        doc_stats: Optional[List[Optional[Dict[str, Any]]]] = None,
     ) -> Dict[str, Any]:
-        """Yanıtı kapsamlı olarak değerlendir"""
+        """Yanıtı kapsamlı olarak değerlendir
+
+        doc_stats: retrieved_docs ile aynı sırada, ingest sırasında hesaplanmış
+        chunk istatistikleri (get_chunk_stats). Eksik olanlar metinden hesaplanır.
+        """
+        doc_stats = self._resolve_doc_stats(retrieved_docs, doc_stats)
+        features = response_features(response)
 
         evaluation = {
-            "relevance_score": self.calculate_relevance(response, query),
-            "completeness_score": self.calculate_completeness(response, query),
-            "accuracy_score": self.calculate_accuracy(response, retrieved_docs),
-            "clarity_score": self.calculate_clarity(response),
-            "source_support_score": self.calculate_source_support(response, sources),
-            "length_check": self.check_response_length(response),
-            "language_quality": self.check_language_quality(response),
+            "relevance_score": self.calculate_relevance(response, query, features),
+            "completeness_score": self.calculate_completeness(response, query, features),
+            "accuracy_score": self.calculate_accuracy(
+                response, retrieved_docs, doc_stats, features
+            ),
+            "clarity_score": self.calculate_clarity(response, features),
+            "source_support_score": self.calculate_source_support(response, sources, features),
+            "length_check": self.check_response_length(response, features),
+            "language_quality": self.check_language_quality(response, features),
             "factual_consistency": self.check_factual_consistency(
-                response, retrieved_docs
+                response, retrieved_docs, doc_stats, features
             ),
         }
 
@@ -83,14 +125,88 @@ class ResponseEvaluator:
 
         return evaluation
 
-    def calculate_relevance(self, response: str, query: str) -> float:
+    def evaluate_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Çok sayıda kaydı değerlendir - her sonuç evaluate_response ile aynıdır
+
+        items: {"query", "response", "sources", "documents"} sözlükleri. Aynı
+        belgeler (aynı kaynak dosyanın chunk'ları) kayıtlar arasında tekrar ettiği
+        için chunk istatistikleri bir kez hesaplanır ve sayılar küme olarak tutulur.
+        """
+        results = []
+        for item in items:
+            documents = item.get("documents") or []
+            doc_stats = []
+            for document in documents:
+                stats = self._batch_doc_stats.get(document)
+                if stats is None:
+                    stats = get_chunk_stats(document)
+                    stats = {**stats, "numbers": frozenset(stats["numbers"])}
+                    self._batch_doc_stats.set(document, stats)
+                doc_stats.append(stats)
+            results.append(
+                self.evaluate_response(
+                    item.get("response") or "",
+                    item.get("query") or "",
+                    item.get("sources") or [],
+                    documents,
+                    doc_stats,
+                )
+            )
+        return results
+
+    def quick_evaluate(
+        self, response: str, query: str, sources: List[str]
+    ) -> Dict[str, Any]:
+        """Yanıt yolunda kullanılan ucuz değerlendirme (belgeler taranmaz)
+
+        Sadece yanıt/soru metnine bakan metrikler hesaplanır; ağırlıklar
+        calculate_overall_score ile aynıdır, belge gerektiren accuracy ve dil/
+        tutarlılık çarpanları hariç tutulup kalan ağırlıklar normalize edilir.
+        Tam değerlendirme (evaluate_response) arka planda yapılır.
+        """
+        features = response_features(response)
+        evaluation = {
+            "relevance_score": self.calculate_relevance(response, query, features),
+            "completeness_score": self.calculate_completeness(response, query, features),
+            "clarity_score": self.calculate_clarity(response, features),
+            "source_support_score": self.calculate_source_support(response, sources, features),
+        }
+        weights = {
+            metric: weight
+            for metric, weight in self.OVERALL_WEIGHTS.items()
+            if metric in evaluation
+        }
+        overall_score = sum(
+            evaluation[metric] * weight for metric, weight in weights.items()
+        ) / sum(weights.values())
+        evaluation["overall_score"] = max(0.0, min(1.0, overall_score))
+        evaluation["quality_level"] = self.get_quality_level(evaluation["overall_score"])
+        evaluation["partial"] = True
+        return evaluation
+
+    @staticmethod
+    def _resolve_doc_stats(
+        retrieved_docs: List[str],
+        doc_stats: Optional[List[Optional[Dict[str, Any]]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Her doküman için chunk istatistikleri - verilmeyenler hesaplanır"""
+        doc_stats = list(doc_stats or [])
+        return [
+            doc_stats[i] if i < len(doc_stats) and doc_stats[i] else get_chunk_stats(doc)
+            for i, doc in enumerate(retrieved_docs)
+        ]
+
+    def calculate_relevance(
+        self, response: str, query: str, features: Optional[Dict[str, Any]] = None
+    ) -> float:
         """Yanıtın soruyla ne kadar ilgili olduğunu değerlendir"""
-        response_lower = response.lower()
+        features = features or response_features(response)
+        response_lower = features["lower"]
         query_lower = query.lower()
 
         # Query'deki anahtar kelimeleri bul
-        query_words = set(re.findall(r"\w+", query_lower))
-        response_words = set(re.findall(r"\w+", response_lower))
+        query_words = set(WORD_RE.findall(query_lower))
+        response_words = features["word_set"]
 
         # Ortak kelime oranı
         if not query_words:
@@ -107,10 +223,14 @@ class ResponseEvaluator:
 
         return min(1.0, relevance + academic_bonus)
 
-    def calculate_completeness(self, response: str, query: str) -> float:
+    def calculate_completeness(
+        self, response: str, query: str, features: Optional[Dict[str, Any]] = None
+    ) -> float:
         """Yanıtın eksiksizlik durumunu değerlendir"""
+        features = features or response_features(response)
         query_lower = query.lower()
-        response_lower = response.lower()
+        response_lower = features["lower"]
+        has_number = bool(features["numbers"])
 
         completeness_score = 0.5  # Base score
 
@@ -124,38 +244,46 @@ class ResponseEvaluator:
 
         elif any(word in query_lower for word in ["ne zaman", "when", "tarih"]):
             # Zaman soruları için tarih/süre var mı?
-            if re.search(r"\d+", response) or any(
+            if has_number or any(
                 word in response_lower for word in ["tarih", "süre", "gün"]
             ):
                 completeness_score += 0.3
 
         elif any(word in query_lower for word in ["kaç", "how many"]):
             # Sayısal sorular için rakam var mı?
-            if re.search(r"\d+", response):
+            if has_number:
                 completeness_score += 0.3
 
         # Yanıt uzunluğu kontrolü
-        word_count = len(response.split())
+        word_count = features["word_count"]
         if word_count >= 20:  # Yeterli detay
             completeness_score += 0.2
 
         return min(1.0, completeness_score)
 
-    def calculate_accuracy(self, response: str, retrieved_docs: List[str]) -> float:
+    def calculate_accuracy(
+        self,
+        response: str,
+        retrieved_docs: List[str],
+        doc_stats: Optional[List[Dict[str, Any]]] = None,
+        features: Optional[Dict[str, Any]] = None,
+    ) -> float:
         """Yanıtın belgelerle tutarlılığını kontrol et"""
         if not retrieved_docs:
             return 0.0
+        if doc_stats is None:
+            doc_stats = self._resolve_doc_stats(retrieved_docs)
+        features = features or response_features(response)
 
-        response_lower = response.lower()
+        response_lower = features["lower"]
         accuracy_score = 0.0
         total_checks = 0
 
         # Yanıttaki sayısal bilgileri kontrol et
-        response_numbers = re.findall(r"\d+", response)
+        response_numbers = features["numbers"]
 
-        for doc in retrieved_docs[:3]:  # İlk 3 dokümanı kontrol et
-            doc_lower = doc.lower()
-            doc_numbers = re.findall(r"\d+", doc)
+        for stats in doc_stats[:3]:  # İlk 3 dokümanı kontrol et
+            doc_numbers = stats["numbers"]
 
             # Sayısal tutarlılık kontrolü
             for num in response_numbers:
@@ -184,15 +312,16 @@ class ResponseEvaluator:
         final_accuracy = numerical_accuracy + certainty_bonus - uncertainty_penalty
         return max(0.0, min(1.0, final_accuracy))
 
-    def calculate_clarity(self, response: str) -> float:
+    def calculate_clarity(
+        self, response: str, features: Optional[Dict[str, Any]] = None
+    ) -> float:
         """Yanıtın netlik durumunu değerlendir"""
+        features = features or response_features(response)
         clarity_score = 0.5  # Base score
 
         # Cümle yapısı analizi
-        sentences = response.split(".")
-        avg_sentence_length = sum(len(s.split()) for s in sentences) / max(
-            len(sentences), 1
-        )
+        sentence_lengths = features["sentence_lengths"]
+        avg_sentence_length = sum(sentence_lengths) / max(len(sentence_lengths), 1)
 
         # Optimal cümle uzunluğu (15-25 kelime)
         if 15 <= avg_sentence_length <= 25:
@@ -206,7 +335,7 @@ class ResponseEvaluator:
 
         # Türkçe dilbilgisi göstergeleri
         if any(
-            word in response.lower() for word in ["için", "ile", "ve", "ancak", "fakat"]
+            word in features["lower"] for word in ["için", "ile", "ve", "ancak", "fakat"]
         ):
             clarity_score += 0.1
 
@@ -216,7 +345,9 @@ class ResponseEvaluator:
 
         return max(0.0, min(1.0, clarity_score))
 
-    def calculate_source_support(self, response: str, sources: List[str]) -> float:
+    def calculate_source_support(
+        self, response: str, sources: List[str], features: Optional[Dict[str, Any]] = None
+    ) -> float:
         """Yanıtın kaynaklarla ne kadar desteklendiğini kontrol et"""
         if not sources:
             return 0.0
@@ -230,7 +361,7 @@ class ResponseEvaluator:
             support_score += 0.1
 
         # Yanıtta kaynak referansı var mı?
-        response_lower = response.lower()
+        response_lower = (features or response_features(response))["lower"]
         if any(
             word in response_lower for word in ["belge", "dokuman", "kaynak", "göre"]
         ):
@@ -246,9 +377,11 @@ class ResponseEvaluator:
 
         return min(1.0, support_score)
 
-    def check_response_length(self, response: str) -> Dict[str, Any]:
+    def check_response_length(
+        self, response: str, features: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Yanıt uzunluğunu kontrol et"""
-        word_count = len(response.split())
+        word_count = (features or response_features(response))["word_count"]
         char_count = len(response)
 
         return {
@@ -261,13 +394,16 @@ class ResponseEvaluator:
             <= config.MAX_ANSWER_LENGTH,
         }
 
-    def check_language_quality(self, response: str) -> Dict[str, Any]:
+    def check_language_quality(
+        self, response: str, features: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Dil kalitesini kontrol et"""
+        features = features or response_features(response)
         issues = []
         score = 1.0
 
         # Tekrarlayan kelimeler
-        words = response.lower().split()
+        words = features["lower_words"]
         word_freq = {}
         for word in words:
             word_freq[word] = word_freq.get(word, 0) + 1
@@ -280,15 +416,13 @@ class ResponseEvaluator:
             score -= 0.2
 
         # Çok uzun cümleler
-        sentences = response.split(".")
-        long_sentences = [s for s in sentences if len(s.split()) > 40]
-        if long_sentences:
+        if any(length > 40 for length in features["sentence_lengths"]):
             issues.append("Çok uzun cümleler mevcut")
             score -= 0.1
 
         # Belirsizlik ifadeleri
         uncertainty_count = sum(
-            1 for indicator in self.negative_indicators if indicator in response.lower()
+            1 for indicator in self.negative_indicators if indicator in features["lower"]
         )
         if uncertainty_count > 2:
             issues.append("Çok fazla belirsizlik ifadesi")
@@ -301,20 +435,27 @@ class ResponseEvaluator:
         }
 
     def check_factual_consistency(
-        self, response: str, retrieved_docs: List[str]
+        self,
+        response: str,
+        retrieved_docs: List[str],
+        doc_stats: Optional[List[Dict[str, Any]]] = None,
+        features: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Faktüel tutarlılığı kontrol et"""
         if not retrieved_docs:
             return {"score": 0.0, "issues": ["Kaynak belge yok"]}
+        if doc_stats is None:
+            doc_stats = self._resolve_doc_stats(retrieved_docs)
+        features = features or response_features(response)
 
         issues = []
         score = 0.8  # Base score
 
         # Yanıttaki rakamları kontrol et
-        response_numbers = re.findall(r"\d+", response)
-        doc_numbers = []
-        for doc in retrieved_docs:
-            doc_numbers.extend(re.findall(r"\d+", doc))
+        response_numbers = features["numbers"]
+        doc_numbers = set()
+        for stats in doc_stats:
+            doc_numbers.update(stats["numbers"])
 
         inconsistent_numbers = []
         for num in response_numbers:
@@ -325,11 +466,11 @@ class ResponseEvaluator:
             issues.append(f"Belgede bulunmayan rakamlar: {inconsistent_numbers}")
             score -= 0.3
 
-        # Yanıtta belirtilen fakat belgelerde olmayan terimler
-        response_terms = set(re.findall(r"\b\w{4,}\b", response.lower()))
+        # Yanıtta belirtilen fakat belgelerde olmayan terimler (gövde bazında)
+        response_terms = {term for term in analyze(response) if len(term) >= 4}
         doc_terms = set()
-        for doc in retrieved_docs:
-            doc_terms.update(re.findall(r"\b\w{4,}\b", doc.lower()))
+        for stats in doc_stats:
+            doc_terms.update(term for term in stats["term_freqs"] if len(term) >= 4)
 
         new_terms = response_terms - doc_terms
         if len(new_terms) > 5:  # Çok fazla yeni terim
@@ -344,16 +485,8 @@ class ResponseEvaluator:
 
     def calculate_overall_score(self, evaluation: Dict[str, Any]) -> float:
         """Genel kalite skorunu hesapla"""
-        weights = {
-            "relevance_score": 0.25,
-            "completeness_score": 0.20,
-            "accuracy_score": 0.25,
-            "clarity_score": 0.15,
-            "source_support_score": 0.15,
-        }
-
         overall = 0.0
-        for metric, weight in weights.items():
+        for metric, weight in self.OVERALL_WEIGHTS.items():
             overall += evaluation.get(metric, 0.0) * weight
 
         # Dil kalitesi cezası
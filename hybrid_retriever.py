@@ -1,17 +1,22 @@
-import chromadb
-import re
+import json
+import heapq
+from collections import Counter
+import numpy as np
 from typing import List, Dict, Any, Tuple, Optional, Union
 from sentence_transformers import SentenceTransformer
+from chroma import ChromaDBManager
 from config import config
 from query_processor import QueryProcessor
+from turkish_analyzer import analyze, fold_case, stem
+from chunk_stats import get_chunk_stats
+from cache_utils import LRUCache
 
 
 class HybridRetriever:
     """Semantic ve keyword-based aramayı birleştiren hibrit retrieval sistemi"""
 
     def __init__(self, chroma_path: str = "./chroma"):
-        self.client = chromadb.PersistentClient(path=chroma_path)
-        self.collection = self.client.get_or_create_collection("rag_documents")
+        self.chroma_manager = ChromaDBManager(chroma_path)
         self.model = SentenceTransformer(config.EMBEDDING_MODEL)
         self.query_processor = QueryProcessor()
 
@@ -28,6 +33,27 @@ class HybridRetriever:
             "süre": 2.0,
             "puan": 2.0,
         }
+        # Ağırlıklar gövde üzerinden eşleşir ("sınavda" -> "sınav")
+        self.keyword_weights = {
+            stem(fold_case(keyword)): weight
+            for keyword, weight in self.keyword_weights.items()
+        }
+
+        # Keyword index: collection versiyonu değişince yeniden kurulur
+        self._keyword_index_version: Optional[str] = None
+        self._keyword_entries: List[Dict[str, Any]] = []
+        self._keyword_postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._keyword_by_source: Dict[str, set] = {}
+        self._keyword_by_file_type: Dict[str, set] = {}
+
+        # Retrieval cache: collection versiyonu anahtarın parçası, değişince temizlenir
+        self.retrieval_cache = LRUCache(config.RETRIEVAL_CACHE_SIZE)
+        self._retrieval_cache_version: Optional[str] = None
+
+    @property
+    def collection(self):
+        """Güncel ChromaDB collection'ı (optimize sonrası değişimlerle uyumlu)"""
+        return self.chroma_manager.collection
 
     def embed_query(self, text: str) -> List[float]:
         """Query için embedding hesapla"""
@@ -36,85 +62,215 @@ class HybridRetriever:
         )
         return embedding.tolist()
 
+    def embed_queries(self, texts: List[str]):
+        """Birden fazla query için tek batch'te embedding hesapla - (N, D) matris"""
+        return self.model.encode(
+            texts,
+            normalize_embeddings=config.NORMALIZE_EMBEDDINGS,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+
     def semantic_search(
-        self, query: str, n_results: Optional[int] = None
+        self,
+        query: str,
+        n_results: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Semantic similarity ile arama"""
+        return self.semantic_search_many([query], n_results, filters)[0]
+
+    def semantic_search_many(
+        self,
+        queries: List[str],
+        n_results: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
+        """Birden fazla query için tek embedding batch'i ve tek Chroma çağrısıyla arama
+
+        filters (ör. source_files, file_types, page_min/page_max) ANN aramasından
+        önce Chroma where koşulu olarak uygulanır. query_embeddings verilirse
+        (queries ile aynı sırada) embedding tekrar hesaplanmaz.
+        """
         if n_results is None:
             n_results = config.DEFAULT_N_RESULTS
+        if not queries:
+            return []
+        if query_embeddings is None:
+            query_embeddings = self.embed_queries(queries)
 
-        query_embedding = self.embed_query(query)
-
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
+        batch = self.chroma_manager.search_many(
+            query_embeddings,
             n_results=min(n_results, config.MAX_N_RESULTS),
-            include=["documents", "metadatas", "distances"],
+            filters=filters,
+            include_documents=True,
         )
 
-        # ChromaDB QueryResult'ı Dict'e çevir
-        return {
-            "documents": results.get("documents", [[]]),
-            "metadatas": results.get("metadatas", [[]]),
-            "distances": results.get("distances", [[]]),
+        # Her query için ChromaDB QueryResult formatında Dict döndür
+        results = []
+        for row in range(len(queries)):
+            found = int(batch["counts"][row])
+            results.append(
+                {
+                    "ids": [batch["ids"][row, :found].tolist()],
+                    "documents": [batch["documents"][row]],
+                    "metadatas": [batch["metadatas"][row]],
+                    "distances": [batch["distances"][row, :found].tolist()],
+                }
+            )
+        return results
+
+    def _ensure_keyword_index(self):
+        """Chunk'ları Türkçe analyzer ile indexle (gövde -> [(chunk, frekans)])"""
+        version = self.chroma_manager.get_collection_version()
+        if version == self._keyword_index_version:
+            return
+
+        all_docs = self.collection.get(include=["documents", "metadatas"])
+        documents = all_docs.get("documents") or []
+        metadatas = all_docs.get("metadatas") or []
+        ids = all_docs.get("ids") or []
+
+        entries: List[Dict[str, Any]] = []
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        by_source: Dict[str, set] = {}
+        by_file_type: Dict[str, set] = {}
+        for i, (doc, metadata) in enumerate(zip(documents, metadatas)):
+            if not doc or not metadata:  # None check
+                continue
+            terms = get_chunk_stats(doc, metadata)["term_freqs"]
+            position = len(entries)
+            entries.append(
+                {
+                    "id": ids[i] if i < len(ids) else f"doc_{i}",
+                    "document": doc,
+                    "metadata": metadata,
+                    "length": sum(terms.values()),
+                }
+            )
+            for term, count in terms.items():
+                postings.setdefault(term, []).append((position, count))
+            by_source.setdefault(metadata.get("source_file"), set()).add(position)
+            by_file_type.setdefault(metadata.get("file_type"), set()).add(position)
+
+        self._keyword_entries = entries
+        self._keyword_postings = postings
+        self._keyword_by_source = by_source
+        self._keyword_by_file_type = by_file_type
+        self._keyword_index_version = version
+
+    def _allowed_positions(self, filters: Optional[Dict[str, Any]]) -> Optional[set]:
+        """Filtrelere uyan keyword index pozisyonları (filtre yoksa None)
+
+        source_files/file_types metadata index'inden, diğer koşullar chunk
+        metadata'sı üzerinden değerlendirilir (Chroma where clause ile aynı anlam).
+        """
+        if not filters:
+            return None
+        allowed: Optional[set] = None
+        for key, index in (
+            ("source_files", self._keyword_by_source),
+            ("file_types", self._keyword_by_file_type),
+        ):
+            values = filters.get(key)
+            if values is None:
+                continue
+            positions = set().union(*(index.get(value, set()) for value in values))
+            allowed = positions if allowed is None else allowed & positions
+
+        residual = {
+            key: value
+            for key, value in filters.items()
+            if key not in ("source_files", "file_types") and value is not None
         }
+        if residual:
+            candidates = allowed if allowed is not None else range(len(self._keyword_entries))
+            allowed = {
+                position
+                for position in candidates
+                if self._metadata_matches(self._keyword_entries[position]["metadata"], residual)
+            }
+        return allowed if allowed is not None else set(range(len(self._keyword_entries)))
+
+    @staticmethod
+    def _metadata_matches(metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        """Chunk metadata'sı filtre koşullarını sağlıyor mu"""
+        for key, value in filters.items():
+            if key in ("page_min", "page_max"):
+                try:
+                    page = int(metadata.get("page_number"))
+                except (TypeError, ValueError):
+                    return False
+                if key == "page_min" and page < int(value):
+                    return False
+                if key == "page_max" and page > int(value):
+                    return False
+            elif key == "min_chunk_length":
+                if metadata.get("chunk_length", 0) < value:
+                    return False
+            elif key == "max_chunk_length":
+                if metadata.get("chunk_length", 0) > value:
+                    return False
+            elif metadata.get(key) != value:
+                return False
+        return True
 
     def keyword_search(
-        self, query: str, n_results: Optional[int] = None
+        self,
+        query: str,
+        n_results: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
-        """Keyword-based arama"""
+        """Keyword-based arama - gövdelenmiş terimler üzerinden inverted index"""
         if n_results is None:
             n_results = config.DEFAULT_N_RESULTS
 
-        # Tüm dokümanları al (bu gerçek uygulamada optimize edilmeli)
-        all_docs = self.collection.get(include=["documents", "metadatas"])
+        self._ensure_keyword_index()
+        terms = set(analyze(query, min_length=3))
+        if not terms:
+            return []
+        allowed = self._allowed_positions(filters)
+        if allowed is not None and not allowed:
+            return []
 
-        processed_query = self.query_processor.process_query(query)
-        keywords = processed_query["keywords"]
+        # Eşleşme sayısı * ağırlık - filtre dışı chunk'lar skorlanmaz
+        scores: Dict[int, float] = {}
+        for term in terms:
+            weight = self.keyword_weights.get(term, 1.0)
+            for position, count in self._keyword_postings.get(term, ()):
+                if allowed is not None and position not in allowed:
+                    continue
+                scores[position] = scores.get(position, 0.0) + count * weight
 
         scored_docs = []
+        for position, score in scores.items():
+            entry = self._keyword_entries[position]
+            # Doküman uzunluğuna göre normalize et (SQRT normalization)
+            if entry["length"] > 0:
+                score = score / (entry["length"] ** 0.5)
+            scored_docs.append(
+                {
+                    "document": entry["document"],
+                    "metadata": entry["metadata"],
+                    "score": score,
+                    "id": entry["id"],
+                }
+            )
 
-        # None check'leri ekle
-        documents = all_docs.get("documents", [])
-        metadatas = all_docs.get("metadatas", [])
-        ids = all_docs.get("ids", [])
-
-        if not documents or not metadatas:
-            return []
-
-        for i, (doc, metadata) in enumerate(zip(documents, metadatas)):
-            if doc and metadata:  # None check
-                score = self.calculate_keyword_score(doc, keywords)
-                if score > 0:
-                    doc_id = ids[i] if i < len(ids) else f"doc_{i}"
-                    scored_docs.append(
-                        {
-                            "document": doc,
-                            "metadata": metadata,
-                            "score": score,
-                            "id": doc_id,
-                        }
-                    )
-
-        # Score'a göre sırala
-        scored_docs.sort(key=lambda x: x["score"], reverse=True)
-
-        return scored_docs[:n_results]
+        return heapq.nlargest(n_results, scored_docs, key=lambda x: x["score"])
 
     def calculate_keyword_score(self, document: str, keywords: List[str]) -> float:
         """Doküman için keyword score hesapla"""
-        doc_lower = document.lower()
+        doc_terms = Counter(analyze(document))
         score = 0.0
 
-        for keyword in keywords:
-            # Tam eşleşme
-            if keyword in doc_lower:
-                weight = self.keyword_weights.get(keyword, 1.0)
-                # Kelime sıklığını da dikkate al
-                count = len(re.findall(r"\b" + re.escape(keyword) + r"\b", doc_lower))
-                score += count * weight
+        for term in {stem(fold_case(keyword)) for keyword in keywords}:
+            # Kelime sıklığını da dikkate al
+            score += doc_terms.get(term, 0) * self.keyword_weights.get(term, 1.0)
 
         # Doküman uzunluğuna göre normalize et
-        doc_length = len(document.split())
+        doc_length = sum(doc_terms.values())
         if doc_length > 0:
             score = score / (doc_length**0.5)  # SQRT normalization
 
@@ -126,117 +282,312 @@ class HybridRetriever:
         n_results: Optional[int] = None,
         semantic_weight: float = 0.7,
         keyword_weight: float = 0.3,
+        semantic_results: Optional[Dict[str, Any]] = None,
+        fusion: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
-        """Hibrit arama: semantic + keyword"""
+        """Hibrit arama: semantic + keyword
+
+        Sonuçlar Chroma chunk ID'si üzerinden birleştirilir. fusion="weighted"
+        skorları ağırlıklı toplar, fusion="rrf" Reciprocal Rank Fusion uygular.
+        semantic_results verilirse (ör. semantic_search_many ile toplu hesaplanmış)
+        semantic arama tekrar yapılmaz.
+        """
         if n_results is None:
             n_results = config.DEFAULT_N_RESULTS
+        fusion = fusion or config.FUSION_MODE
 
         # Semantic arama
-        semantic_results = self.semantic_search(query, n_results * 2)
+        if semantic_results is None:
+            semantic_results = self.semantic_search(query, n_results * 2, filters)
 
         # Keyword arama
-        keyword_results = self.keyword_search(query, n_results * 2)
-
-        # Sonuçları birleştir ve skorla
-        combined_results = {}
+        keyword_results = self.keyword_search(query, n_results * 2, filters)
 
         # Semantic sonuçlar
+        ids = semantic_results.get("ids", [[]])[0]
         docs = semantic_results.get("documents", [[]])[0]
         metadatas = semantic_results.get("metadatas", [[]])[0]
         distances = semantic_results.get("distances", [[]])[0]
 
-        for i, (doc, metadata, distance) in enumerate(zip(docs, metadatas, distances)):
-            doc_id = f"semantic_{i}"
-            semantic_score = 1.0 - distance  # Distance'i similarity'ye çevir
-
-            combined_results[doc_id] = {
+        semantic_hits = [
+            {
+                "id": doc_id,
                 "document": doc,
                 "metadata": metadata,
-                "semantic_score": semantic_score,
-                "keyword_score": 0.0,
-                "combined_score": semantic_score * semantic_weight,
-                "source": "semantic",
+                "score": 1.0 - distance,  # Distance'i similarity'ye çevir
             }
+            for doc_id, doc, metadata, distance in zip(ids, docs, metadatas, distances)
+        ]
+
+        if fusion == "rrf":
+            combined_results = self._fuse_rrf(
+                semantic_hits, keyword_results, semantic_weight, keyword_weight
+            )
+        else:
+            combined_results = self._fuse_weighted(
+                semantic_hits, keyword_results, semantic_weight, keyword_weight
+            )
+
+        # Combined score'a göre ilk n sonuç
+        return heapq.nlargest(
+            n_results, combined_results.values(), key=lambda x: x["combined_score"]
+        )
 
-        # Keyword sonuçları ekle/güncelle
-        for result in keyword_results:
-            doc = result["document"]
-            # Aynı dokümanı bul
-            doc_id = None
-            for existing_id, existing_result in combined_results.items():
-                if existing_result["document"] == doc:
-                    doc_id = existing_id
-                    break
-
-            if doc_id:
-                # Mevcut sonucu güncelle
-                combined_results[doc_id]["keyword_score"] = result["score"]
-                combined_results[doc_id]["combined_score"] = (
-                    combined_results[doc_id]["semantic_score"] * semantic_weight
-                    + result["score"] * keyword_weight
-                )
-                combined_results[doc_id]["source"] = "hybrid"
+    @staticmethod
+    def _new_fused_result(hit: Dict[str, Any], source: str) -> Dict[str, Any]:
+        return {
+            "id": hit["id"],
+            "document": hit["document"],
+            "metadata": hit["metadata"],
+            "semantic_score": 0.0,
+            "keyword_score": 0.0,
+            "combined_score": 0.0,
+            "source": source,
+        }
+
+    def _fuse_weighted(
+        self,
+        semantic_hits: List[Dict[str, Any]],
+        keyword_hits: List[Dict[str, Any]],
+        semantic_weight: float,
+        keyword_weight: float,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Skor ağırlıklı birleştirme - chunk ID ile dict join"""
+        combined_results: Dict[str, Dict[str, Any]] = {}
+
+        for hit in semantic_hits:
+            result = self._new_fused_result(hit, "semantic")
+            result["semantic_score"] = hit["score"]
+            result["combined_score"] = hit["score"] * semantic_weight
+            combined_results[hit["id"]] = result
+
+        for hit in keyword_hits:
+            result = combined_results.get(hit["id"])
+            if result is None:
+                result = self._new_fused_result(hit, "keyword")
+                combined_results[hit["id"]] = result
             else:
-                # Yeni sonuç ekle
-                new_id = f"keyword_{len(combined_results)}"
-                combined_results[new_id] = {
-                    "document": doc,
-                    "metadata": result["metadata"],
-                    "semantic_score": 0.0,
-                    "keyword_score": result["score"],
-                    "combined_score": result["score"] * keyword_weight,
-                    "source": "keyword",
-                }
+                result["source"] = "hybrid"
+            result["keyword_score"] = hit["score"]
+            result["combined_score"] = (
+                result["semantic_score"] * semantic_weight
+                + hit["score"] * keyword_weight
+            )
 
-        # Combined score'a göre sırala
-        sorted_results = sorted(
-            combined_results.values(), key=lambda x: x["combined_score"], reverse=True
-        )
+        return combined_results
 
-        return sorted_results[:n_results]
+    def _fuse_rrf(
+        self,
+        semantic_hits: List[Dict[str, Any]],
+        keyword_hits: List[Dict[str, Any]],
+        semantic_weight: float,
+        keyword_weight: float,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Reciprocal Rank Fusion - yalnızca sıralamalar kullanılır
+
+        Skorlar iki listede de 1. sıradaki bir chunk için 1.0 olacak şekilde
+        normalize edilir, böylece SIMILARITY_THRESHOLD ile uyumlu kalır.
+        """
+        k = config.RRF_K
+        scale = (k + 1) / ((semantic_weight + keyword_weight) or 1.0)
+        combined_results: Dict[str, Dict[str, Any]] = {}
+
+        for source, hits, weight, score_key in (
+            ("semantic", semantic_hits, semantic_weight, "semantic_score"),
+            ("keyword", keyword_hits, keyword_weight, "keyword_score"),
+        ):
+            for rank, hit in enumerate(hits, 1):
+                result = combined_results.get(hit["id"])
+                if result is None:
+                    result = self._new_fused_result(hit, source)
+                    combined_results[hit["id"]] = result
+                else:
+                    result["source"] = "hybrid"
+                result[score_key] = hit["score"]
+                result["combined_score"] += weight / (k + rank) * scale
+
+        return combined_results
 
     def advanced_retrieve(
-        self, query: str, n_results: Optional[int] = None
+        self,
+        query: str,
+        n_results: Optional[int] = None,
+        processed_query: Optional[Dict[str, Any]] = None,
+        filters: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        """Gelişmiş retrieval pipeline"""
+        """Gelişmiş retrieval pipeline
+
+        filters verilirse arama korpusun yalnızca o dilimi üzerinde yapılır.
+        processed_query verilirse (aynı istekte zaten hesaplanmış analiz) tekrar
+        hesaplanmaz. Aynı normalize sorgu için sıralı chunk ID'leri ve skorlar
+        collection versiyonuna bağlı olarak cache'lenir; cache isabetinde embedding
+        ve ANN araması yapılmaz. "query_embedding" orijinal sorgunun vektörüdür
+        (soru kümeleme için tekrar hesaplanmaz).
+        """
         if n_results is None:
             n_results = config.DEFAULT_N_RESULTS
 
         # Query'yi işle
-        processed_query = self.query_processor.process_query(query)
-
-        # Farklı query varyantları dene
-        all_results = []
-
-        for variant in processed_query["expanded"][:3]:  # En fazla 3 varyant
-            results = self.hybrid_search(variant, n_results)
-            all_results.extend(results)
+        if processed_query is None:
+            processed_query = self.query_processor.process_query(query)
+
+        cache_key = self._retrieval_cache_key(processed_query, n_results, filters)
+        cached = self._get_cached_results(cache_key)
+        if cached is not None:
+            cached_results, query_embedding = cached
+            return {
+                "results": cached_results,
+                "query_analysis": processed_query,
+                "total_found": len(cached_results),
+                "query_embedding": query_embedding,
+                "cache_hit": True,
+            }
 
-        # Sonuçları deduplicate et ve skorla
-        unique_results = {}
-        for result in all_results:
-            doc_text = result["document"]
-            if doc_text not in unique_results:
-                unique_results[doc_text] = result
-            else:
-                # Daha yüksek score'u tut
-                if (
-                    result["combined_score"]
-                    > unique_results[doc_text]["combined_score"]
-                ):
-                    unique_results[doc_text] = result
+        # Farklı query varyantları dene - semantic arama tüm varyantlar için tek çağrıda
+        # Orijinal sorgu her zaman ilk varyanttır (en fazla 3 varyant)
+        original = processed_query.get("original", query)
+        variants = sorted(processed_query["expanded"], key=lambda variant: variant != original)[:3]
+        query_embeddings = self.embed_queries(variants)
+        semantic_batch = self.semantic_search_many(
+            variants, n_results * 2, filters, query_embeddings=query_embeddings
+        )
+        query_embedding = np.asarray(query_embeddings[0], dtype=np.float32).tolist()
+
+        # Sonuçları chunk ID ile deduplicate et - daha yüksek score'u tut
+        unique_results: Dict[str, Dict[str, Any]] = {}
+        for variant, semantic_results in zip(variants, semantic_batch):
+            for result in self.hybrid_search(
+                variant, n_results, semantic_results=semantic_results, filters=filters
+            ):
+                current = unique_results.get(result["id"])
+                if current is None or result["combined_score"] > current["combined_score"]:
+                    unique_results[result["id"]] = result
 
         # Final sıralama
-        final_results = sorted(
-            unique_results.values(), key=lambda x: x["combined_score"], reverse=True
-        )[:n_results]
+        final_results = heapq.nlargest(
+            n_results, unique_results.values(), key=lambda x: x["combined_score"]
+        )
+        self._store_cached_results(cache_key, final_results, query_embedding)
 
         return {
             "results": final_results,
             "query_analysis": processed_query,
             "total_found": len(final_results),
+            "query_embedding": query_embedding,
+            "cache_hit": False,
         }
 
+    def _retrieval_cache_key(
+        self,
+        processed_query: Dict[str, Any],
+        n_results: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple:
+        """(normalize sorgu, n, filtreler, füzyon modu, collection versiyonu)"""
+        version = self.chroma_manager.get_collection_version()
+        if version != self._retrieval_cache_version:
+            # Versiyon değişti - eski kayıtlar artık hiç eşleşmez, belleği boşalt
+            self.retrieval_cache.clear()
+            self._retrieval_cache_version = version
+        normalized = processed_query.get("cleaned") or processed_query.get("original", "")
+        filters_key = json.dumps(filters, sort_keys=True, ensure_ascii=False) if filters else ""
+        return (normalized, n_results, filters_key, config.FUSION_MODE, version)
+
+    def _get_cached_results(
+        self, cache_key: Tuple
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[List[float]]]]:
+        """Cache'teki sıralı ID + skorları doküman/metadata ile birleştir
+
+        Dönüş: (sonuçlar, sorgu embedding'i) veya None
+        """
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is None:
+            return None
+        entries, query_embedding = cached
+        documents = self.chroma_manager.get_documents([entry["id"] for entry in entries])
+        if len(documents) != len(set(entry["id"] for entry in entries)):
+            return None  # Eksik chunk var - yeniden ara
+        results = []
+        for entry in entries:
+            document, metadata = documents[entry["id"]]
+            results.append(dict(entry, document=document, metadata=metadata))
+        return results, query_embedding
+
+    def _store_cached_results(
+        self,
+        cache_key: Tuple,
+        results: List[Dict[str, Any]],
+        query_embedding: Optional[List[float]] = None,
+    ):
+        """Sadece ID, skorlar ve sorgu embedding'ini sakla (doküman metni cache'te tutulmaz)"""
+        self.retrieval_cache.set(
+            cache_key,
+            (
+                [
+                    {key: value for key, value in result.items() if key not in ("document", "metadata")}
+                    for result in results
+                ],
+                query_embedding,
+            ),
+        )
+
+    def mmr_select(
+        self,
+        results: List[Dict[str, Any]],
+        lambda_mult: Optional[float] = None,
+        token_budget: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Maximal Marginal Relevance ile çeşitli ve bütçeye sığan sonuç alt kümesi seç
+
+        Alaka, füzyon skorunun (combined_score) en yüksek skora oranıdır. Adaylar
+        arası benzerlik embedding matrisiyle tek matmul'da hesaplanır; her adımda
+        λ·alaka − (1−λ)·(seçilenlere en yüksek benzerlik) skoru en yüksek ve kalan
+        token bütçesine sığan aday seçilir.
+        """
+        if lambda_mult is None:
+            lambda_mult = config.MMR_LAMBDA
+        if token_budget is None:
+            token_budget = config.CONTEXT_TOKEN_BUDGET
+        if len(results) <= 1:
+            return results
+
+        embeddings = self.chroma_manager.get_embeddings([r["id"] for r in results])
+        if embeddings.shape[1] == 0:
+            return results  # Embedding alınamadı - mevcut sıra korunur
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+        similarity = embeddings @ embeddings.T
+
+        scores = np.array([r.get("combined_score", 0.0) for r in results], dtype=np.float32)
+        relevance = scores / scores.max() if scores.max() > 0 else np.ones_like(scores)
+        costs = np.array(
+            [get_chunk_stats(r["document"], r.get("metadata"))["token_count"] for r in results]
+        )
+
+        available = np.ones(len(results), dtype=bool)
+        max_similarity = np.zeros(len(results), dtype=np.float32)
+        remaining = token_budget
+        selected: List[int] = []
+
+        while True:
+            available &= costs <= remaining
+            if not available.any():
+                break
+            mmr = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+            mmr[~available] = -np.inf
+            chosen = int(np.argmax(mmr))
+            selected.append(chosen)
+            available[chosen] = False
+            remaining -= costs[chosen]
+            np.maximum(max_similarity, similarity[chosen], out=max_similarity)
+
+        # Bütçeye hiç sığmayan tek büyük chunk için en alakalı sonucu yine de gönder
+        if not selected:
+            selected = [0]
+        return [results[index] for index in selected]
+
     def filter_by_similarity_threshold(
         self, results: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
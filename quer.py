@@ -8,27 +8,31 @@ from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
+# temizle_yanit her yanıtta çalışır - desenler bir kez derlenir
+THINK_BLOCK_RE = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+HTML_TAG_RE = re.compile(r"<.*?>", re.DOTALL)
+MARKDOWN_MARK_RE = re.compile(r"\*\*|__|~~|`")
+
 
 def temizle_yanit(yazi: str) -> str:
     """Yanıtı temizle ve düzenle"""
     if not yazi:
         return ""
 
-    # <think> etiketlerini kaldır
-    yazi = re.sub(r"<think>.*?</think>", "", yazi, flags=re.DOTALL | re.IGNORECASE)
-
-    # HTML etiketlerini kaldır
-    yazi = re.sub(r"<.*?>", "", yazi, flags=re.DOTALL)
+    # <think> ve HTML etiketlerini kaldır ("<" yoksa iki geçiş de atlanır)
+    if "<" in yazi:
+        yazi = THINK_BLOCK_RE.sub("", yazi)
+        yazi = HTML_TAG_RE.sub("", yazi)
 
     # Markdown işaretlerini temizle
-    yazi = re.sub(r"\*\*|__|~~|`", "", yazi)
+    yazi = MARKDOWN_MARK_RE.sub("", yazi)
 
-    # Çoklu boşlukları temizle
-    yazi = re.sub(r"\s+", " ", yazi).strip()
+    # Çoklu boşlukları temizle (str.split \s ile aynı boşluk karakterlerini kullanır)
+    words = yazi.split()
+    yazi = " ".join(words)
 
     # Çok uzun yanıtları kısalt
     if len(yazi) > config.MAX_ANSWER_LENGTH:
-        words = yazi.split()
         yazi = " ".join(words[: config.MAX_ANSWER_LENGTH // 5]) + "..."
 
     return yazi
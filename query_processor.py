@@ -1,25 +1,20 @@
 import re
+import copy
 import string
 from typing import List, Dict, Any, Tuple
 from config import config
+from cache_utils import LRUCache
+from turkish_analyzer import STOP_WORDS, fold_case, tokenize
+from term_matcher import ACADEMIC_KEYWORDS, CATEGORY_RULES, SYNONYMS, first_rule_match, match_terms
 
 
 class QueryProcessor:
     """Kullanıcı sorgularını optimize eden ve genişleten sınıf"""
 
     def __init__(self):
-        self.synonyms = {
-            "sınav": ["exam", "test", "imtihan", "değerlendirme"],
-            "not": ["puan", "derece", "grade", "değerlendirme"],
-            "ders": ["course", "lesson", "subject", "derslik"],
-            "öğrenci": ["student", "öğrenci", "talebe"],
-            "hoca": ["öğretim görevlisi", "professor", "instructor", "teacher"],
-            "kayıt": ["registration", "enrollment", "kaydolma"],
-            "mezuniyet": ["graduation", "bitirme", "diploma"],
-            "devamsızlık": ["absence", "yoklama", "attendance"],
-            "geçme": ["passing", "başarı", "success"],
-            "kalma": ["failure", "başarısızlık", "tekrar"],
-        }
+        self.analysis_cache = LRUCache(config.QUERY_ANALYSIS_CACHE_SIZE)
+
+        self.synonyms = SYNONYMS
 
         self.question_patterns = {
             "nasıl": ["how", "procedure", "steps", "process"],
@@ -33,30 +28,11 @@ class QueryProcessor:
 
     def clean_query(self, query: str) -> str:
         """Sorguyu temizle ve normalize et"""
-        # Küçük harfe çevir
-        query = query.lower().strip()
-
-        # Noktalama işaretlerini temizle (Türkçe karakterleri koru)
-        query = re.sub(r"[^\w\s\çğıöşüÇĞIİÖŞÜ]", " ", query)
-
-        # Çoklu boşlukları tek boşluk yap
-        query = re.sub(r"\s+", " ", query)
+        # Türkçe küçük harf + noktalama temizliği (Türkçe karakterler korunur)
+        words = tokenize(query)
 
         # Gereksiz kelimeleri çıkar
-        stop_words = {
-            "bir",
-            "bu",
-            "şu",
-            "o",
-            "ve",
-            "ile",
-            "için",
-            "olan",
-            "olur",
-            "var",
-            "yok",
-        }
-        words = [word for word in query.split() if word not in stop_words]
+        words = [word for word in words if word not in STOP_WORDS]
 
         return " ".join(words)
 
@@ -64,65 +40,42 @@ class QueryProcessor:
         """Sorguyu sinonimlerle genişlet"""
         expanded_queries = [query]
 
-        for key, synonyms in self.synonyms.items():
-            if key in query:
-                for synonym in synonyms:
-                    expanded_queries.append(query.replace(key, synonym))
+        for key in match_terms(query).get("synonym", ()):
+            base = query if key in query else fold_case(query)
+            for synonym in self.synonyms[key]:
+                expanded_queries.append(base.replace(key, synonym))
 
         return list(set(expanded_queries))  # Tekrarları kaldır
 
     def extract_entities(self, query: str) -> Dict[str, List[str]]:
         """Sorgudaki önemli varlıkları çıkar"""
+        found = match_terms(query).get("academic_keyword", ())
         entities = {
             "numbers": re.findall(r"\d+", query),
             "dates": re.findall(r"\d{1,2}[./]\d{1,2}[./]\d{2,4}", query),
-            "keywords": [],
+            # Anahtar kelimeler (sözlük sırasıyla)
+            "keywords": [keyword for keyword in ACADEMIC_KEYWORDS if keyword in found],
         }
 
-        # Anahtar kelimeler
-        academic_keywords = [
-            "sınav",
-            "not",
-            "ders",
-            "kredi",
-            "gpa",
-            "ortalama",
-            "mezuniyet",
-            "kayıt",
-            "harç",
-            "burs",
-            "devamsızlık",
-            "disiplin",
-            "yönetmelik",
-        ]
-
-        for keyword in academic_keywords:
-            if keyword in query.lower():
-                entities["keywords"].append(keyword)
-
         return entities
 
     def categorize_query(self, query: str) -> str:
         """Sorgu tipini kategorize et"""
-        query_lower = query.lower()
-
-        if any(word in query_lower for word in ["nasıl", "how", "adım"]):
-            return "procedure"
-        elif any(word in query_lower for word in ["ne zaman", "when", "tarih"]):
-            return "temporal"
-        elif any(word in query_lower for word in ["nerede", "where", "yer"]):
-            return "location"
-        elif any(word in query_lower for word in ["kaç", "how many", "sayı"]):
-            return "quantitative"
-        elif any(word in query_lower for word in ["ne", "what", "nedir"]):
-            return "definition"
-        elif any(word in query_lower for word in ["neden", "why", "sebep"]):
-            return "explanation"
-        else:
-            return "general"
+        return first_rule_match(match_terms(query), "category", CATEGORY_RULES) or "general"
 
     def process_query(self, query: str) -> Dict[str, Any]:
-        """Sorguyu tam olarak işle ve analiz et"""
+        """Sorguyu tam olarak işle ve analiz et
+
+        Sonuçlar LRU'da tutulur; çağıran tarafın değişiklikleri cache'i bozmasın
+        diye kopya döndürülür.
+        """
+        cached = self.analysis_cache.get(query)
+        if cached is None:
+            cached = self._analyze_query(query)
+            self.analysis_cache.set(query, cached)
+        return copy.deepcopy(cached)
+
+    def _analyze_query(self, query: str) -> Dict[str, Any]:
         processed = {
             "original": query,
             "cleaned": self.clean_query(query),
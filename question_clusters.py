@@ -0,0 +1,90 @@
+"""
+Soru kümeleri için bellek içi vektör index'i
+Küme merkezleri (normalize) topic başına tek matriste tutulur; yeni soru en yakın
+merkeze tek matris-vektör çarpımıyla atanır. Kalıcı veri questions.db'dedir
+(question_db.question_clusters), bu index sadece arama hızlandırıcıdır.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def to_vector(embedding) -> Optional[np.ndarray]:
+    """Embedding'i normalize float32 vektöre çevir (boş/sıfır ise None)"""
+    if embedding is None:
+        return None
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+    if norm == 0.0:
+        return None
+    return vector / norm
+
+
+def vector_to_blob(vector: Optional[np.ndarray]) -> Optional[bytes]:
+    return None if vector is None else np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def blob_to_vector(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    return None if not blob else np.frombuffer(blob, dtype=np.float32)
+
+
+class QuestionClusterIndex:
+    """Topic -> (küme id'leri, merkez matrisi) - thread-safe
+
+    loaded_key, index'in hangi veritabanı durumundan yüklendiğini tutar; başka
+    bir süreç küme eklediğinde anahtar değişir ve index yeniden yüklenir.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded_key = None
+        self._ids: Dict[str, List[int]] = {}
+        self._matrices: Dict[str, np.ndarray] = {}
+
+    def load(self, rows, key):
+        """rows: (küme id, topic, merkez blob) satırları"""
+        with self.lock:
+            self.clear()
+            grouped: Dict[str, List[Tuple[int, np.ndarray]]] = {}
+            for cluster_id, topic, blob in rows:
+                vector = blob_to_vector(blob)
+                if vector is not None:
+                    grouped.setdefault(topic or "genel", []).append((cluster_id, vector))
+            for topic, items in grouped.items():
+                dim = items[-1][1].shape[0]
+                items = [(cluster_id, vector) for cluster_id, vector in items if vector.shape[0] == dim]
+                self._ids[topic] = [cluster_id for cluster_id, _ in items]
+                self._matrices[topic] = np.vstack([vector for _, vector in items])
+            self.loaded_key = key
+
+    def nearest(self, topic: str, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        """Aynı topic'teki en yakın küme (id, cosine benzerlik) - yoksa (None, 0.0)"""
+        with self.lock:
+            matrix = self._matrices.get(topic or "genel")
+            if matrix is None or matrix.shape[1] != vector.shape[0]:
+                return None, 0.0
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            return self._ids[topic or "genel"][best], float(similarities[best])
+
+    def upsert(self, cluster_id: int, topic: str, centroid: np.ndarray):
+        """Küme merkezini ekle veya güncelle"""
+        with self.lock:
+            topic = topic or "genel"
+            ids = self._ids.setdefault(topic, [])
+            matrix = self._matrices.get(topic)
+            if matrix is not None and matrix.shape[1] != centroid.shape[0]:
+                return  # Farklı boyut (model değişimi) - bu küme index'e alınmaz
+            if cluster_id in ids:
+                matrix[ids.index(cluster_id)] = centroid
+            else:
+                ids.append(cluster_id)
+                row = centroid.reshape(1, -1).astype(np.float32)
+                self._matrices[topic] = row if matrix is None else np.vstack([matrix, row])
+
+    def clear(self):
+        with self.lock:
+            self._ids = {}
+            self._matrices = {}
+            self.loaded_key = None
@@ -1,12 +1,96 @@
+import os
+import base64
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 import json
+from config import config
+from corpus_store import CorpusStore
+from question_clusters import QuestionClusterIndex, blob_to_vector, to_vector, vector_to_blob
+from term_matcher import TOPIC_RULES, first_rule_match, match_terms
+from turkish_analyzer import fold_case
 
 DB_PATH = "questions.db"
+# Özet tabloların şema sürümü - artırıldığında init_db özet tabloları yeniden hesaplar
+STATS_SCHEMA = 3
+# Gün sınırı yerel saattir: created_at UTC saklanır, created_date / session_date /
+# stats_daily.day yerel gündür ve "bugün" okumaları da yerel güne göre yapılır
+
+# Thread başına tek bağlantı - sqlite3 her bağlantıda derlenmiş ifadeleri
+# (prepared statement) cache'ler, bağlantı yeniden kullanıldıkça tekrar derlenmez
+_local = threading.local()
+_initialized_paths = set()
+
+# Soru kümeleri için en yakın merkez araması (süreç başına tek index)
+_cluster_index = QuestionClusterIndex()
+
+
+def _open_connection():
+    conn = sqlite3.connect(DB_PATH, timeout=30, cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")  # Okuyucular yazıcıyı beklemez
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL ile güvenli, commit başına fsync yok
+    conn.execute("PRAGMA cache_size=-8000")  # ~8 MB sayfa cache
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+def get_connection():
+    """Bu thread'e ait (yeniden kullanılan) questions.db bağlantısı"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid() or _local.path != DB_PATH:
+        conn = _open_connection()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.path = DB_PATH
+        _local.depth = 0
+    return conn
+
+
+def close_connection():
+    """Bu thread'in bağlantısını kapat (dosya silinmeden önce / script sonunda)"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        try:
+            conn.close()
+        finally:
+            _local.conn = None
+    _initialized_paths.discard(DB_PATH)
+
+
+@contextmanager
+def transaction():
+    """Cursor döndüren transaction - iç içe kullanımda sadece en dıştaki commit eder
+
+    Hata olursa tüm transaction geri alınır. Birden fazla ifade çalıştıran
+    işlemler tek transaction'da (tek commit ile) yapılır.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    _local.depth += 1
+    try:
+        yield cursor
+        if _local.depth == 1:
+            conn.commit()
+    except Exception:
+        if _local.depth == 1:
+            conn.rollback()
+        raise
+    finally:
+        _local.depth -= 1
+        cursor.close()
+
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    if DB_PATH in _initialized_paths:
+        return
+    with transaction() as c:
+        _create_schema(c)
+    _initialized_paths.add(DB_PATH)
+
+
+def _create_schema(c):
     c.execute("""
     CREATE TABLE IF NOT EXISTS questions (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -15,15 +99,37 @@ def init_db():
         source_file TEXT,
         source_keyword TEXT,
         topic TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        normalized_question TEXT,
+        created_date TEXT,
+        embedding BLOB,
+        cluster_id INTEGER,
+        evaluation_id TEXT
     )
     """)
     
-    # Mevcut tabloya topic sütunu ekle (eğer yoksa)
-    try:
-        c.execute("ALTER TABLE questions ADD COLUMN topic TEXT")
-    except sqlite3.OperationalError:
-        pass  # Sütun zaten varsa hata verme
+    # Mevcut tabloya eksik sütunları ekle (eğer yoksa)
+    for column in ("topic TEXT", "normalized_question TEXT", "created_date TEXT", "embedding BLOB", "cluster_id INTEGER",
+                   "evaluation_id TEXT"):
+        try:
+            c.execute(f"ALTER TABLE questions ADD COLUMN {column}")
+        except sqlite3.OperationalError:
+            pass  # Sütun zaten varsa hata verme
+    _backfill_normalized_columns(c)
+    # Benzer soru kümeleri - sayılar soru eklenirken güncellenir
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS question_clusters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic TEXT,
+        centroid BLOB,
+        count INTEGER DEFAULT 0,
+        variants INTEGER DEFAULT 0,
+        representative_question TEXT,
+        representative_answer TEXT,
+        representative_count INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
     c.execute("""
     CREATE TABLE IF NOT EXISTS question_sources (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -47,173 +153,696 @@ def init_db():
     CREATE TABLE IF NOT EXISTS user_sessions (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id TEXT NOT NULL,
-        session_date DATE DEFAULT (date('now')),
+        session_date DATE DEFAULT (date('now', 'localtime')),
         first_visit TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         total_questions INTEGER DEFAULT 0,
         UNIQUE(user_id, session_date)
     )
     """)
-    conn.commit()
-    conn.close()
+    # Sık kullanılan filtre/gruplama sütunları için index'ler
+    # (user_sessions (user_id, session_date) UNIQUE kısıtının index'ini kullanır)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_questions_created_date ON questions (created_date, normalized_question)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_questions_normalized ON questions (normalized_question)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_questions_source_file ON questions (source_file)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_user_sessions_date ON user_sessions (session_date, user_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_questions_cluster ON questions (cluster_id, normalized_question)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_question_clusters_count ON question_clusters (count DESC)")
+    # Arka planda hesaplanan tam yanıt değerlendirmeleri (questions.evaluation_id ile eşleşir)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS question_evaluations (
+        evaluation_id TEXT PRIMARY KEY,
+        overall_score REAL,
+        quality_level TEXT,
+        relevance_score REAL,
+        completeness_score REAL,
+        accuracy_score REAL,
+        clarity_score REAL,
+        source_support_score REAL,
+        details TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_questions_evaluation ON questions (evaluation_id)")
+    # Toplu denetim sonuçları (batch_evaluation.py) - yaklaşık context ile hesaplandığı için
+    # arka plan değerlendirmelerinden ayrı tutulur, soru başına tek satır
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS question_audits (
+        question_id INTEGER PRIMARY KEY,
+        overall_score REAL,
+        quality_level TEXT,
+        relevance_score REAL,
+        completeness_score REAL,
+        accuracy_score REAL,
+        clarity_score REAL,
+        source_support_score REAL,
+        details TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    _backfill_clusters(c)
+    # Admin paneli için yazım anında güncellenen özet tablolar
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS stats_daily (
+        day TEXT PRIMARY KEY,
+        question_count INTEGER DEFAULT 0,
+        user_count INTEGER DEFAULT 0,
+        session_question_count INTEGER DEFAULT 0,
+        unique_question_count INTEGER DEFAULT 0
+    )
+    """)
+    try:
+        c.execute("ALTER TABLE stats_daily ADD COLUMN unique_question_count INTEGER DEFAULT 0")
+    except sqlite3.OperationalError:
+        pass  # Sütun zaten varsa hata verme
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS stats_sources (
+        source_file TEXT PRIMARY KEY,
+        question_count INTEGER DEFAULT 0
+    )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_stats_sources_count ON stats_sources (question_count DESC)")
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER DEFAULT 0
+    )
+    """)
+    # Soru listeleri için gruplar (normalize soru başına tek satır) - keyset sayfalama
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS question_groups (
+        normalized_question TEXT PRIMARY KEY,
+        question TEXT,
+        answer TEXT,
+        source_file TEXT,
+        topic TEXT,
+        count INTEGER DEFAULT 0,
+        first_asked TIMESTAMP
+    )
+    """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS question_groups_daily (
+        day TEXT NOT NULL,
+        normalized_question TEXT NOT NULL,
+        question TEXT,
+        answer TEXT,
+        source_file TEXT,
+        topic TEXT,
+        count INTEGER DEFAULT 0,
+        first_asked TIMESTAMP,
+        PRIMARY KEY (day, normalized_question)
+    )
+    """)
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_question_groups_rank
+                 ON question_groups (count DESC, first_asked DESC, normalized_question DESC)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_question_groups_daily_rank
+                 ON question_groups_daily (day, count DESC, first_asked DESC, normalized_question DESC)""")
+    if _get_counter(c, "stats_schema") < STATS_SCHEMA:
+        if _get_counter(c, "stats_schema") < 3:
+            # Eski kayıtların günü UTC'ye göre hesaplanmıştı
+            c.execute("UPDATE questions SET created_date = DATE(created_at, 'localtime')")
+        rebuild_stats()
+
+
+def normalize_question(question):
+    """Gruplama anahtarı: Türkçe küçük harf, fazla boşluklar tek boşluk"""
+    return " ".join(fold_case(question or "").split())
+
+
+def _backfill_normalized_columns(c):
+    """Eski kayıtlar için normalized_question / created_date sütunlarını doldur"""
+    c.execute("UPDATE questions SET created_date = DATE(created_at, 'localtime') WHERE created_date IS NULL")
+    c.execute("SELECT id, question FROM questions WHERE normalized_question IS NULL")
+    rows = c.fetchall()
+    if rows:
+        c.executemany(
+            "UPDATE questions SET normalized_question = ? WHERE id = ?",
+            [(normalize_question(question), row_id) for row_id, question in rows],
+        )
+        print(f"🔄 {len(rows)} soru için normalize sütunlar dolduruldu")
+
+
+def _backfill_clusters(c):
+    """Kümesi olmayan eski kayıtları aynı normalize soru üzerinden kümele"""
+    c.execute("""
+        SELECT normalized_question, MAX(topic) FROM questions
+        WHERE cluster_id IS NULL GROUP BY normalized_question
+    """)
+    groups = c.fetchall()
+    if not groups:
+        return
+    for normalized, topic in groups:
+        c.execute("INSERT INTO question_clusters (topic) VALUES (?)", (topic or "genel",))
+        c.execute(
+            "UPDATE questions SET cluster_id = ? WHERE normalized_question = ? AND cluster_id IS NULL",
+            (c.lastrowid, normalized),
+        )
+    _rebuild_cluster_stats(c)
+    print(f"🔄 {len(groups)} soru kümesi oluşturuldu")
+
+
+def _cluster_index_key(c):
+    c.execute("SELECT COUNT(*), MAX(id) FROM question_clusters WHERE centroid IS NOT NULL")
+    return (DB_PATH,) + tuple(c.fetchone())
+
+
+def _ensure_cluster_index(c):
+    """Index'i veritabanındaki küme merkezleriyle eşitle (değişmediyse yükleme yapılmaz)"""
+    key = _cluster_index_key(c)
+    if _cluster_index.loaded_key != key:
+        c.execute("SELECT id, topic, centroid FROM question_clusters WHERE centroid IS NOT NULL")
+        _cluster_index.load(c.fetchall(), key)
+
+
+def _assign_cluster(c, normalized, topic, vector):
+    """Soruyu kümeye ata - aynı normalize soru > en yakın merkez > yeni küme"""
+    c.execute(
+        "SELECT cluster_id FROM questions WHERE normalized_question = ? AND cluster_id IS NOT NULL LIMIT 1",
+        (normalized,),
+    )
+    row = c.fetchone()
+    cluster_id = row[0] if row else None
+
+    with _cluster_index.lock:
+        _ensure_cluster_index(c)
+        if cluster_id is None and vector is not None:
+            nearest_id, similarity = _cluster_index.nearest(topic, vector)
+            if similarity >= config.QUESTION_CLUSTER_THRESHOLD:
+                cluster_id = nearest_id
+
+        if cluster_id is None:
+            c.execute(
+                "INSERT INTO question_clusters (topic, centroid) VALUES (?, ?)",
+                (topic, vector_to_blob(vector)),
+            )
+            cluster_id = c.lastrowid
+            centroid = vector
+        elif vector is not None:
+            # Merkezi yeni vektörle güncelle (normalize ortalama)
+            c.execute("SELECT centroid, count FROM question_clusters WHERE id = ?", (cluster_id,))
+            blob, count = c.fetchone()
+            centroid = blob_to_vector(blob)
+            if centroid is None or centroid.shape != vector.shape:
+                centroid = vector
+            else:
+                centroid = to_vector(centroid * max(count, 1) + vector)
+            c.execute("UPDATE question_clusters SET centroid = ? WHERE id = ?", (vector_to_blob(centroid), cluster_id))
+        else:
+            centroid = None
+
+        if centroid is not None:
+            _cluster_index.upsert(cluster_id, topic, centroid)
+            _cluster_index.loaded_key = _cluster_index_key(c)
+    return cluster_id
+
+
+def _update_cluster_stats(c, cluster_id, normalized, question, answer):
+    """Küme sayacı, varyant sayısı ve temsilci soruyu (en çok sorulan varyant) güncelle"""
+    c.execute(
+        "SELECT COUNT(*) FROM questions WHERE cluster_id = ? AND normalized_question = ?",
+        (cluster_id, normalized),
+    )
+    variant_count = c.fetchone()[0]
+    c.execute("""
+        UPDATE question_clusters SET
+            count = count + 1,
+            variants = variants + (CASE WHEN ? = 1 THEN 1 ELSE 0 END),
+            representative_question = CASE WHEN ? > representative_count THEN ? ELSE representative_question END,
+            representative_answer = CASE WHEN ? > representative_count THEN ? ELSE representative_answer END,
+            representative_count = MAX(representative_count, ?),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, (variant_count, variant_count, question, variant_count, answer, variant_count, cluster_id))
+
+
+def _rebuild_cluster_stats(c):
+    """Soru silme sonrası küme sayaçlarını ve temsilcilerini yeniden hesapla"""
+    c.execute("""
+        SELECT cluster_id, COUNT(*), MAX(id) FROM questions
+        WHERE cluster_id IS NOT NULL GROUP BY cluster_id, normalized_question
+    """)
+    stats = {}
+    for cluster_id, count, last_id in c.fetchall():
+        entry = stats.setdefault(cluster_id, {"count": 0, "variants": 0, "rep_count": 0, "rep_id": None})
+        entry["count"] += count
+        entry["variants"] += 1
+        if count > entry["rep_count"]:
+            entry["rep_count"] = count
+            entry["rep_id"] = last_id
+    c.execute("DELETE FROM question_clusters WHERE id NOT IN (SELECT DISTINCT cluster_id FROM questions WHERE cluster_id IS NOT NULL)")
+    c.executemany("""
+        UPDATE question_clusters SET
+            count = ?, variants = ?, representative_count = ?,
+            representative_question = (SELECT question FROM questions WHERE id = ?),
+            representative_answer = (SELECT answer FROM questions WHERE id = ?)
+        WHERE id = ?
+    """, [
+        (entry["count"], entry["variants"], entry["rep_count"], entry["rep_id"], entry["rep_id"], cluster_id)
+        for cluster_id, entry in stats.items()
+    ])
+    _cluster_index.clear()
+
+def _increment_counter(c, name, amount=1):
+    c.execute("""
+        INSERT INTO stats_counters (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+    """, (name, amount))
+
+
+def _get_counter(c, name):
+    c.execute("SELECT value FROM stats_counters WHERE name = ?", (name,))
+    row = c.fetchone()
+    return row[0] if row else 0
+
+
+def _upsert_question_group(c, table, key_columns, key_values, question, answer, source_file, topic, created_at):
+    """Grup satırını ekle/güncelle - yeni grup oluştuysa True
+
+    Gösterilen soru/yanıt/kaynak/konu en son kayıttan gelir (rebuild_stats'taki MAX(id) ile aynı kural).
+    """
+    columns = ", ".join(key_columns)
+    placeholders = ", ".join("?" for _ in key_columns)
+    c.execute(f"""
+        INSERT OR IGNORE INTO {table} ({columns}, count, first_asked)
+        VALUES ({placeholders}, 0, ?)
+    """, (*key_values, created_at))
+    created = c.rowcount == 1
+    conditions = " AND ".join(f"{column} = ?" for column in key_columns)
+    c.execute(f"""
+        UPDATE {table} SET count = count + 1, question = ?, answer = ?, source_file = ?, topic = ?
+        WHERE {conditions}
+    """, (question, answer, source_file, topic, *key_values))
+    return created
+
+
+def _record_question_stats(c, question_id, normalized, question, answer, source_file, topic):
+    """add_question ile aynı transaction'da özet tabloları ve soru gruplarını güncelle"""
+    c.execute("SELECT created_at, created_date FROM questions WHERE id = ?", (question_id,))
+    created_at, day = c.fetchone()
+    new_group = _upsert_question_group(
+        c, "question_groups", ("normalized_question",), (normalized,),
+        question, answer, source_file, topic, created_at,
+    )
+    new_daily_group = _upsert_question_group(
+        c, "question_groups_daily", ("day", "normalized_question"), (day, normalized),
+        question, answer, source_file, topic, created_at,
+    )
+    c.execute("""
+        INSERT INTO stats_daily (day, question_count, unique_question_count) VALUES (?, 1, ?)
+        ON CONFLICT(day) DO UPDATE SET
+            question_count = question_count + 1,
+            unique_question_count = unique_question_count + excluded.unique_question_count
+    """, (day, 1 if new_daily_group else 0))
+    if source_file:
+        c.execute("""
+            INSERT INTO stats_sources (source_file, question_count) VALUES (?, 1)
+            ON CONFLICT(source_file) DO UPDATE SET question_count = question_count + 1
+        """, (source_file,))
+    if new_group:
+        _increment_counter(c, "question_groups")
+    _increment_counter(c, "total_questions")
+    _increment_counter(c, "version")
+
+
+def rebuild_stats():
+    """Özet tabloları ana tablolardan yeniden hesapla (silme/temizlik sonrası)"""
+    with transaction() as c:
+        c.execute("DELETE FROM stats_daily")
+        c.execute("DELETE FROM stats_sources")
+        c.execute("DELETE FROM question_groups")
+        c.execute("DELETE FROM question_groups_daily")
+        # Gösterilen soru/yanıt/kaynak/konu yazma yolundaki gibi en son kayıttan (MAX(id)) gelir
+        c.execute("""
+            INSERT INTO question_groups (normalized_question, question, answer, source_file, topic, count, first_asked)
+            SELECT g.normalized_question, q.question, q.answer, q.source_file, q.topic, g.count, g.first_asked
+            FROM (
+                SELECT normalized_question, COUNT(*) AS count, MIN(created_at) AS first_asked, MAX(id) AS last_id
+                FROM questions WHERE normalized_question IS NOT NULL GROUP BY normalized_question
+            ) g
+            JOIN questions q ON q.id = g.last_id
+        """)
+        c.execute("""
+            INSERT INTO question_groups_daily (day, normalized_question, question, answer, source_file, topic, count, first_asked)
+            SELECT g.day, g.normalized_question, q.question, q.answer, q.source_file, q.topic, g.count, g.first_asked
+            FROM (
+                SELECT created_date AS day, normalized_question, COUNT(*) AS count,
+                       MIN(created_at) AS first_asked, MAX(id) AS last_id
+                FROM questions WHERE normalized_question IS NOT NULL AND created_date IS NOT NULL
+                GROUP BY created_date, normalized_question
+            ) g
+            JOIN questions q ON q.id = g.last_id
+        """)
+        c.execute("""
+            INSERT INTO stats_daily (day, question_count, unique_question_count)
+            SELECT created_date, COUNT(*), COUNT(DISTINCT normalized_question) FROM questions
+            WHERE created_date IS NOT NULL GROUP BY created_date
+        """)
+        c.execute("""
+            INSERT INTO stats_daily (day, user_count, session_question_count)
+            SELECT session_date, COUNT(DISTINCT user_id), COALESCE(SUM(total_questions), 0)
+            FROM user_sessions WHERE 1 GROUP BY session_date
+            ON CONFLICT(day) DO UPDATE SET
+                user_count = excluded.user_count,
+                session_question_count = excluded.session_question_count
+        """)
+        c.execute("""
+            INSERT INTO stats_sources (source_file, question_count)
+            SELECT source_file, COUNT(*) FROM questions
+            WHERE source_file IS NOT NULL AND source_file != '' GROUP BY source_file
+        """)
+        c.execute("SELECT COUNT(*) FROM questions")
+        total_questions = c.fetchone()[0]
+        c.execute("SELECT COUNT(*) FROM question_groups")
+        question_groups = c.fetchone()[0]
+        c.execute("SELECT COUNT(DISTINCT user_id), COUNT(*) FROM user_sessions")
+        total_users, total_entries = c.fetchone()
+        c.executemany(
+            "INSERT OR REPLACE INTO stats_counters (name, value) VALUES (?, ?)",
+            [
+                ("total_questions", total_questions),
+                ("question_groups", question_groups),
+                ("total_users", total_users),
+                ("total_entries", total_entries),
+                ("stats_schema", STATS_SCHEMA),
+            ],
+        )
+        _increment_counter(c, "version")
+
+
+def get_stats_version():
+    """Özet istatistikler her değiştiğinde artan sayaç (ETag için)"""
+    with transaction() as c:
+        return _get_counter(c, "version")
+
 
 def detect_topic(question):
     """Sorudan topic/konu tespit et"""
-    question_lower = question.lower()
-    
-    # Konu tespit kuralları
-    topics = {
-        "bilgisayar_laboratuvari": ["bilgisayar laboratuvar", "lab", "laboratuvar", "sınav", "su getir", "yiyecek", "içecek"],
-        "eduroam": ["eduroam", "wifi", "internet", "bağlantı", "şifre", "parola", "android", "eap", "phase"],
-        "sinav_kurallari": ["sınav", "kurall", "yapılacak", "yasaklı", "izin"],
-        "kimlik_belgesi": ["kimlik", "belge", "öğrenci kart", "tc kimlik"],
-        "kayit_isleri": ["kayıt", "ders", "kredi", "not", "transkript"],
-        "yemek": ["yemek", "kafeterya", "mensa", "beslenme"],
-        "konaklama": ["yurt", "barınma", "konaklama", "ev"],
-        "ulasim": ["otobüs", "ulaşım", "servis", "ring"],
-        "burs": ["burs", "kredi", "öğrenim", "ücret"],
-        "ogrenci_isleri": ["öğrenci işleri", "işlem", "başvuru", "belge"]
-    }
-    
-    for topic, keywords in topics.items():
-        for keyword in keywords:
-            if keyword in question_lower:
-                return topic
-    
-    return "genel"
+    return first_rule_match(match_terms(question), "topic", TOPIC_RULES) or "genel"
+
+def add_question(question, answer=None, source_file=None, source_keyword=None, topic=None, embedding=None,
+                 created_at=None, evaluation_id=None):
+    """Soru ekle - topic otomatik tespit
 
-def add_question(question, answer=None, source_file=None, source_keyword=None, topic=None):
-    """Soru ekle - topic otomatik tespit"""
+    embedding: retriever'ın bu soru için hesapladığı vektör; soru en yakın
+    kümeye atanır ve küme sayaçları aynı transaction'da güncellenir.
+    created_at: UTC "YYYY-MM-DD HH:MM:SS" (kuyruktan gelen olaylarda sorulma anı);
+    created_date bunun yerel günüdür
+    evaluation_id: arka plandaki tam değerlendirmenin anahtarı (question_evaluations)
+    """
     if not topic:
         topic = detect_topic(question)
+    normalized = normalize_question(question)
+    vector = to_vector(embedding)
     
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT INTO questions (question, answer, source_file, source_keyword, topic) VALUES (?, ?, ?, ?, ?)", 
-              (question, answer, source_file, source_keyword, topic))
-    qid = c.lastrowid
-    conn.commit()
-    conn.close()
+    try:
+        with transaction() as c:
+            cluster_id = _assign_cluster(c, normalized, topic, vector)
+            c.execute("""
+                INSERT INTO questions (question, answer, source_file, source_keyword, topic,
+                                       normalized_question, created_at, created_date, embedding, cluster_id,
+                                       evaluation_id)
+                VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), DATE(COALESCE(?, 'now'), 'localtime'), ?, ?, ?)
+            """, (question, answer, source_file, source_keyword, topic,
+                  normalized, created_at, created_at, vector_to_blob(vector), cluster_id, evaluation_id))
+            qid = c.lastrowid
+            _update_cluster_stats(c, cluster_id, normalized, question, answer)
+            _record_question_stats(c, qid, normalized, question, answer, source_file, topic)
+    except Exception:
+        _cluster_index.clear()  # Geri alınan merkez güncellemeleri index'te kalmasın
+        raise
     return qid
 
 def add_question_source(question_id, source_file):
     if not source_file or not isinstance(source_file, str) or not source_file.strip():
         return  # Boş veya geçersiz kaynak eklenmesin
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
     try:
-        c.execute("INSERT OR IGNORE INTO question_sources (question_id, source_file) VALUES (?, ?)", (question_id, source_file))
-        conn.commit()
+        with transaction() as c:
+            c.execute("INSERT OR IGNORE INTO question_sources (question_id, source_file) VALUES (?, ?)", (question_id, source_file))
     except Exception as e:
         print(f"⚠️ add_question_source hatası: {e}")
-    finally:
-        conn.close()
 
 def add_similarity(qid1, qid2, similarity):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT INTO question_similarity (question_id_1, question_id_2, similarity) VALUES (?, ?, ?)", (qid1, qid2, similarity))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("INSERT INTO question_similarity (question_id_1, question_id_2, similarity) VALUES (?, ?, ?)", (qid1, qid2, similarity))
+
+EVALUATION_SCORE_COLUMNS = (
+    "overall_score", "relevance_score", "completeness_score",
+    "accuracy_score", "clarity_score", "source_support_score",
+)
+
+def _save_evaluation_row(c, table, key_column, key_value, evaluation):
+    """Değerlendirme satırını yaz - skorlar sütunlarda, kalan alanlar JSON"""
+    details = {
+        key: value for key, value in evaluation.items()
+        if key not in EVALUATION_SCORE_COLUMNS and key != "quality_level"
+    }
+    c.execute(f"""
+        INSERT OR REPLACE INTO {table}
+            ({key_column}, quality_level, {", ".join(EVALUATION_SCORE_COLUMNS)}, details)
+        VALUES (?, ?, {", ".join("?" for _ in EVALUATION_SCORE_COLUMNS)}, ?)
+    """, (key_value, evaluation.get("quality_level"),
+          *(evaluation.get(column) for column in EVALUATION_SCORE_COLUMNS),
+          json.dumps(details, ensure_ascii=False)))
+
+def save_evaluation(evaluation_id, evaluation):
+    """Tam yanıt değerlendirmesini kaydet - skorlar sütunlarda, kalan alanlar JSON"""
+    with transaction() as c:
+        _save_evaluation_row(c, "question_evaluations", "evaluation_id", evaluation_id, evaluation)
+
+def save_audit_evaluations(rows):
+    """Toplu denetim sonuçlarını tek transaction'da question_audits'e yaz
+
+    rows: (soru id, değerlendirme). Sorunun önceki denetim sonucu değişir;
+    arka plan değerlendirmeleri (question_evaluations) hiç değiştirilmez.
+    """
+    with transaction() as c:
+        for question_id, evaluation in rows:
+            _save_evaluation_row(c, "question_audits", "question_id", question_id, evaluation)
+
+def get_questions_for_audit(after_id=0, limit=1000, only_missing=True):
+    """Denetlenecek sorular (id sırasıyla) - only_missing ise hiç değerlendirmesi olmayanlar
+
+    Dönüş: (id, soru, yanıt, kaynak dosya) satırları; sonraki sayfa için son
+    satırın id'si after_id olarak verilir.
+    """
+    query = """
+        SELECT q.id, q.question, q.answer, q.source_file
+        FROM questions q
+        WHERE q.id > ?
+    """
+    if only_missing:
+        query += """
+          AND NOT EXISTS (SELECT 1 FROM question_audits a WHERE a.question_id = q.id)
+          AND NOT EXISTS (
+              SELECT 1 FROM question_evaluations e WHERE e.evaluation_id = q.evaluation_id
+          )
+        """
+    query += " ORDER BY q.id LIMIT ?"
+    with transaction() as c:
+        c.execute(query, (after_id, limit))
+        return c.fetchall()
+
+def get_evaluation_summary(audit=False):
+    """Kaydedilmiş değerlendirmelerin ortalama skorları ve kalite seviyesi dağılımı
+
+    audit=True ise arka plan değerlendirmeleri yerine toplu denetim sonuçları özetlenir.
+    """
+    table = "question_audits" if audit else "question_evaluations"
+    with transaction() as c:
+        c.execute(f"""
+            SELECT COUNT(*), {", ".join(f"AVG({column})" for column in EVALUATION_SCORE_COLUMNS)}
+            FROM {table}
+        """)
+        row = c.fetchone()
+        c.execute(f"""
+            SELECT quality_level, COUNT(*) FROM {table}
+            GROUP BY quality_level ORDER BY COUNT(*) DESC
+        """)
+        levels = dict(c.fetchall())
+    return {
+        "total": row[0],
+        "averages": {
+            column: round(value, 3) if value is not None else None
+            for column, value in zip(EVALUATION_SCORE_COLUMNS, row[1:])
+        },
+        "quality_levels": levels,
+    }
+
+def get_recent_evaluations(limit=20, max_score=None):
+    """Değerlendirmesi tamamlanmış son sorular (max_score verilirse sadece düşük skorlular)"""
+    query = """
+        SELECT q.question, q.answer, q.source_file, q.created_at,
+               e.overall_score, e.quality_level, e.details
+        FROM question_evaluations e
+        JOIN questions q ON q.evaluation_id = e.evaluation_id
+    """
+    params = []
+    if max_score is not None:
+        query += " WHERE e.overall_score <= ?"
+        params.append(max_score)
+    query += " ORDER BY e.created_at DESC LIMIT ?"
+    params.append(limit)
+    with transaction() as c:
+        c.execute(query, params)
+        return [
+            {
+                "question": question,
+                "answer": answer,
+                "source_file": source_file,
+                "created_at": created_at,
+                "overall_score": overall_score,
+                "quality_level": quality_level,
+                "details": json.loads(details) if details else {},
+            }
+            for question, answer, source_file, created_at, overall_score, quality_level, details in c.fetchall()
+        ]
 
 def get_total_questions():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM questions")
-    total = c.fetchone()[0]
-    conn.close()
-    return total
+    with transaction() as c:
+        return _get_counter(c, "total_questions")
 
 def clear_all_questions():
     """Tüm soruları ve ilişkili verileri siler"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM question_similarity")
-    c.execute("DELETE FROM question_sources")
-    c.execute("DELETE FROM questions")
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("DELETE FROM question_similarity")
+        c.execute("DELETE FROM question_sources")
+        c.execute("DELETE FROM questions")
+        c.execute("DELETE FROM question_clusters")
+        c.execute("DELETE FROM question_evaluations")
+        c.execute("DELETE FROM question_audits")
+        rebuild_stats()
+    _cluster_index.clear()
     print("✅ Tüm sorular temizlendi")
 
 def clear_questions_by_period(period_type="all"):
     """Soruları dönem bazında temizle"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    if period_type == "today":
-        c.execute("DELETE FROM questions WHERE DATE(created_at) = DATE('now')")
-        c.execute("DELETE FROM user_sessions WHERE session_date = DATE('now')")
-    elif period_type == "all":
-        c.execute("DELETE FROM questions")
-        c.execute("DELETE FROM user_sessions")
-        c.execute("DELETE FROM question_sources")
-        c.execute("DELETE FROM question_similarity")
-    
-    conn.commit()
-    affected_rows = c.rowcount
-    conn.close()
+    with transaction() as c:
+        if period_type == "today":
+            c.execute("""
+                DELETE FROM question_evaluations WHERE evaluation_id IN (
+                    SELECT evaluation_id FROM questions WHERE created_date = DATE('now', 'localtime')
+                )
+            """)
+            c.execute("""
+                DELETE FROM question_audits WHERE question_id IN (
+                    SELECT id FROM questions WHERE created_date = DATE('now', 'localtime')
+                )
+            """)
+            c.execute("DELETE FROM questions WHERE created_date = DATE('now', 'localtime')")
+            _rebuild_cluster_stats(c)
+            c.execute("DELETE FROM user_sessions WHERE session_date = DATE('now', 'localtime')")
+        elif period_type == "all":
+            c.execute("DELETE FROM questions")
+            c.execute("DELETE FROM user_sessions")
+            c.execute("DELETE FROM question_sources")
+            c.execute("DELETE FROM question_clusters")
+            c.execute("DELETE FROM question_evaluations")
+            c.execute("DELETE FROM question_audits")
+            c.execute("DELETE FROM question_similarity")
+            _cluster_index.clear()
+        affected_rows = c.rowcount
+        rebuild_stats()
     return affected_rows
 
+def get_daily_question_count(day=None):
+    """Verilen gündeki (varsayılan bugün) soru sayısı"""
+    day = day or datetime.now().strftime('%Y-%m-%d')
+    with transaction() as c:
+        c.execute("SELECT question_count FROM stats_daily WHERE day = ?", (day,))
+        row = c.fetchone()
+        return row[0] if row else 0
+
 def get_total_unique_questions():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(DISTINCT question) FROM questions")
-    total = c.fetchone()[0]
-    conn.close()
-    return total
+    with transaction() as c:
+        c.execute("SELECT COUNT(DISTINCT question) FROM questions")
+        return c.fetchone()[0]
+
+_corpus_store = None
+# (corpus versiyonu, dosya adı -> anahtar kelime) - ingest/silme/anahtar kelime değişince yenilenir
+_file_keywords_cache = (None, {})
+
+
+def _get_corpus_store():
+    global _corpus_store
+    if _corpus_store is None:
+        _corpus_store = CorpusStore()
+    return _corpus_store
 
 def get_available_filenames():
-    """Mevcut dosya isimlerini enhanced_document_data.json'dan al"""
+    """Mevcut dosya isimlerini corpus store'dan al"""
     try:
-        with open("enhanced_document_data.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return [item["filename"] for item in data]
+        return _get_corpus_store().list_filenames()
     except Exception as e:
-        print(f"Enhanced document data okunamadı: {e}")
+        print(f"Corpus store okunamadı: {e}")
         return []
 
+def get_file_keywords():
+    """Dosya adı -> anahtar kelime eşlemesi (corpus versiyonu değişene kadar bellekten)"""
+    global _file_keywords_cache
+    try:
+        store = _get_corpus_store()
+        version = store.get_version()
+        cached_version, keywords = _file_keywords_cache
+        if cached_version != version:
+            keywords = store.get_keywords()
+            _file_keywords_cache = (version, keywords)
+        return keywords
+    except Exception as e:
+        print(f"Corpus store okunamadı: {e}")
+        return {}
+
+def get_corpus_version():
+    """Corpus store versiyonu (okunamazsa -1)"""
+    try:
+        return _get_corpus_store().get_version()
+    except Exception as e:
+        print(f"Corpus store okunamadı: {e}")
+        return -1
+
+def sync_with_corpus():
+    """Corpus store değiştiyse eski kaynak kayıtlarını temizle ve anahtar kelimeleri güncelle
+
+    Her istatistik isteğinde değil, sadece doküman listesi/anahtar kelimeler
+    değiştiğinde çalışır.
+    """
+    corpus_version = get_corpus_version()
+    with transaction() as c:
+        if corpus_version < 0 or _get_counter(c, "corpus_version") == corpus_version:
+            return
+    clean_obsolete_sources()
+    with transaction() as c:
+        c.execute(
+            "INSERT OR REPLACE INTO stats_counters (name, value) VALUES ('corpus_version', ?)",
+            (corpus_version,),
+        )
+
 def get_top_sources(limit=5):
     """Sadece mevcut dosyalardan en çok kullanılan kaynakları al - aynı dosya için tek kayıt"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
     # Mevcut dosya isimlerini al
     available_files = get_available_filenames()
     
     if not available_files:
-        conn.close()
         return [("(Hiç kaynak kullanılmadı)", "", 0)]
     
-    # Enhanced document data'dan anahtar kelimeleri al
-    try:
-        with open("enhanced_document_data.json", "r", encoding="utf-8") as f:
-            document_data = json.load(f)
-            file_keywords = {item["filename"]: item.get("keyword", "") for item in document_data}
-    except Exception as e:
-        print(f"Enhanced document data okunamadı: {e}")
-        file_keywords = {}
-    
-    # Placeholder'ları oluştur
-    placeholders = ','.join(['?' for _ in available_files])
+    # Corpus store'dan anahtar kelimeleri al
+    file_keywords = get_file_keywords()
     
-    # Her dosya için toplam kullanım sayısını al (source_keyword'e bakmadan)
-    c.execute(f"""
-    SELECT source_file, COUNT(*) as cnt
-    FROM questions
-    WHERE source_file IS NOT NULL AND source_file != ''
-    AND source_file IN ({placeholders})
-    GROUP BY source_file
-    ORDER BY cnt DESC
-    LIMIT ?
-    """, available_files + [limit])
-    
-    results = c.fetchall()
-    conn.close()
+    # Dosya başına kullanım sayıları özet tablodan (sayıya göre index'li) okunur,
+    # mevcut olmayan dosyalar burada elenir
+    available = set(available_files)
+    results = []
+    with transaction() as c:
+        c.execute("SELECT source_file, question_count FROM stats_sources ORDER BY question_count DESC")
+        for source_file, count in c:
+            if source_file in available:
+                results.append((source_file, count))
+                if len(results) >= limit:
+                    break
     
     if not results:
         return [("(Hiç kaynak kullanılmadı)", "", 0)]
     
-    # Sonuçları enhanced_document_data.json'dan gelen anahtar kelimelerle birleştir
+    # Sonuçları corpus store'dan gelen anahtar kelimelerle birleştir
     final_results = []
     for source_file, count in results:
         keyword = file_keywords.get(source_file, "")
@@ -222,151 +851,83 @@ def get_top_sources(limit=5):
     return final_results
 
 def get_top_questions_by_similarity(limit=5):
-    """Benzer soruları gruplar ve en çok sorulan grupları döndürür"""
-    import difflib
-    from collections import defaultdict
-    
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Tüm soruları ve cevaplarını al
-    c.execute("SELECT question, answer, COUNT(*) as cnt FROM questions GROUP BY question, answer")
-    all_questions = c.fetchall()
-    conn.close()
-    
-    if not all_questions:
-        return []
-    
-    # Benzer soruları grupla
-    question_groups = defaultdict(list)
-    processed = set()
-    
-    for i, (question, answer, count) in enumerate(all_questions):
-        if i in processed:
-            continue
-            
-        # Bu soru için grup oluştur
-        group_key = question.lower().strip()
-        group_questions = [(question, answer, count)]
-        processed.add(i)
-        
-        # Diğer sorularla benzerlik kontrolü
-        for j, (other_question, other_answer, other_count) in enumerate(all_questions):
-            if j in processed or i == j:
-                continue
-                
-            # Benzerlik oranını hesapla
-            similarity = difflib.SequenceMatcher(
-                None, 
-                question.lower().strip(), 
-                other_question.lower().strip()
-            ).ratio()
-            
-            # %75 ve üzeri benzerlik varsa aynı grup
-            if similarity >= 0.75:
-                group_questions.append((other_question, other_answer, other_count))
-                processed.add(j)
-        
-        # Grup toplamını hesapla
-        total_count = sum(q[2] for q in group_questions)
-        
-        # En çok sorulan soruyu temsil edici olarak seç
-        representative = max(group_questions, key=lambda x: x[2])
-        
-        question_groups[group_key] = {
-            'question': representative[0],
-            'answer': representative[1], 
-            'count': total_count,
-            'variants': len(group_questions)
-        }
-    
-    # Sayıya göre sırala ve limit kadar al
-    sorted_groups = sorted(
-        question_groups.values(), 
-        key=lambda x: x['count'], 
-        reverse=True
-    )
-    
-    return [(g['question'], g['answer'], g['count']) for g in sorted_groups[:limit]]
+    """Benzer soru kümelerinden en çok sorulanları döndürür (temsilci soru, cevap, toplam)"""
+    with transaction() as c:
+        c.execute("""
+            SELECT representative_question, representative_answer, count
+            FROM question_clusters
+            WHERE count > 0
+            ORDER BY count DESC
+            LIMIT ?
+        """, (limit,))
+        return c.fetchall()
 
-def track_user_session(user_id, question_asked=False):
-    """Kullanıcı oturumunu takip et"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    today = datetime.now().date()
+def track_user_session(user_id, question_asked=False, day=None, raise_errors=False):
+    """Kullanıcı oturumunu takip et
+
+    question_asked: bool veya (toplu yazımda) bu oturuma eklenecek soru sayısı
+    day: oturum günü, yerel saat (varsayılan bugün) - kuyruktan gelen olaylarda olay anının günü
+    raise_errors: hatayı yutmadan yükselt - dıştaki bir transaction içinde çağrılırken
+    gerekli, aksi halde yarım kalan yazım dış transaction ile commit edilir
+    """
+    day = day or datetime.now().date().isoformat()
+    asked = int(question_asked)
     
     try:
-        # Bugün için session var mı kontrol et
-        c.execute("""
-            SELECT id, total_questions FROM user_sessions 
-            WHERE user_id = ? AND session_date = ?
-        """, (user_id, today))
-        
-        result = c.fetchone()
-        
-        if result:
-            # Mevcut session'ı güncelle
-            session_id, current_questions = result
-            new_question_count = current_questions + (1 if question_asked else 0)
-            
-            c.execute("""
-                UPDATE user_sessions 
-                SET last_activity = CURRENT_TIMESTAMP, total_questions = ?
-                WHERE id = ?
-            """, (new_question_count, session_id))
-        else:
-            # Yeni session oluştur
+        # Session ve özet tablolar tek transaction'da güncellenir
+        with transaction() as c:
+            # None: yeni kullanıcı, 0: bugün ilk oturum, 1: bugünkü oturum mevcut
+            c.execute("SELECT MAX(session_date = ?) FROM user_sessions WHERE user_id = ?", (day, user_id))
+            existing = c.fetchone()[0]
+            new_session = not existing
             c.execute("""
                 INSERT INTO user_sessions (user_id, session_date, total_questions)
                 VALUES (?, ?, ?)
-            """, (user_id, today, 1 if question_asked else 0))
-        
-        conn.commit()
+                ON CONFLICT(user_id, session_date) DO UPDATE SET
+                    last_activity = CURRENT_TIMESTAMP,
+                    total_questions = total_questions + excluded.total_questions
+            """, (user_id, day, asked))
+            if new_session or asked:
+                c.execute("""
+                    INSERT INTO stats_daily (day, user_count, session_question_count) VALUES (?, ?, ?)
+                    ON CONFLICT(day) DO UPDATE SET
+                        user_count = user_count + excluded.user_count,
+                        session_question_count = session_question_count + excluded.session_question_count
+                """, (day, 1 if new_session else 0, asked))
+                if new_session:
+                    _increment_counter(c, "total_entries")
+                if existing is None:
+                    _increment_counter(c, "total_users")
+                _increment_counter(c, "version")
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Session tracking hatası: {e}")
-    finally:
-        conn.close()
 
 def get_daily_user_stats():
     """Günlük kullanıcı istatistiklerini getir"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    c = get_connection().cursor()
     
     try:
-        # Bugünkü aktif kullanıcı sayısı
+        # Bugünkü aktif kullanıcı ve soru sayısı (özet tablo)
         c.execute("""
-            SELECT COUNT(DISTINCT user_id) as daily_users
-            FROM user_sessions 
-            WHERE session_date = date('now')
+            SELECT user_count, session_question_count FROM stats_daily
+            WHERE day = date('now', 'localtime')
         """)
-        daily_users = c.fetchone()[0] or 0
+        row = c.fetchone()
+        daily_users, daily_questions = (row[0] or 0, row[1] or 0) if row else (0, 0)
         
         # Toplam benzersiz kullanıcı sayısı
-        c.execute("""
-            SELECT COUNT(DISTINCT user_id) as total_users
-            FROM user_sessions
-        """)
-        total_users = c.fetchone()[0] or 0
+        total_users = _get_counter(c, "total_users")
         
         # Son 7 günlük aktivite
         c.execute("""
-            SELECT session_date, COUNT(DISTINCT user_id) as user_count
-            FROM user_sessions 
-            WHERE session_date >= date('now', '-7 days')
-            GROUP BY session_date 
-            ORDER BY session_date DESC
+            SELECT day, user_count FROM stats_daily
+            WHERE day >= date('now', 'localtime', '-7 days') AND user_count > 0
+            ORDER BY day DESC
         """)
         weekly_activity = c.fetchall()
         
-        # Bugünkü toplam soru sayısı
-        c.execute("""
-            SELECT SUM(total_questions) as daily_questions
-            FROM user_sessions 
-            WHERE session_date = date('now')
-        """)
-        daily_questions = c.fetchone()[0] or 0
-        
         return {
             'daily_users': daily_users,
             'total_users': total_users,
@@ -382,98 +943,43 @@ def get_daily_user_stats():
             'weekly_activity': []
         }
     finally:
-        conn.close()
+        c.close()
 
 def get_total_entry_count():
     """Toplam giriş sayısını getir"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    c = get_connection().cursor()
     
     try:
-        c.execute("SELECT COUNT(*) as total_entries FROM user_sessions")
-        result = c.fetchone()
-        return result[0] if result else 0
+        return _get_counter(c, "total_entries")
     except Exception as e:
         print(f"Toplam giriş sayısı hatası: {e}")
         return 0
     finally:
-        conn.close()
+        c.close()
 
 def get_top_questions_with_topics(limit=5):
-    """Topic'lere göre gruplandırılmış en çok sorulan soruları döndürür"""
-    import difflib
-    from collections import defaultdict
-    
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Tüm soruları topic ile birlikte al
-    c.execute("SELECT question, answer, topic, COUNT(*) as cnt FROM questions GROUP BY question, answer, topic")
-    all_questions = c.fetchall()
-    conn.close()
-    
-    if not all_questions:
-        return []
-    
-    # Topic'lere göre grupla
-    topic_groups = defaultdict(list)
+    """Topic içi benzer soru kümelerinden en çok sorulanları döndürür"""
+    with transaction() as c:
+        c.execute("""
+            SELECT representative_question, representative_answer, count, topic, variants
+            FROM question_clusters
+            WHERE count > 0
+            ORDER BY count DESC
+            LIMIT ?
+        """, (limit,))
+        rows = c.fetchall()
     
-    for question, answer, topic, count in all_questions:
+    results = []
+    for question, answer, count, topic, variants in rows:
         topic = topic or "genel"
-        topic_groups[topic].append((question, answer, count))
-    
-    # Her topic için benzer soruları grupla
-    final_results = []
-    
-    for topic, questions in topic_groups.items():
-        if not questions:
-            continue
-            
-        # Bu topic içinde benzer soruları grupla
-        processed = set()
-        grouped_questions = []
-        
-        for i, (question, answer, count) in enumerate(questions):
-            if i in processed:
-                continue
-                
-            group_questions = [(question, answer, count)]
-            processed.add(i)
-            
-            # Aynı topic içindeki diğer sorularla benzerlik kontrolü
-            for j, (other_question, other_answer, other_count) in enumerate(questions):
-                if j in processed or i == j:
-                    continue
-                
-                similarity = difflib.SequenceMatcher(
-                    None, 
-                    question.lower().strip(), 
-                    other_question.lower().strip()
-                ).ratio()
-                
-                if similarity >= 0.7:  # %70 benzerlik
-                    group_questions.append((other_question, other_answer, other_count))
-                    processed.add(j)
-            
-            # Grup toplamını hesapla
-            total_count = sum(q[2] for q in group_questions)
-            
-            # En çok sorulan soruyu temsil edici seç
-            representative = max(group_questions, key=lambda x: x[2])
-            
-            grouped_questions.append({
-                'question': f"[{topic.replace('_', ' ').title()}] {representative[0]}",
-                'answer': representative[1],
-                'count': total_count,
-                'topic': topic,
-                'variants': len(group_questions)
-            })
-        
-        final_results.extend(grouped_questions)
-    
-    # Sayıya göre sırala ve limit kadar al
-    final_results.sort(key=lambda x: x['count'], reverse=True)
-    return final_results[:limit]
+        results.append({
+            'question': f"[{topic.replace('_', ' ').title()}] {question}",
+            'answer': answer,
+            'count': count,
+            'topic': topic,
+            'variants': variants
+        })
+    return results
 
 def clean_obsolete_sources():
     """Artık mevcut olmayan dosyalara ait kayıtları temizle ve anahtar kelimeleri güncelle"""
@@ -484,37 +990,39 @@ def clean_obsolete_sources():
             print("Mevcut dosya bulunamadı, temizlik yapılmıyor.")
             return
             
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        
-        # Mevcut olmayan kaynak dosyalarına sahip kayıtları bul
-        placeholders = ','.join(['?' for _ in available_files])
-        c.execute(f"""
-        SELECT COUNT(*) FROM questions 
-        WHERE source_file IS NOT NULL 
-        AND source_file != '' 
-        AND source_file NOT IN ({placeholders})
-        """, available_files)
-        
-        obsolete_count = c.fetchone()[0]
-        
-        if obsolete_count > 0:
-            print(f"Temizlenecek eski kayıt sayısı: {obsolete_count}")
-            
-            # Eski kayıtları sil
-            c.execute(f"""
-            DELETE FROM questions 
-            WHERE source_file IS NOT NULL 
-            AND source_file != '' 
-            AND source_file NOT IN ({placeholders})
-            """, available_files)
-            
-            conn.commit()
-            print(f"{obsolete_count} eski kayıt temizlendi.")
-        else:
-            print("Temizlenecek eski kayıt bulunamadı.")
+        # Kayıtlı kaynak dosyaları index üzerinden al, silinecekleri burada belirle
+        available = set(available_files)
+        with transaction() as c:
+            c.execute("""
+            SELECT source_file, COUNT(*) FROM questions 
+            WHERE source_file IS NOT NULL AND source_file != '' 
+            GROUP BY source_file
+            """)
+            obsolete = [(source_file, count) for source_file, count in c.fetchall() if source_file not in available]
+            obsolete_count = sum(count for _, count in obsolete)
             
-        conn.close()
+            if obsolete_count > 0:
+                print(f"Temizlenecek eski kayıt sayısı: {obsolete_count}")
+                
+                # Eski kayıtları sil
+                obsolete_files = [(source_file,) for source_file, _ in obsolete]
+                c.executemany("""
+                    DELETE FROM question_evaluations WHERE evaluation_id IN (
+                        SELECT evaluation_id FROM questions WHERE source_file = ?
+                    )
+                """, obsolete_files)
+                c.executemany("""
+                    DELETE FROM question_audits WHERE question_id IN (
+                        SELECT id FROM questions WHERE source_file = ?
+                    )
+                """, obsolete_files)
+                c.executemany("DELETE FROM questions WHERE source_file = ?", obsolete_files)
+                _rebuild_cluster_stats(c)
+                rebuild_stats()
+                
+                print(f"{obsolete_count} eski kayıt temizlendi.")
+            else:
+                print("Temizlenecek eski kayıt bulunamadı.")
         
         # Anahtar kelimeleri güncelle
         update_missing_keywords()
@@ -523,32 +1031,23 @@ def clean_obsolete_sources():
         print(f"Eski kayıt temizlenirken hata: {e}")
 
 def update_missing_keywords():
-    """Eksik anahtar kelimeleri enhanced_document_data.json'dan güncelle"""
+    """Eksik anahtar kelimeleri corpus store'dan güncelle"""
     try:
-        # Enhanced document data'dan anahtar kelimeleri al
-        with open("enhanced_document_data.json", "r", encoding="utf-8") as f:
-            document_data = json.load(f)
-            file_keywords = {item["filename"]: item.get("keyword", "") for item in document_data}
-        
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
+        # Corpus store'dan anahtar kelimeleri al
+        file_keywords = get_file_keywords()
         
+        # Boş anahtar kelimeli kayıtları tek transaction'da, tek derlenmiş ifadeyle güncelle
+        params = [(keyword, filename) for filename, keyword in file_keywords.items() if keyword]
         updated_count = 0
-        
-        for filename, keyword in file_keywords.items():
-            if keyword:  # Anahtar kelime varsa
-                # Bu dosya için boş anahtar kelimeli kayıtları güncelle
-                c.execute("""
+        if params:
+            with transaction() as c:
+                c.executemany("""
                 UPDATE questions 
                 SET source_keyword = ? 
                 WHERE source_file = ? 
                 AND (source_keyword IS NULL OR source_keyword = '')
-                """, (keyword, filename))
-                
-                updated_count += c.rowcount
-        
-        conn.commit()
-        conn.close()
+                """, params)
+                updated_count = c.rowcount
         
         if updated_count > 0:
             print(f"{updated_count} kayıt için anahtar kelime güncellendi.")
@@ -558,171 +1057,128 @@ def update_missing_keywords():
     except Exception as e:
         print(f"Anahtar kelime güncellenirken hata: {e}")
 
-def get_daily_questions_paginated(page=1, limit=10):
-    """Bugün sorulan soruları sayfalayarak al - kaynak bilgileriyle birlikte"""
+def encode_page_cursor(count, first_asked, normalized_question, position):
+    """Son satırın sıralama anahtarından opak sayfa imleci üret"""
+    payload = json.dumps([count, first_asked, normalized_question, position], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+def decode_page_cursor(cursor):
+    """Sayfa imlecini çöz - geçersizse ValueError"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        
-        today = datetime.now().strftime('%Y-%m-%d')
-        offset = (page - 1) * limit
-        
-        # Enhanced document data'dan anahtar kelimeleri al
-        file_keywords = {}
-        try:
-            with open("enhanced_document_data.json", "r", encoding="utf-8") as f:
-                document_data = json.load(f)
-                file_keywords = {item["filename"]: item.get("keyword", "") for item in document_data}
-        except Exception as e:
-            print(f"Enhanced document data okunamadı: {e}")
-        
-        # Bugün sorulan sorular - aynı soruları grupla (case-insensitive)
-        c.execute("""
-        SELECT LOWER(TRIM(question)) as normalized_question, 
-               question as original_question,
-               answer, 
-               source_file,
-               topic,
-               COUNT(*) as count, 
-               MIN(created_at) as first_asked
-        FROM questions 
-        WHERE DATE(created_at) = ?
-        GROUP BY LOWER(TRIM(question))
-        ORDER BY count DESC, first_asked DESC
-        LIMIT ? OFFSET ?
-        """, (today, limit, offset))
-        
-        questions = []
-        for i, (normalized_question, original_question, answer, source_file, topic, count, created_at) in enumerate(c.fetchall()):
-            source_keyword = file_keywords.get(source_file, "") if source_file else ""
-            questions.append({
-                "id": offset + i + 1,
-                "question": original_question,
-                "answer": answer,
-                "count": count,
-                "created_at": created_at,
-                "source_file": source_file,
-                "source_keyword": source_keyword,
-                "topic": topic or "Genel"
-            })
-        
-        # Toplam sayfa sayısını hesapla - unique sorular için
-        c.execute("""
-        SELECT COUNT(*) as total
-        FROM (
-            SELECT DISTINCT LOWER(TRIM(question))
-            FROM questions 
-            WHERE DATE(created_at) = ?
+        count, first_asked, normalized_question, position = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
         )
-        """, (today,))
-        
-        total_questions = c.fetchone()[0]
-        total_pages = (total_questions + limit - 1) // limit  # Ceiling division
-        
-        conn.close()
+        return int(count), first_asked, normalized_question, int(position)
+    except Exception:
+        raise ValueError("Geçersiz sayfa imleci")
+
+def _paginate_question_groups(table, day, page, limit, cursor, total_questions):
+    """Grup tablosunu (count, first_asked, normalize soru) sırasıyla sayfala
+
+    cursor verilirse keyset sayfalama yapılır (derin sayfalar da index'ten tek
+    aralık okumasıdır); verilmezse page için OFFSET kullanılır.
+    """
+    conditions = []
+    params = []
+    if day is not None:
+        conditions.append("day = ?")
+        params.append(day)
+    if cursor:
+        count, first_asked, normalized_question, offset = decode_page_cursor(cursor)
+        conditions.append("(count, first_asked, normalized_question) < (?, ?, ?)")
+        params.extend([count, first_asked, normalized_question])
+        offset_clause = ""
+    else:
+        offset = (page - 1) * limit
+        offset_clause = " OFFSET ?"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    file_keywords = get_file_keywords()
+    with transaction() as c:
+        c.execute(f"""
+            SELECT normalized_question, question, answer, source_file, topic, count, first_asked
+            FROM {table}
+            {where}
+            ORDER BY count DESC, first_asked DESC, normalized_question DESC
+            LIMIT ?{offset_clause}
+        """, params + [limit] + ([] if cursor else [offset]))
+        rows = c.fetchall()
+    
+    questions = []
+    for i, (normalized_question, original_question, answer, source_file, topic, count, created_at) in enumerate(rows):
+        source_keyword = file_keywords.get(source_file, "") if source_file else ""
+        questions.append({
+            "id": offset + i + 1,
+            "question": original_question,
+            "answer": answer,
+            "count": count,
+            "created_at": created_at,
+            "source_file": source_file,
+            "source_keyword": source_keyword,
+            "topic": topic or "Genel"
+        })
+    
+    next_cursor = None
+    if len(rows) == limit and offset + limit < total_questions:
+        last = rows[-1]
+        next_cursor = encode_page_cursor(last[5], last[6], last[0], offset + limit)
+    
+    total_pages = (total_questions + limit - 1) // limit  # Ceiling division
+    return {
+        "questions": questions,
+        "total_pages": max(1, total_pages),
+        "total_questions": total_questions,
+        "next_cursor": next_cursor
+    }
+
+def get_daily_questions_paginated(page=1, limit=10, cursor=None):
+    """Bugün sorulan soruları sayfalayarak al - kaynak bilgileriyle birlikte
+
+    cursor: önceki sayfanın next_cursor değeri (geçersizse ValueError)
+    """
+    if cursor:
+        decode_page_cursor(cursor)
+    try:
+        today = datetime.now().strftime('%Y-%m-%d')
         
-        return {
-            "questions": questions,
-            "total_pages": max(1, total_pages),
-            "total_questions": total_questions
-        }
+        # Benzersiz soru sayısı özet tablodan
+        with transaction() as c:
+            c.execute("SELECT unique_question_count FROM stats_daily WHERE day = ?", (today,))
+            row = c.fetchone()
+        total_questions = row[0] if row else 0
         
-    except Exception as e:
-        print(f"Günlük sorular alınırken hata: {e}")
-        return {
-            "questions": [],
-            "total_pages": 1,
-            "total_questions": 0
-        }
+        return _paginate_question_groups("question_groups_daily", today, page, limit, cursor, total_questions)
         
     except Exception as e:
         print(f"Günlük sorular alınırken hata: {e}")
         return {
             "questions": [],
             "total_pages": 1,
-            "total_questions": 0
+            "total_questions": 0,
+            "next_cursor": None
         }
 
-def get_all_questions_paginated(page=1, limit=10):
-    """Tüm soruları sayfalayarak al - en çok sorulan sorular için"""
+def get_all_questions_paginated(page=1, limit=10, cursor=None):
+    """Tüm soruları sayfalayarak al - en çok sorulan sorular için
+
+    cursor: önceki sayfanın next_cursor değeri (geçersizse ValueError)
+    """
+    if cursor:
+        decode_page_cursor(cursor)
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        
-        offset = (page - 1) * limit
+        # Benzersiz soru sayısı özet sayaçtan
+        with transaction() as c:
+            total_questions = _get_counter(c, "question_groups")
         
-        # Enhanced document data'dan anahtar kelimeleri al
-        file_keywords = {}
-        try:
-            with open("enhanced_document_data.json", "r", encoding="utf-8") as f:
-                document_data = json.load(f)
-                file_keywords = {item["filename"]: item.get("keyword", "") for item in document_data}
-        except Exception as e:
-            print(f"Enhanced document data okunamadı: {e}")
-        
-        # Tüm sorular - aynı soruları grupla (case-insensitive)
-        c.execute("""
-        SELECT LOWER(TRIM(question)) as normalized_question, 
-               question as original_question,
-               answer, 
-               source_file,
-               topic,
-               COUNT(*) as count, 
-               MIN(created_at) as first_asked
-        FROM questions 
-        GROUP BY LOWER(TRIM(question))
-        ORDER BY count DESC, first_asked DESC
-        LIMIT ? OFFSET ?
-        """, (limit, offset))
-        
-        questions = []
-        for i, (normalized_question, original_question, answer, source_file, topic, count, created_at) in enumerate(c.fetchall()):
-            source_keyword = file_keywords.get(source_file, "") if source_file else ""
-            questions.append({
-                "id": offset + i + 1,
-                "question": original_question,
-                "answer": answer,
-                "count": count,
-                "created_at": created_at,
-                "source_file": source_file,
-                "source_keyword": source_keyword,
-                "topic": topic or "Genel"
-            })
-        
-        # Toplam sayfa sayısını hesapla - unique sorular için
-        c.execute("""
-        SELECT COUNT(*) as total
-        FROM (
-            SELECT DISTINCT LOWER(TRIM(question))
-            FROM questions 
-        )
-        """)
-        
-        total_questions = c.fetchone()[0]
-        total_pages = (total_questions + limit - 1) // limit  # Ceiling division
-        
-        conn.close()
-        
-        return {
-            "questions": questions,
-            "total_pages": max(1, total_pages),
-            "total_questions": total_questions
-        }
-        
-    except Exception as e:
-        print(f"Tüm sorular alınırken hata: {e}")
-        return {
-            "questions": [],
-            "total_pages": 1,
-            "total_questions": 0
-        }
+        return _paginate_question_groups("question_groups", None, page, limit, cursor, total_questions)
         
     except Exception as e:
         print(f"Tüm sorular alınırken hata: {e}")
         return {
             "questions": [],
             "total_pages": 1,
-            "total_questions": 0
+            "total_questions": 0,
+            "next_cursor": None
         }
 
 if __name__ == "__main__":
@@ -0,0 +1,236 @@
+"""
+Soru, kullanıcı oturumu ve yanıt değerlendirmesi kayıtları için arka plan yazıcı (write-behind)
+İstek thread'leri olayı sınırlı bir kuyruğa bırakır; tek yazıcı thread olayları
+QUESTION_LOG_FLUSH_MS aralıklarla toplayıp tek transaction'da (tek commit) yazar.
+Kuyruk doluysa olay düşürülür ve sayılır - sohbet yanıtı hiçbir zaman beklemez.
+"""
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from config import config
+from question_clusters import to_vector
+import question_db
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class QuestionLogWriter:
+    """Sınırlı kuyruk + toplu yazım yapan tek arka plan thread'i"""
+
+    def __init__(
+        self,
+        flush_interval_ms: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        on_flush: Optional[Callable[[], None]] = None,
+    ):
+        self.flush_interval = (flush_interval_ms or config.QUESTION_LOG_FLUSH_MS) / 1000.0
+        self.batch_size = batch_size or config.QUESTION_LOG_BATCH_SIZE
+        self.on_flush = on_flush
+        self._queue: "queue.Queue" = queue.Queue(max_queue_size or config.QUESTION_LOG_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stopping = False
+
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        atexit.register(self.stop)
+
+    # ------------------------------------------------------------------
+    # İstek thread'leri
+    # ------------------------------------------------------------------
+    def start(self):
+        """Yazıcı thread'ini başlat (zaten çalışıyorsa bir şey yapmaz)"""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            question_db.init_db()
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="question-log-writer", daemon=True
+            )
+            self._thread.start()
+            logger.info("📝 Soru kayıt yazıcısı başlatıldı")
+
+    def _enqueue(self, event: Dict[str, Any]) -> bool:
+        if self._stopping:
+            self.dropped += 1
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"⚠️ Soru kayıt kuyruğu dolu, {self.dropped} olay düşürüldü")
+            return False
+
+    def log_question(self, question: str, **fields) -> bool:
+        """add_question parametreleriyle soru olayı ekle - kuyruk doluysa False"""
+        fields["question"] = question
+        # Liste yerine float32 dizi - kuyrukta bekleyen olaylar daha az bellek tutar
+        fields["embedding"] = to_vector(fields.get("embedding"))
+        fields.setdefault("created_at", datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+        return self._enqueue({"type": "question", "fields": fields})
+
+    def track_session(self, user_id: str, question_asked: bool = False) -> bool:
+        """Oturum olayı ekle (gün olay anında belirlenir)"""
+        return self._enqueue(
+            {
+                "type": "session",
+                "user_id": user_id,
+                "asked": 1 if question_asked else 0,
+                "day": datetime.now().date().isoformat(),
+            }
+        )
+
+    def log_evaluation(self, evaluation_id: str, evaluation: Dict[str, Any]) -> bool:
+        """Arka planda tamamlanan yanıt değerlendirmesini kaydet
+
+        Yazıcı kapanıyorsa (kapanışta biten değerlendirmeler) doğrudan yazılır.
+        """
+        if self._stopping:
+            question_db.save_evaluation(evaluation_id, evaluation)
+            return True
+        return self._enqueue(
+            {"type": "evaluation", "evaluation_id": evaluation_id, "evaluation": evaluation}
+        )
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Kuyruktaki olaylar yazılana kadar bekle"""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put({"type": "flush", "event": done}, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stop(self, timeout: float = 10.0):
+        """Kalan olayları yaz ve thread'i durdur (kapanışta atexit ile çağrılır)"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._stopping = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("⚠️ Soru kayıt kuyruğu kapanışta boşaltılamadı")
+            return
+        self._thread.join(timeout)
+        logger.info(f"📝 Soru kayıt yazıcısı durdu ({self.written} olay yazıldı, {self.dropped} düşürüldü)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+    # ------------------------------------------------------------------
+    # Yazıcı thread'i
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while first is not _STOP and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                if item is _STOP:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            events = [item for item in batch if item is not _STOP]
+            waiters = [item["event"] for item in events if item["type"] == "flush"]
+            self._write_batch([item for item in events if item["type"] != "flush"])
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                question_db.close_connection()
+                return
+
+    def _write_batch(self, events: List[Dict[str, Any]]):
+        """Olayları tek transaction'da yaz - hata olursa olay olay tekrar dene"""
+        if not events:
+            return
+        questions = [event["fields"] for event in events if event["type"] == "question"]
+        evaluations = [
+            (event["evaluation_id"], event["evaluation"])
+            for event in events
+            if event["type"] == "evaluation"
+        ]
+
+        # Aynı kullanıcı/gün oturum olayları tek satır güncellemesine indirgenir
+        sessions: Dict[tuple, int] = {}
+        session_events: Dict[tuple, int] = {}
+        for event in events:
+            if event["type"] == "session":
+                key = (event["user_id"], event["day"])
+                sessions[key] = sessions.get(key, 0) + event["asked"]
+                session_events[key] = session_events.get(key, 0) + 1
+
+        start = time.perf_counter()
+        try:
+            with question_db.transaction():
+                for fields in questions:
+                    question_db.add_question(**fields)
+                for (user_id, day), asked in sessions.items():
+                    question_db.track_user_session(user_id, asked, day=day, raise_errors=True)
+                for evaluation_id, evaluation in evaluations:
+                    question_db.save_evaluation(evaluation_id, evaluation)
+            self.written += len(events)
+        except Exception as e:
+            logger.warning(f"⚠️ Toplu soru kaydı başarısız, tek tek yazılıyor: {e}")
+            for fields in questions:
+                try:
+                    question_db.add_question(**fields)
+                    self.written += 1
+                except Exception as item_error:
+                    self.failed += 1
+                    logger.error(f"❌ Soru kaydedilemedi: {item_error}")
+            for (user_id, day), asked in sessions.items():
+                try:
+                    question_db.track_user_session(user_id, asked, day=day, raise_errors=True)
+                    self.written += session_events[(user_id, day)]
+                except Exception as item_error:
+                    self.failed += session_events[(user_id, day)]
+                    logger.error(f"❌ Oturum kaydedilemedi: {item_error}")
+            for evaluation_id, evaluation in evaluations:
+                try:
+                    question_db.save_evaluation(evaluation_id, evaluation)
+                    self.written += 1
+                except Exception as item_error:
+                    self.failed += 1
+                    logger.error(f"❌ Değerlendirme kaydedilemedi: {item_error}")
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+        if self.on_flush is not None and questions:
+            try:
+                self.on_flush()
+            except Exception as e:
+                logger.warning(f"⚠️ Kayıt sonrası işlem hatası: {e}")
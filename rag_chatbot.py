@@ -1,14 +1,54 @@
 import chromadb
 from sentence_transformers import SentenceTransformer
-from quer import ask_local_llm, temizle_yanit
+from quer import ask_local_llm, temizle_yanit, enhanced_prompt_engineering
 from config import config
-from query_processor import QueryProcessor
 from hybrid_retriever import HybridRetriever
 from evaluator import ResponseEvaluator
+from reranker import CrossEncoderReranker
+from token_counter import count_tokens
+from chunk_stats import get_chunk_stats
+from turkish_analyzer import analyze, fold_case
 import logging
 import re
 from typing import Dict, List, Any, Optional
 
+# Context bütçesi kalan bu değerin altına düşerse yeni chunk eklenmez
+MIN_CONTEXT_PART_TOKENS = 32
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Yanıt son işleme desenleri - her yanıtta çalıştıkları için bir kez derlenir.
+# Kaynak desenleri sırayla uygulanır: \s* satır sonlarını aşabildiği için tek
+# alternation'da birleştirmek (en soldaki eşleşme kazanır) sonucu değiştirir.
+SOURCE_REFERENCE_RES = tuple(
+    re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for pattern in (
+        r"\s*Kaynak:\s*\[.*?\].*?$",
+        r"\s*Kaynak:\s*.*?\.pdf.*?$",
+        r"\s*Kaynak:\s*.*?\.docx.*?$",
+        r"\s*Kaynak belge:\s*.*?$",
+    )
+)
+FILE_REFERENCE_RES = tuple(
+    re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for pattern in (
+        r"\s*\[.*?\.pdf\].*?$",
+        r"\s*\[.*?\.docx\].*?$",
+        r"\s*\[Anasayfa.*?\].*?$",
+    )
+)
+ELLIPSIS_TAIL_RE = re.compile(r"\.{3,}.*?$", re.MULTILINE)
+TRAILING_SPACE_RE = re.compile(r"\s+$", re.MULTILINE)
+IRRELEVANT_START_RES = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"^[^.]*belgede[^.]*kurallar[^.]*\.",
+        r"^[^.]*ancak[^.]*\.",
+        r"^[^.]*eğer[^.]*\.",
+    )
+)
+DOT_RUN_RE = re.compile(r"\s*\.+\s*")
+RESPONSE_SENTENCE_RE = re.compile(r"[.!?]+")
+
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,27 +57,48 @@ logger = logging.getLogger(__name__)
 class AdvancedRAGChatbot:
     """Gelişmiş RAG Chatbot sistemi"""
 
-    def __init__(self, chroma_path: str = "./chroma"):
+    def __init__(self, chroma_path: str = "./chroma", evaluation_pool=None):
+        """evaluation_pool: tam değerlendirmeyi arka planda yapan EvaluationPool
+
+        Verilirse yanıt ucuz güven skoruyla hemen döner ve tam değerlendirme
+        havuza gönderilir; verilmezse (CLI/test) tam değerlendirme yanıt yolunda yapılır.
+        """
         self.retriever = HybridRetriever(chroma_path)
-        self.query_processor = QueryProcessor()
+        # Retriever ile aynı processor - analiz cache'i paylaşılır
+        self.query_processor = self.retriever.query_processor
         self.evaluator = ResponseEvaluator()
+        self.evaluation_pool = evaluation_pool
+        self.reranker = CrossEncoderReranker() if config.RERANK_ENABLED else None
 
         logger.info("🤖 Gelişmiş RAG Chatbot başlatıldı!")
 
-    def process_query(self, user_query: str) -> Dict[str, Any]:
-        """Kullanıcı sorgusunu kapsamlı şekilde işle"""
+    def process_query(
+        self, user_query: str, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Kullanıcı sorgusunu kapsamlı şekilde işle
+
+        filters: retrieval kapsamı (source_files, file_types, page_min, page_max)
+        """
         try:
-            # 1. Query preprocessing
+            # 1. Query preprocessing - istek boyunca tek analiz kullanılır
             processed_query = self.query_processor.process_query(user_query)
             logger.info(f"📝 İşlenmiş sorgu kategorisi: {processed_query['category']}")
 
             # 2. Advanced retrieval
             retrieval_result = self.retriever.advanced_retrieve(
-                user_query, n_results=config.DEFAULT_N_RESULTS
+                user_query,
+                n_results=config.DEFAULT_N_RESULTS,
+                processed_query=processed_query,
+                filters=filters,
             )
 
+            # Sorgu vektörü soru kümeleme için sonuçla birlikte döner
+            query_embedding = retrieval_result.get("query_embedding")
+
             if not retrieval_result["results"]:
-                return self._handle_no_results(user_query)
+                result = self._handle_no_results(user_query, processed_query)
+                result["query_embedding"] = query_embedding
+                return result
 
             # 3. Filter by similarity threshold
             filtered_results = self.retriever.filter_by_similarity_threshold(
@@ -45,27 +106,51 @@ class AdvancedRAGChatbot:
             )
 
             if not filtered_results:
-                return self._handle_low_similarity(
-                    user_query, retrieval_result["results"]
+                result = self._handle_low_similarity(
+                    user_query, retrieval_result["results"], processed_query
                 )
+                result["query_embedding"] = query_embedding
+                return result
 
-            # 4. Context preparation
-            context_info = self._prepare_context(filtered_results, processed_query)
+            # 4. MMR ile çeşitlilik (örtüşen chunk'lar yerine farklı bilgi) ve
+            #    cross-encoder rerank (opsiyonel) - context'e daha az ama daha alakalı chunk
+            context_candidates = filtered_results
+            if config.MMR_ENABLED:
+                context_candidates = self.retriever.mmr_select(context_candidates)
+            if self.reranker is not None:
+                context_candidates = self.reranker.rerank(user_query, context_candidates)
 
-            # 5. Generate response
+            # 5. Context preparation
+            context_info = self._prepare_context(context_candidates, processed_query)
+
+            # 6. Generate response
             response_data = self._generate_response(
                 user_query, context_info, processed_query
             )
 
-            # 6. Evaluate response quality
-            evaluation = self._evaluate_response(
-                response_data["response"],
-                user_query,
-                context_info["sources"],
-                context_info["documents"],
-            )
+            # 7. Evaluate response quality - havuz varsa ucuz skor, tam değerlendirme arka planda
+            evaluation_id = None
+            if self.evaluation_pool is not None:
+                evaluation = self.evaluator.quick_evaluate(
+                    response_data["response"], user_query, context_info["sources"]
+                )
+                evaluation_id = self.evaluation_pool.submit(
+                    response_data["response"],
+                    user_query,
+                    context_info["sources"],
+                    context_info["documents"],
+                    context_info["document_stats"],
+                )
+            else:
+                evaluation = self._evaluate_response(
+                    response_data["response"],
+                    user_query,
+                    context_info["sources"],
+                    context_info["documents"],
+                    context_info["document_stats"],
+                )
 
-            # 7. Prepare final result
+            # 8. Prepare final result
             # Sadece gerçekten kullanılan ilk source'u döndür (en yüksek skorlu)
             result = {
                 "response": response_data["response"],
@@ -76,11 +161,18 @@ class AdvancedRAGChatbot:
                 "retrieval_info": {
                     "total_found": len(retrieval_result["results"]),
                     "after_filtering": len(filtered_results),
+                    "reranked": self.reranker is not None,
+                    "context_chunks": len(context_info["context_parts"]),
+                    "context_tokens": context_info["context_tokens"],
+                    "prompt_tokens": response_data["prompt_tokens"],
+                    "token_budget": config.CONTEXT_TOKEN_BUDGET,
                     "best_score": (
                         filtered_results[0]["combined_score"] if filtered_results else 0
                     ),
                 },
                 "evaluation": evaluation,
+                "evaluation_id": evaluation_id,
+                "query_embedding": query_embedding,
             }
 
             return result
@@ -92,25 +184,53 @@ class AdvancedRAGChatbot:
     def _prepare_context(
         self, results: List[Dict[str, Any]], processed_query: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Retrieval sonuçlarından context hazırla"""
+        """Retrieval sonuçlarından context hazırla
+
+        Chunk'lar sıralama sırasıyla CONTEXT_TOKEN_BUDGET dolana kadar eklenir;
+        bütçeye sığmayan chunk cümle sınırından kırpılır.
+        """
 
         context_parts = []
         sources = []  # Set yerine list - sıralamayı koru
         documents = []
-        user_query = processed_query.get('original_query', processed_query.get('query', ''))
+        document_stats = []
+        user_query = processed_query.get("original", "")
+        remaining_tokens = config.CONTEXT_TOKEN_BUDGET
+        candidates = results[: config.DEFAULT_N_RESULTS]
+
+        # Ingest sırasında hesaplanmış chunk verileri (normalize metin, terimler, token)
+        candidate_stats = [get_chunk_stats(r["document"], r.get("metadata")) for r in candidates]
+
+        # Document relevans kontrolü - alakasız dökümanları filtrele. Hiçbiri sorgu
+        # terimi içermiyorsa (ör. İngilizce/eş anlamlı sorgu) filtre uygulanmaz.
+        relevant = [
+            self._is_document_relevant_to_query(r["document"], user_query, stats)
+            for r, stats in zip(candidates, candidate_stats)
+        ]
+        if not any(relevant):
+            relevant = [True] * len(candidates)
 
-        for i, result in enumerate(results[: config.DEFAULT_N_RESULTS], 1):
+        for i, (result, stats) in enumerate(zip(candidates, candidate_stats), 1):
+            if not relevant[i - 1]:
+                continue
             doc = result["document"]
             metadata = result.get("metadata", {})
             score = result.get("combined_score", 0)
 
-            # Document relevans kontrolü - alakasız dökümanları filtrele
-            if not self._is_document_relevant_to_query(doc, user_query):
-                continue
-
-            # Document preprocessing
+            # Document preprocessing + token bütçesi
+            if remaining_tokens < MIN_CONTEXT_PART_TOKENS:
+                break
             clean_doc = self._clean_document_for_context(doc)
+            doc_tokens = stats["token_count"] or count_tokens(clean_doc)
+            if doc_tokens > remaining_tokens:
+                clean_doc = self._trim_to_token_budget(clean_doc, remaining_tokens)
+                if not clean_doc:
+                    continue
+                doc_tokens = count_tokens(clean_doc)
+                stats = None  # Kırpılan metin için evaluator yeniden hesaplar
+            remaining_tokens -= doc_tokens
             documents.append(clean_doc)
+            document_stats.append(stats)
 
             # Source tracking - sıralı ve tekrarsız
             source_file = metadata.get("source_file", f"Belge_{i}")
@@ -133,37 +253,49 @@ class AdvancedRAGChatbot:
 
         return {
             "formatted_context": formatted_context,
+            "context_tokens": count_tokens(formatted_context),
             "sources": sources,  # Artık list olarak döndür
             "documents": documents,
+            "document_stats": document_stats,
             "context_parts": context_parts,
         }
 
     def _clean_document_for_context(self, document: str) -> str:
-        """Dokümanı context için temizle"""
+        """Dokümanı context için temizle - uzunluk sınırı token bütçesiyle uygulanır"""
         # Fazla boşlukları temizle
-        clean_doc = " ".join(document.split())
+        return " ".join(document.split())
+
+    def _trim_to_token_budget(self, text: str, budget: int) -> str:
+        """Metni cümle sınırından bütçeye sığacak şekilde kırp (hiç cümle sığmazsa "")"""
+        kept = []
+        used = count_tokens(" ...")
+        for sentence in SENTENCE_SPLIT_RE.split(text):
+            sentence_tokens = count_tokens(sentence) + 1
+            if used + sentence_tokens > budget:
+                break
+            kept.append(sentence)
+            used += sentence_tokens
+        return " ".join(kept) + " ..." if kept else ""
 
-        # Çok uzun dokümanları kısalt
-        words = clean_doc.split()
-        if (
-            len(words) > config.MAX_CONTEXT_LENGTH // 5
-        ):  # Yaklaşık kelime başına 5 karakter
-            clean_doc = " ".join(words[: config.MAX_CONTEXT_LENGTH // 5]) + "..."
+    def _is_document_relevant_to_query(
+        self, document: str, user_query: str, stats: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Dökümanın sorguyla alakalı olup olmadığını kontrol et
 
-        return clean_doc
+        stats: get_chunk_stats sonucu - sorgu gövdeleri chunk terimleriyle ve
+        normalize metinle karşılaştırılır.
+        """
+        stats = stats or get_chunk_stats(document)
 
-    def _is_document_relevant_to_query(self, document: str, user_query: str) -> bool:
-        """Dökümanın sorguyla alakalı olup olmadığını kontrol et"""
-        doc_lower = document.lower()
-        
         # Genel anahtar kelime kontrolü
         query_keywords = self._extract_query_keywords(user_query)
         if not query_keywords:
             return True  # Anahtar kelime yoksa tüm dökümanları al
-            
+
         # En az bir anahtar kelime geçmeli
-        keyword_matches = sum(1 for keyword in query_keywords if keyword in doc_lower)
-        return keyword_matches > 0
+        doc_terms = stats["term_freqs"]
+        doc_lower = stats["norm_text"]
+        return any(keyword in doc_terms or keyword in doc_lower for keyword in query_keywords)
 
     def _format_context_for_llm(
         self, context_parts: List[Dict[str, Any]], processed_query: Dict[str, Any]
@@ -222,6 +354,8 @@ Bu sorguya özgü ve kesin bir yanıt ver. Başka konulara değinme."""
             "response": processed_response,
             "raw_response": raw_response,
             "prompt_used": prompt,
+            # ask_local_llm'in gönderdiği son prompt üzerinden
+            "prompt_tokens": count_tokens(enhanced_prompt_engineering(prompt)),
         }
 
     def _get_specialized_instructions(self, query_category: str) -> str:
@@ -242,26 +376,22 @@ Bu sorguya özgü ve kesin bir yanıt ver. Başka konulara değinme."""
         """Yanıtı son işleme tabi tut"""
 
         # Kaynak bilgilerini temizle - LLM'den gelen kaynak referanslarını kaldır
-        import re
-        
-        # Daha kapsamlı kaynak referansı temizleme
-        # "Kaynak:" ile başlayan tüm kısımları temizle
-        response = re.sub(r'\s*Kaynak:\s*\[.*?\].*?$', '', response, flags=re.IGNORECASE | re.MULTILINE)
-        response = re.sub(r'\s*Kaynak:\s*.*?\.pdf.*?$', '', response, flags=re.IGNORECASE | re.MULTILINE)
-        response = re.sub(r'\s*Kaynak:\s*.*?\.docx.*?$', '', response, flags=re.IGNORECASE | re.MULTILINE)
-        response = re.sub(r'\s*Kaynak belge:\s*.*?$', '', response, flags=re.IGNORECASE | re.MULTILINE)
-        
-        # Köşeli parantez içindeki dosya referanslarını temizle
-        response = re.sub(r'\s*\[.*?\.pdf\].*?$', '', response, flags=re.IGNORECASE | re.MULTILINE)
-        response = re.sub(r'\s*\[.*?\.docx\].*?$', '', response, flags=re.IGNORECASE | re.MULTILINE)
-        response = re.sub(r'\s*\[Anasayfa.*?\].*?$', '', response, flags=re.IGNORECASE | re.MULTILINE)
-        
+        # ("Kaynak:" ile başlayan kısımlar satır sonuna kadar)
+        for pattern in SOURCE_REFERENCE_RES:
+            response = pattern.sub('', response)
+
+        # Köşeli parantez içindeki dosya referanslarını temizle ("[" yoksa atlanır)
+        if '[' in response:
+            for pattern in FILE_REFERENCE_RES:
+                response = pattern.sub('', response)
+
         # "......" ile biten kısımları temizle
-        response = re.sub(r'\.{3,}.*?$', '', response, flags=re.MULTILINE)
-        
+        if '...' in response:
+            response = ELLIPSIS_TAIL_RE.sub('', response)
+
         # Satır sonundaki gereksiz boşlukları temizle
-        response = re.sub(r'\s+$', '', response, flags=re.MULTILINE)
-        
+        response = TRAILING_SPACE_RE.sub('', response)
+
         # Çok kısa yanıtları genişlet
         if len(response) < config.MIN_ANSWER_LENGTH:
             response += " Bu konuda daha detaylı bilgi için ilgili belgeleri inceleyebilirsiniz."
@@ -282,7 +412,7 @@ Bu sorguya özgü ve kesin bir yanıt ver. Başka konulara değinme."""
         query_keywords = self._extract_query_keywords(user_query)
         
         # Yanıtı cümlelere böl (nokta, ünlem, soru işaretiyle)
-        sentences = re.split(r'[.!?]+', response)
+        sentences = RESPONSE_SENTENCE_RE.split(response)
         sentences = [s.strip() for s in sentences if s.strip()]  # Boş cümleleri temizle
         
         filtered_sentences = []
@@ -310,18 +440,12 @@ Bu sorguya özgü ve kesin bir yanıt ver. Başka konulara değinme."""
         return filtered_response.strip()
 
     def _extract_query_keywords(self, query: str) -> list:
-        """Sorgudan anahtar kelimeleri çıkar"""
-        # Türkçe stop words
-        stop_words = {'ve', 'ile', 'için', 'de', 'da', 'bir', 'bu', 'şu', 'o', 'ben', 'sen', 'biz', 'siz', 'onlar',
-                     'nasıl', 'ne', 'nedir', 'kim', 'nerede', 'neden', 'niçin', 'hangi', 'kaç', 'ne zaman'}
-        
-        words = query.lower().split()
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
-        return keywords
+        """Sorgudan anahtar kelimeleri çıkar (Türkçe gövdeler, stopword'ler hariç)"""
+        return list(dict.fromkeys(analyze(query, min_length=3)))
 
     def _is_sentence_relevant_to_query(self, sentence: str, query_keywords: list, user_query: str) -> bool:
         """Cümlenin sorguyla alakalı olup olmadığını kontrol et"""
-        sentence_lower = sentence.lower()
+        sentence_lower = fold_case(sentence)
         
         # Anahtar kelime match kontrolü
         keyword_matches = sum(1 for keyword in query_keywords if keyword in sentence_lower)
@@ -333,20 +457,12 @@ Bu sorguya özgü ve kesin bir yanıt ver. Başka konulara değinme."""
         """Alakasız ifadeleri temizle"""
         
         # Genel alakasız başlangıçları temizle
-        irrelevant_starts = [
-            r'^[^.]*belgede[^.]*kurallar[^.]*\.',
-            r'^[^.]*ancak[^.]*\.',
-            r'^[^.]*eğer[^.]*\.'
-        ]
-        
-        for pattern in irrelevant_starts:
-            response = re.sub(pattern, '', response, flags=re.IGNORECASE)
-        
-        # Çoklu boşlukları ve nokta hatalarını düzelt
-        response = re.sub(r'\s+', ' ', response)
-        response = re.sub(r'\.+', '.', response)
-        response = re.sub(r'\s*\.\s*', '. ', response)
-        
+        for pattern in IRRELEVANT_START_RES:
+            response = pattern.sub('', response)
+
+        # Çoklu boşlukları ve nokta hatalarını düzelt (nokta dizileri tek ". " olur)
+        response = DOT_RUN_RE.sub('. ', ' '.join(response.split()))
+
         # Başında/sonunda gereksiz boşluk ve nokta temizle
         response = response.strip(' .')
         
@@ -357,19 +473,28 @@ Bu sorguya özgü ve kesin bir yanıt ver. Başka konulara değinme."""
         return response
 
     def _evaluate_response(
-        self, response: str, query: str, sources: List[str], documents: List[str]
+        self,
+        response: str,
+        query: str,
+        sources: List[str],
+        documents: List[str],
+        document_stats: Optional[List[Optional[Dict[str, Any]]]] = None,
     ) -> Dict[str, Any]:
         """Yanıt kalitesini değerlendir"""
-        return self.evaluator.evaluate_response(response, query, sources, documents)
+        return self.evaluator.evaluate_response(
+            response, query, sources, documents, document_stats
+        )
 
-    def _handle_no_results(self, query: str) -> Dict[str, Any]:
+    def _handle_no_results(
+        self, query: str, processed_query: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Sonuç bulunamadığında"""
         return {
             "response": config.FALLBACK_RESPONSE,
             "sources": [],
             "confidence": 0.0,
             "quality_level": "Bilgi Yok",
-            "query_analysis": self.query_processor.process_query(query),
+            "query_analysis": processed_query or self.query_processor.process_query(query),
             "retrieval_info": {"total_found": 0, "after_filtering": 0, "best_score": 0},
             "evaluation": {
                 "overall_score": 0.0,
@@ -378,7 +503,10 @@ Bu sorguya özgü ve kesin bir yanıt ver. Başka konulara değinme."""
         }
 
     def _handle_low_similarity(
-        self, query: str, results: List[Dict[str, Any]]
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        processed_query: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Düşük benzerlik skorlarında"""
         best_score = results[0]["combined_score"] if results else 0
@@ -394,7 +522,7 @@ Bu sorguya özgü ve kesin bir yanıt ver. Başka konulara değinme."""
             "sources": [],
             "confidence": best_score,
             "quality_level": "Düşük Güven",
-            "query_analysis": self.query_processor.process_query(query),
+            "query_analysis": processed_query or self.query_processor.process_query(query),
             "retrieval_info": {
                 "total_found": len(results),
                 "after_filtering": 0,
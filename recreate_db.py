@@ -1,23 +1,25 @@
 #!/usr/bin/env python3
-import sqlite3
 import os
+from question_db import DB_PATH, close_connection, get_connection, init_db
 
 def recreate_database():
     print("🔄 Veritabanı yeniden oluşturuluyor...")
     
-    # Eski veritabanını sil
-    if os.path.exists("questions.db"):
-        os.remove("questions.db")
+    # Eski veritabanını (WAL dosyalarıyla birlikte) sil
+    close_connection()
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
         print("🗑️ Eski veritabanı silindi")
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
     
     # Yeni veritabanını oluştur
-    from question_db import init_db
     init_db()
     print("✅ Yeni veritabanı oluşturuldu")
     
     # Veritabanı şemasını kontrol et
-    conn = sqlite3.connect("questions.db")
-    c = conn.cursor()
+    c = get_connection().cursor()
     
     c.execute("PRAGMA table_info(questions)")
     columns = c.fetchall()
@@ -25,7 +27,7 @@ def recreate_database():
     for col in columns:
         print(f"  - {col[1]} ({col[2]})")
     
-    conn.close()
+    c.close()
     print("✅ Veritabanı başarıyla yeniden oluşturuldu!")
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import time
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional
+from config import config
+from cache_utils import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """Füzyon sonrası adayları (query, chunk) çiftleri üzerinden yeniden sıralayan sınıf
+
+    Model CPU'da, batch'ler halinde çalışır. Skorlanacak aday sayısı ve toplam süre
+    sınırlıdır; skorlar (query hash, chunk id) anahtarıyla cache'lenir.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or config.RERANK_MODEL
+        self.model = None
+        self.available = True
+        self.score_cache = LRUCache(config.RERANK_CACHE_SIZE)
+
+    def _load_model(self) -> bool:
+        """Modeli ilk kullanımda yükle - yüklenemezse rerank devre dışı kalır"""
+        if self.model is not None or not self.available:
+            return self.available
+        try:
+            from sentence_transformers import CrossEncoder
+
+            self.model = CrossEncoder(self.model_name, max_length=512, device="cpu")
+            logger.info(f"✅ Rerank modeli yüklendi: {self.model_name}")
+        except Exception as e:
+            logger.warning(f"⚠️ Rerank modeli yüklenemedi, rerank atlanıyor: {e}")
+            self.available = False
+        return self.available
+
+    @staticmethod
+    def _query_hash(query: str) -> str:
+        return hashlib.sha1(query.strip().encode("utf-8")).hexdigest()[:16]
+
+    def rerank(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        top_k: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Sonuçları cross-encoder skoruna göre sırala, ilk top_k sonucu döndür
+
+        Her sonuca "rerank_score" eklenir. Süre sınırı aşıldığında skorlanamayan
+        adaylar skorlananların ardından füzyon sırasıyla eklenir.
+        """
+        if top_k is None:
+            top_k = config.RERANK_TOP_K
+        if not results or not self._load_model():
+            return results  # Rerank yapılamıyorsa mevcut davranış korunur
+
+        candidates = results[: config.RERANK_MAX_CANDIDATES]
+        query_hash = self._query_hash(query)
+        scores: Dict[int, float] = {}
+
+        # Cache'de olmayan çiftler
+        pending = []
+        for index, result in enumerate(candidates):
+            cached = None
+            if result.get("id") is not None:
+                cached = self.score_cache.get((query_hash, result["id"]))
+            if cached is not None:
+                scores[index] = cached
+            else:
+                pending.append(index)
+
+        start = time.perf_counter()
+        deadline = start + config.RERANK_MAX_LATENCY_MS / 1000.0
+        batch_size = max(1, config.RERANK_BATCH_SIZE)
+        for offset in range(0, len(pending), batch_size):
+            if time.perf_counter() > deadline:
+                logger.info(
+                    f"⏱️ Rerank süre sınırı aşıldı: {len(pending) - offset} aday skorlanmadı"
+                )
+                break
+            batch = pending[offset : offset + batch_size]
+            pairs = [[query, candidates[index]["document"]] for index in batch]
+            batch_scores = self.model.predict(
+                pairs, batch_size=batch_size, show_progress_bar=False
+            )
+            for index, score in zip(batch, batch_scores):
+                scores[index] = float(score)
+                if candidates[index].get("id") is not None:
+                    self.score_cache.set((query_hash, candidates[index]["id"]), float(score))
+
+        scored = sorted(scores, key=lambda index: scores[index], reverse=True)
+        unscored = [index for index in range(len(candidates)) if index not in scores]
+
+        reranked = []
+        for index in scored + unscored:
+            result = dict(candidates[index])
+            result["rerank_score"] = scores.get(index)
+            reranked.append(result)
+
+        return reranked[:top_k]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "loaded": self.model is not None,
+            "available": self.available,
+            "cache": self.score_cache.stats(),
+        }
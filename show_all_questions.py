@@ -1,19 +1,15 @@
-from question_db import init_db
-import sqlite3
-
-DB_PATH = 'questions.db'
+from question_db import init_db, get_connection
 
 def show_all_questions():
     init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    c = get_connection().cursor()
     c.execute("SELECT id, question, answer, created_at FROM questions ORDER BY id DESC")
     rows = c.fetchall()
     print(f"Toplam {len(rows)} soru bulundu:\n")
     for row in rows:
         qid, question, answer, created_at = row
         print(f"[{qid}] {created_at}\nSoru: {question}\nCevap: {answer[:120]}{'...' if len(answer)>120 else ''}\n{'-'*60}")
-    conn.close()
+    c.close()
 
 if __name__ == "__main__":
     show_all_questions()
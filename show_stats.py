@@ -9,7 +9,7 @@ if __name__ == "__main__":
         for idx, (source, count) in enumerate(get_top_sources(5), 1):
             print(f"{idx}. {source} ({count} kez)")
         print("\nEn Çok Sorulan 5 Soru (Benzerlik Analizine Göre):")
-        for idx, (question, count) in enumerate(get_top_questions_by_similarity(5), 1):
+        for idx, (question, answer, count) in enumerate(get_top_questions_by_similarity(5), 1):
             print(f"{idx}. {question} ({count} benzer)")
     except Exception as e:
         print("Hata oluştu:", e)
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Çoklu terim eşleştirici - sorgu üzerinde tek geçişte tüm sözlük terimlerini bulur
+Sinonim genişletme, kategori, selamlama/veda ve konu tespiti aynı taramayı kullanır
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from turkish_analyzer import fold_case, fold_case_ascii
+
+# Sinonimler (QueryProcessor.expand_query)
+SYNONYMS = {
+    "sınav": ["exam", "test", "imtihan", "değerlendirme"],
+    "not": ["puan", "derece", "grade", "değerlendirme"],
+    "ders": ["course", "lesson", "subject", "derslik"],
+    "öğrenci": ["student", "öğrenci", "talebe"],
+    "hoca": ["öğretim görevlisi", "professor", "instructor", "teacher"],
+    "kayıt": ["registration", "enrollment", "kaydolma"],
+    "mezuniyet": ["graduation", "bitirme", "diploma"],
+    "devamsızlık": ["absence", "yoklama", "attendance"],
+    "geçme": ["passing", "başarı", "success"],
+    "kalma": ["failure", "başarısızlık", "tekrar"],
+}
+
+# Akademik anahtar kelimeler (QueryProcessor.extract_entities)
+ACADEMIC_KEYWORDS = [
+    "sınav", "not", "ders", "kredi", "gpa", "ortalama", "mezuniyet",
+    "kayıt", "harç", "burs", "devamsızlık", "disiplin", "yönetmelik",
+]
+
+# Sorgu kategorileri - sıra önceliktir (QueryProcessor.categorize_query)
+CATEGORY_RULES = {
+    "procedure": ["nasıl", "how", "adım"],
+    "temporal": ["ne zaman", "when", "tarih"],
+    "location": ["nerede", "where", "yer"],
+    "quantitative": ["kaç", "how many", "sayı"],
+    "definition": ["ne", "what", "nedir"],
+    "explanation": ["neden", "why", "sebep"],
+}
+
+# Selamlama / veda ifadeleri - tam kelime olarak eşleşir (ConversationManager)
+GREETING_TERMS = [
+    "merhaba", "selam", "hello", "hi", "hey", "iyi günler", "günaydın", "iyi akşamlar",
+    "nasılsın", "naber", "how are you",
+]
+GOODBYE_TERMS = [
+    "güle güle", "hoşça kal", "görüşürüz", "bye", "goodbye", "teşekkür", "sağol", "hoşça kalın",
+    "teşekkürler", "thanks", "thank you", "tşk",
+]
+
+# Mesajın soru olduğunu gösteren ifadeler (/api/chat, ConversationManager.is_greeting)
+QUESTION_INDICATORS = [
+    "nasıl", "ne", "nerede", "neden", "kim", "hangi", "kaç", "ne zaman",
+    "şifre", "parola", "kayıt", "ders", "sınav", "not", "başvuru",
+    "eduroam", "öğrenci", "mezuniyet", "devamsızlık", "harç", "burs",
+    "?",
+]
+
+# Konu tespit kuralları - sıra önceliktir (question_db.detect_topic)
+TOPIC_RULES = {
+    "bilgisayar_laboratuvari": ["bilgisayar laboratuvar", "lab", "laboratuvar", "sınav", "su getir", "yiyecek", "içecek"],
+    "eduroam": ["eduroam", "wifi", "internet", "bağlantı", "şifre", "parola", "android", "eap", "phase"],
+    "sinav_kurallari": ["sınav", "kurall", "yapılacak", "yasaklı", "izin"],
+    "kimlik_belgesi": ["kimlik", "belge", "öğrenci kart", "tc kimlik"],
+    "kayit_isleri": ["kayıt", "ders", "kredi", "not", "transkript"],
+    "yemek": ["yemek", "kafeterya", "mensa", "beslenme"],
+    "konaklama": ["yurt", "barınma", "konaklama", "ev"],
+    "ulasim": ["otobüs", "ulaşım", "servis", "ring"],
+    "burs": ["burs", "kredi", "öğrenim", "ücret"],
+    "ogrenci_isleri": ["öğrenci işleri", "işlem", "başvuru", "belge"],
+}
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class TermMatcher:
+    """Aho-Corasick otomatı ile çoklu terim eşleştirme
+
+    Terimler kategori ile eklenir, build() sonrası find() metin üzerinde tek
+    lineer geçişte tüm eşleşmeleri döndürür. whole_word=True olan terimler
+    yalnızca kelime sınırlarında eşleşir (regex \\b gibi).
+    """
+
+    def __init__(self):
+        self._terms: List[Tuple[str, str, bool]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._built = False
+
+    def add(self, term: str, category: str, whole_word: bool = False):
+        """Terim ekle (eşleşme Türkçe küçük harf üzerinden yapılır)"""
+        term = fold_case(term)
+        if not term:
+            return
+        self._terms.append((term, category, whole_word))
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(len(self._terms) - 1)
+        self._built = False
+
+    def build(self):
+        """Failure link'lerini BFS ile hesapla"""
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+
+    def find(self, text: str) -> List[Tuple[int, int, str, str]]:
+        """(başlangıç, bitiş, terim, kategori) listesi - metin fold_case edilerek taranır
+
+        Metinde büyük "I" varsa ASCII katlamalı hali de taranır ("HI" -> "hi");
+        iki katlama aynı uzunlukta olduğu için konumlar ortaktır.
+        """
+        if not self._built:
+            self.build()
+        matches = self._scan(fold_case(text))
+        if "I" in text:
+            seen = set(matches)
+            matches.extend(match for match in self._scan(fold_case_ascii(text)) if match not in seen)
+        return matches
+
+    def _scan(self, text: str) -> List[Tuple[int, int, str, str]]:
+        matches = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for term_index in self._output[node]:
+                term, category, whole_word = self._terms[term_index]
+                end = position + 1
+                start = end - len(term)
+                if whole_word and (
+                    (start > 0 and _is_word_char(text[start - 1]))
+                    or (end < len(text) and _is_word_char(text[end]))
+                ):
+                    continue
+                matches.append((start, end, term, category))
+        return matches
+
+    def match(self, text: str) -> Dict[str, Tuple[str, ...]]:
+        """Kategori -> eşleşen terimler (ilk görülme sırasıyla, tekrarsız)"""
+        grouped: Dict[str, List[str]] = {}
+        for start, _end, term, category in sorted(self.find(text)):
+            terms = grouped.setdefault(category, [])
+            if term not in terms:
+                terms.append(term)
+        return {category: tuple(terms) for category, terms in grouped.items()}
+
+
+def build_query_matcher() -> TermMatcher:
+    """Tüm sözlüklerden tek otomat kur"""
+    matcher = TermMatcher()
+    for term in SYNONYMS:
+        matcher.add(term, "synonym")
+    for term in ACADEMIC_KEYWORDS:
+        matcher.add(term, "academic_keyword")
+    for category, terms in CATEGORY_RULES.items():
+        for term in terms:
+            matcher.add(term, f"category:{category}")
+    for term in GREETING_TERMS:
+        matcher.add(term, "greeting", whole_word=True)
+    for term in GOODBYE_TERMS:
+        matcher.add(term, "goodbye", whole_word=True)
+    for term in QUESTION_INDICATORS:
+        matcher.add(term, "question_indicator")
+    for topic, terms in TOPIC_RULES.items():
+        for term in terms:
+            matcher.add(term, f"topic:{topic}")
+    matcher.build()
+    return matcher
+
+
+query_matcher = build_query_matcher()
+
+
+@lru_cache(maxsize=2048)
+def match_terms(text: str) -> Dict[str, Tuple[str, ...]]:
+    """Metindeki tüm sözlük eşleşmeleri - tek geçiş, sonuç cache'lenir (değiştirmeyin)"""
+    return query_matcher.match(text)
+
+
+def first_rule_match(matches: Dict[str, Tuple[str, ...]], prefix: str, rules: Dict[str, List[str]]):
+    """Öncelik sırasına göre eşleşen ilk kuralın adı (yoksa None)"""
+    for name in rules:
+        if matches.get(f"{prefix}:{name}"):
+            return name
+    return None
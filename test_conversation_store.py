@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Sohbet geçmişi deposu testleri - halka tampon, LRU kapasitesi ve boşta kalma süresi (TTL)
+Bellek ve SQLite depoları aynı senaryolarla test edilir.
+
+Kullanım: python test_conversation_store.py  (ya da pytest test_conversation_store.py)
+"""
+import os
+import tempfile
+import time
+
+from conversation_store import MemoryConversationStore, SQLiteConversationStore
+
+
+def _check_ring_buffer(store):
+    for i in range(5):
+        store.append("ali", f"soru {i}", f"yanıt {i}")
+    history = store.get("ali")
+    assert [turn["user"] for turn in history] == ["soru 2", "soru 3", "soru 4"], history
+    assert history[-1]["assistant"] == "yanıt 4"
+
+
+def _check_lru_eviction(store):
+    store.append("a", "1", "1")
+    store.append("b", "2", "2")
+    assert store.get("a")  # "a" son erişilen olur, sıradaki en eski "b"
+    store.append("c", "3", "3")
+    assert store.get("b") == [], "Kapasite aşılınca en eski kullanıcı atılmalı"
+    assert store.get("a") and store.get("c")
+    assert store.stats()["users"] == 2
+
+
+def _check_ttl_eviction(store):
+    store.append("eski", "soru", "yanıt")
+    time.sleep(0.15)
+    store.append("yeni", "soru", "yanıt")
+    assert store.get("eski") == [], "Boşta kalma süresi dolan kullanıcı atılmalı"
+    assert store.get("yeni")
+
+
+def test_memory_store():
+    print("🔄 Bellek deposu test ediliyor...")
+    _check_ring_buffer(MemoryConversationStore(max_turns=3))
+    store = MemoryConversationStore(max_users=2)
+    _check_lru_eviction(store)
+    assert store.evicted == 1
+    _check_ttl_eviction(MemoryConversationStore(ttl_seconds=0.1))
+    store = MemoryConversationStore()
+    store.append("ali", "soru", "yanıt")
+    store.clear("ali")
+    assert store.get("ali") == []
+    print("✅ Bellek deposu sınırları doğru uyguluyor")
+
+
+def test_sqlite_store():
+    print("🔄 SQLite deposu test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        def store(name, **options):
+            return SQLiteConversationStore(os.path.join(tmp, name), purge_interval=0, **options)
+
+        _check_ring_buffer(store("ring.db", max_turns=3))
+        _check_lru_eviction(store("lru.db", max_users=2))
+        _check_ttl_eviction(store("ttl.db", ttl_seconds=0.1))
+
+        # Aynı dosyayı kullanan ikinci depo (başka worker) aynı geçmişi görür
+        first = store("shared.db")
+        first.append("ali", "soru", "yanıt")
+        assert [turn["user"] for turn in store("shared.db").get("ali")] == ["soru"]
+        first.clear("ali")
+        assert store("shared.db").get("ali") == []
+    print("✅ SQLite deposu sınırları doğru uyguluyor")
+
+
+if __name__ == "__main__":
+    test_memory_store()
+    test_sqlite_store()
+    print("✅ Tüm testler başarılı!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+CorpusStore testleri - chunk/embedding yazımı, versiyon sayacı ve partition temizliği
+Her test geçici bir store dizininde çalışır.
+
+Kullanım: python test_corpus_store.py  (ya da pytest test_corpus_store.py)
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from corpus_store import CorpusStore
+
+
+def _item(filename, checksum, chunks, embeddings=None):
+    item = {
+        "filename": filename,
+        "file_type": "txt",
+        "content": " ".join(chunks),
+        "chunks": chunks,
+        "chunk_metadata": [{"chunk_index": i} for i in range(len(chunks))],
+        "document_metadata": {"checksum": checksum},
+    }
+    if embeddings is not None:
+        item["embeddings"] = embeddings
+    return item
+
+
+def _partitions(store):
+    return sorted(os.listdir(store.embeddings_dir))
+
+
+def test_upsert_keeps_and_replaces_partitions():
+    print("🔄 upsert_document partition yönetimi test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CorpusStore(tmp)
+        chunks = ["birinci parça", "ikinci parça"]
+        store.upsert_document(_item("a.txt", "c1", chunks, np.eye(2, 4)), "test-model")
+        first = _partitions(store)
+        assert len(first) == 1
+        assert store.get_chunks("a.txt") == chunks
+        assert np.allclose(store.load_embeddings("a.txt"), np.eye(2, 4))
+
+        # Aynı checksum, embedding verilmedi - mevcut partition korunur
+        store.upsert_document(_item("a.txt", "c1", chunks))
+        assert _partitions(store) == first
+        assert store.filenames_missing_embeddings("test-model") == []
+
+        # İçerik değişti, embedding verilmedi - eski partition silinir
+        store.upsert_document(_item("a.txt", "c2", ["yeni parça"]))
+        assert _partitions(store) == []
+        assert store.load_embeddings("a.txt") is None
+        assert store.filenames_missing_embeddings("test-model") == ["a.txt"]
+
+        # Yeni embedding ile güncelleme - tek partition kalır
+        store.upsert_document(_item("a.txt", "c3", ["son parça"], np.ones((1, 4))), "test-model")
+        assert len(_partitions(store)) == 1
+    print("✅ Partition'lar korunuyor/temizleniyor")
+
+
+def test_write_embeddings_and_version():
+    print("🔄 write_embeddings ve versiyon sayacı test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CorpusStore(tmp)
+        store.upsert_document(_item("a.txt", "c1", ["parça"]))
+        version = store.get_version()
+
+        store.write_embeddings("a.txt", np.ones((1, 3)), "test-model")
+        assert store.get_version() == version + 1
+        old = _partitions(store)
+        store.write_embeddings("a.txt", np.zeros((1, 3)), "test-model")
+        assert len(_partitions(store)) == 1 and _partitions(store) != old
+        assert np.allclose(store.load_embeddings("a.txt"), 0)
+
+        try:
+            store.write_embeddings("yok.txt", np.ones((1, 3)), "test-model")
+            raise AssertionError("Bilinmeyen dosya ValueError vermeli")
+        except ValueError:
+            pass
+        assert len(_partitions(store)) == 1, "Başarısız yazım partition bırakmamalı"
+    print("✅ write_embeddings versiyonu artırıyor ve bilinmeyen dosyayı reddediyor")
+
+
+def test_remove_documents():
+    print("🔄 remove_documents test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CorpusStore(tmp)
+        store.upsert_document(_item("a.txt", "c1", ["a"], np.ones((1, 2))), "test-model")
+        store.upsert_document(_item("b.txt", "c1", ["b"], np.ones((1, 2))), "test-model")
+        version = store.get_version()
+
+        assert store.remove_documents(["a.txt", "olmayan.txt"]) == 1
+        assert store.list_filenames() == ["b.txt"]
+        assert store.get_chunks("a.txt") == []
+        assert len(_partitions(store)) == 1
+        assert store.get_version() == version + 1
+        assert store.remove_documents(["olmayan.txt"]) == 0
+        assert store.get_version() == version + 1
+    print("✅ Silinen dokümanların chunk ve partition'ları temizleniyor")
+
+
+if __name__ == "__main__":
+    test_upsert_keeps_and_replaces_partitions()
+    test_write_embeddings_and_version()
+    test_remove_documents()
+    print("✅ Tüm testler başarılı!")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+EvaluationPool testleri - bekleyen iş sınırı, düşürülen işler ve hata sayacı
+Gerçek değerlendirici yerine bekletilebilen sahte bir değerlendirici kullanılır.
+
+Kullanım: python test_evaluation_worker.py  (ya da pytest test_evaluation_worker.py)
+"""
+import threading
+
+from evaluation_worker import EvaluationPool
+
+
+class _BlockingEvaluator:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def evaluate_response(self, response, query, sources, documents, document_stats):
+        self.release.wait(5)
+        if response == "hata":
+            raise ValueError("değerlendirilemedi")
+        return {"overall_score": 0.5, "query": query}
+
+
+def test_drops_jobs_when_full():
+    print("🔄 Dolu havuzda iş düşürme test ediliyor...")
+    evaluator = _BlockingEvaluator()
+    results = {}
+    pool = EvaluationPool(evaluator, max_workers=1, max_pending=2, on_result=results.__setitem__)
+    try:
+        first = pool.submit("yanıt", "soru 1", [], [])
+        second = pool.submit("yanıt", "soru 2", [], [])
+        assert first and second and first != second
+        assert pool.submit("yanıt", "soru 3", [], []) is None, "Havuz doluyken iş düşürülmeli"
+        assert pool.get_stats()["dropped"] == 1
+        assert pool.get_stats()["pending"] == 2
+
+        evaluator.release.set()
+        pool.shutdown()
+        stats = pool.get_stats()
+        assert (stats["completed"], stats["pending"], stats["failed"]) == (2, 0, 0), stats
+        assert results[first]["query"] == "soru 1" and results[second]["query"] == "soru 2"
+    finally:
+        evaluator.release.set()
+        pool.shutdown()
+    print("✅ Bekleyen iş sınırı aşılınca yeni iş düşürülüyor")
+
+
+def test_failed_evaluation_frees_slot():
+    print("🔄 Hatalı değerlendirme test ediliyor...")
+    evaluator = _BlockingEvaluator()
+    evaluator.release.set()
+    results = {}
+    pool = EvaluationPool(evaluator, max_workers=1, max_pending=1, on_result=results.__setitem__)
+    try:
+        assert pool.submit("hata", "soru", [], [])
+        pool.shutdown()
+        assert pool.get_stats()["failed"] == 1 and results == {}
+        # Hata sonrası bekleyen iş sayısı düşer, yeni iş kabul edilir
+        assert pool.submit("yanıt", "soru", [], [])
+        pool.shutdown()
+        assert pool.get_stats()["completed"] == 1
+    finally:
+        pool.shutdown()
+    print("✅ Hatalı değerlendirme sayılıyor ve yer açıyor")
+
+
+if __name__ == "__main__":
+    test_drops_jobs_when_full()
+    test_failed_evaluation_frees_slot()
+    print("✅ Tüm testler başarılı!")
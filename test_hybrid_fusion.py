@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+HybridRetriever füzyon, MMR seçimi ve retrieval cache testleri
+Model/ChromaDB yüklenmez; yalnızca gereken metodları sağlayan sahte bir yönetici kullanılır.
+
+Kullanım: python test_hybrid_fusion.py  (ya da pytest test_hybrid_fusion.py)
+"""
+import numpy as np
+
+from cache_utils import LRUCache
+from chunk_stats import STAT_ANALYZER_VERSION, STAT_TERM_FREQS, STAT_TOKEN_COUNT
+from config import config
+from hybrid_retriever import HybridRetriever
+from turkish_analyzer import ANALYZER_VERSION
+
+
+class _FakeChromaManager:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.version = "test-1"
+        self.documents = {}
+
+    def get_embeddings(self, ids):
+        return np.array([self.embeddings[i] for i in ids], dtype=np.float32)
+
+    def get_collection_version(self):
+        return self.version
+
+    def get_documents(self, ids):
+        return {i: self.documents[i] for i in ids if i in self.documents}
+
+
+def _retriever(embeddings=None):
+    retriever = HybridRetriever.__new__(HybridRetriever)
+    retriever.chroma_manager = _FakeChromaManager(embeddings or {})
+    retriever.retrieval_cache = LRUCache(16)
+    retriever._retrieval_cache_version = None
+    return retriever
+
+
+def _hit(chunk_id, score, tokens=10):
+    return {
+        "id": chunk_id,
+        "document": f"{chunk_id} metni",
+        "metadata": {
+            STAT_TERM_FREQS: "{}",
+            STAT_TOKEN_COUNT: tokens,
+            STAT_ANALYZER_VERSION: ANALYZER_VERSION,
+        },
+        "score": score,
+    }
+
+
+def test_fuse_weighted():
+    print("🔄 Ağırlıklı füzyon test ediliyor...")
+    retriever = _retriever()
+    # Aynı metne sahip farklı chunk'lar ID ile ayrı tutulmalı
+    semantic = [_hit("a", 0.8), {**_hit("b", 0.6), "document": "a metni"}]
+    keyword = [_hit("a", 0.5), _hit("c", 0.4)]
+    fused = retriever._fuse_weighted(semantic, keyword, 0.7, 0.3)
+
+    assert set(fused) == {"a", "b", "c"}
+    assert fused["a"]["source"] == "hybrid"
+    assert abs(fused["a"]["combined_score"] - (0.8 * 0.7 + 0.5 * 0.3)) < 1e-9
+    assert abs(fused["b"]["combined_score"] - 0.6 * 0.7) < 1e-9
+    assert fused["c"]["source"] == "keyword" and abs(fused["c"]["combined_score"] - 0.4 * 0.3) < 1e-9
+    print("✅ Ağırlıklı skorlar chunk ID ile birleşiyor")
+
+
+def test_fuse_rrf():
+    print("🔄 RRF füzyonu test ediliyor...")
+    retriever = _retriever()
+    semantic = [_hit("a", 0.9), _hit("b", 0.8), _hit("c", 0.7)]
+    keyword = [_hit("a", 5.0), _hit("d", 3.0)]
+    fused = retriever._fuse_rrf(semantic, keyword, 0.7, 0.3)
+
+    assert set(fused) == {"a", "b", "c", "d"}
+    assert fused["a"]["source"] == "hybrid"
+    assert abs(fused["a"]["combined_score"] - 1.0) < 1e-9, "İki listede 1. sıra 1.0 almalı"
+    assert (fused["a"]["semantic_score"], fused["a"]["keyword_score"]) == (0.9, 5.0)
+    assert fused["b"]["source"] == "semantic" and fused["d"]["source"] == "keyword"
+
+    k = config.RRF_K
+    scale = (k + 1) / 1.0
+    assert abs(fused["b"]["combined_score"] - 0.7 / (k + 2) * scale) < 1e-9
+    assert fused["a"]["combined_score"] > fused["b"]["combined_score"] > fused["c"]["combined_score"]
+    print("✅ RRF skorları doğru")
+
+
+def test_mmr_select_prefers_diverse_results():
+    print("🔄 MMR çeşitlilik seçimi test ediliyor...")
+    retriever = _retriever({
+        "a": [1.0, 0.0],
+        "a_kopya": [0.99, 0.01],
+        "b": [0.0, 1.0],
+    })
+    results = [
+        {**_hit("a", 0), "combined_score": 1.0},
+        {**_hit("a_kopya", 0), "combined_score": 0.95},
+        {**_hit("b", 0), "combined_score": 0.8},
+    ]
+    selected = retriever.mmr_select(results, lambda_mult=0.5, token_budget=1000)
+    assert [r["id"] for r in selected[:2]] == ["a", "b"], [r["id"] for r in selected]
+    print("✅ Neredeyse aynı chunk yerine farklı chunk seçiliyor")
+
+
+def test_mmr_select_token_budget():
+    print("🔄 MMR token bütçesi test ediliyor...")
+    retriever = _retriever({"a": [1.0, 0.0], "b": [0.0, 1.0], "c": [0.7, 0.7]})
+    results = [
+        {**_hit("a", 0, tokens=60), "combined_score": 1.0},
+        {**_hit("b", 0, tokens=60), "combined_score": 0.9},
+        {**_hit("c", 0, tokens=30), "combined_score": 0.5},
+    ]
+    selected = retriever.mmr_select(results, lambda_mult=0.5, token_budget=100)
+    assert [r["id"] for r in selected] == ["a", "c"], [r["id"] for r in selected]
+
+    # Hiçbir chunk sığmıyorsa en alakalı sonuç yine de döner
+    selected = retriever.mmr_select(results, lambda_mult=0.5, token_budget=10)
+    assert [r["id"] for r in selected] == ["a"]
+    print("✅ Token bütçesi aşılmıyor")
+
+
+def test_retrieval_cache_follows_collection_version():
+    print("🔄 Retrieval cache versiyon geçersizleştirmesi test ediliyor...")
+    retriever = _retriever()
+    manager = retriever.chroma_manager
+    manager.documents = {"a": ("a metni", {"source_file": "a.pdf"})}
+    processed_query = {"original": "Sınav ne zaman?", "cleaned": "sınav ne zaman"}
+    results = [{**_hit("a", 0.9), "combined_score": 0.9}]
+
+    key = retriever._retrieval_cache_key(processed_query, 5)
+    retriever._store_cached_results(key, results, [0.1, 0.2])
+    cached, embedding = retriever._get_cached_results(retriever._retrieval_cache_key(processed_query, 5))
+    assert [r["id"] for r in cached] == ["a"] and embedding == [0.1, 0.2]
+    assert cached[0]["document"] == "a metni", "Doküman metni güncel collection'dan okunmalı"
+    assert retriever._get_cached_results(retriever._retrieval_cache_key(processed_query, 3)) is None
+
+    # Collection değişti - eski kayıtlar temizlenir ve eşleşmez
+    manager.version = "test-2"
+    new_key = retriever._retrieval_cache_key(processed_query, 5)
+    assert new_key != key
+    assert len(retriever.retrieval_cache) == 0
+    assert retriever._get_cached_results(new_key) is None
+
+    # Cache'teki chunk silinmişse sonuç kullanılmaz
+    retriever._store_cached_results(new_key, results)
+    manager.documents = {}
+    assert retriever._get_cached_results(new_key) is None
+    print("✅ Collection versiyonu değişince cache geçersizleşiyor")
+
+
+if __name__ == "__main__":
+    test_fuse_weighted()
+    test_fuse_rrf()
+    test_mmr_select_prefers_diverse_results()
+    test_mmr_select_token_budget()
+    test_retrieval_cache_follows_collection_version()
+    print("✅ Tüm testler başarılı!")
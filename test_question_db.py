@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+questions.db testleri - soru kümeleri, özet tablolar, keyset sayfalama ve denetim sonuçları
+Her test geçici bir questions.db (ve boş corpus store) üzerinde çalışır.
+
+Kullanım: python test_question_db.py  (ya da pytest test_question_db.py)
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import config
+from corpus_store import CorpusStore
+import question_db
+
+
+@contextmanager
+def temp_database():
+    """question_db'yi geçici bir veritabanına yönlendir, sonunda eski haline getir"""
+    old_path = question_db.DB_PATH
+    old_store = question_db._corpus_store
+    with tempfile.TemporaryDirectory() as tmp:
+        question_db.close_connection()
+        question_db.DB_PATH = os.path.join(tmp, "questions.db")
+        question_db._corpus_store = CorpusStore(os.path.join(tmp, "corpus_store"))
+        question_db._file_keywords_cache = (None, {})
+        question_db._cluster_index.clear()
+        try:
+            question_db.init_db()
+            yield
+        finally:
+            question_db.close_connection()
+            question_db.DB_PATH = old_path
+            question_db._corpus_store = old_store
+            question_db._file_keywords_cache = (None, {})
+            question_db._cluster_index.clear()
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _cluster_of(question_id):
+    with question_db.transaction() as c:
+        c.execute("SELECT cluster_id FROM questions WHERE id = ?", (question_id,))
+        return c.fetchone()[0]
+
+
+def _fetch_all(c, query):
+    c.execute(query)
+    return c.fetchall()
+
+
+def _stats_snapshot():
+    """Özet tabloların karşılaştırılabilir hali (versiyon sayacı hariç)"""
+    with question_db.transaction() as c:
+        return {
+            "stats_daily": _fetch_all(c, "SELECT * FROM stats_daily ORDER BY day"),
+            "stats_sources": _fetch_all(c, "SELECT * FROM stats_sources ORDER BY source_file"),
+            "question_groups": _fetch_all(c, "SELECT * FROM question_groups ORDER BY normalized_question"),
+            "question_groups_daily": _fetch_all(
+                c, "SELECT * FROM question_groups_daily ORDER BY day, normalized_question"
+            ),
+            "stats_counters": _fetch_all(
+                c, "SELECT name, value FROM stats_counters WHERE name != 'version' ORDER BY name"
+            ),
+        }
+
+
+def test_cluster_assignment():
+    print("🔄 Küme ataması test ediliyor...")
+    with temp_database():
+        base = _unit(1, 0, 0)
+        near = _unit(1, 0.1, 0)  # cos ≈ 0.995
+        far = _unit(1, 1, 0)  # cos ≈ 0.707
+
+        first = question_db.add_question("Sınav ne zaman?", topic="sinav", embedding=base)
+        same_text = question_db.add_question("sınav ne  zaman?", topic="sinav")
+        similar = question_db.add_question("Sınavlar hangi tarihte?", topic="sinav", embedding=near)
+        distant = question_db.add_question("Yurt başvurusu nasıl?", topic="sinav", embedding=far)
+        other_topic = question_db.add_question("Burs ne zaman yatar?", topic="burs", embedding=base)
+
+        cluster = _cluster_of(first)
+        assert _cluster_of(same_text) == cluster, "Aynı normalize soru aynı kümeye girmeli"
+        assert _cluster_of(similar) == cluster, "Eşik üstü benzer soru aynı kümeye girmeli"
+        assert _cluster_of(distant) != cluster, "Eşik altı soru yeni küme açmalı"
+        assert _cluster_of(other_topic) != cluster, "Farklı topic aynı kümeye girmemeli"
+
+        with question_db.transaction() as c:
+            c.execute(
+                "SELECT count, variants, representative_question FROM question_clusters WHERE id = ?",
+                (cluster,),
+            )
+            count, variants, representative = c.fetchone()
+        assert (count, variants) == (3, 2), (count, variants)
+        assert representative == "sınav ne  zaman?", representative
+    print("✅ Küme ataması doğru")
+
+
+def test_cluster_threshold():
+    print("🔄 Küme eşiği test ediliyor...")
+    old_threshold = config.QUESTION_CLUSTER_THRESHOLD
+    try:
+        with temp_database():
+            config.QUESTION_CLUSTER_THRESHOLD = 0.7
+            first = question_db.add_question("Sınav ne zaman?", topic="sinav", embedding=_unit(1, 0, 0))
+            # cos ≈ 0.707 - düşük eşikte aynı kümeye girer
+            joined = question_db.add_question("Final haftası?", topic="sinav", embedding=_unit(1, 1, 0))
+            config.QUESTION_CLUSTER_THRESHOLD = 0.99
+            # Merkez artık iki vektörün ortalaması; cos ≈ 0.92 < 0.99
+            separate = question_db.add_question("Bütünleme?", topic="sinav", embedding=_unit(1, 0, 0))
+            assert _cluster_of(joined) == _cluster_of(first)
+            assert _cluster_of(separate) != _cluster_of(first)
+    finally:
+        config.QUESTION_CLUSTER_THRESHOLD = old_threshold
+    print("✅ Küme eşiği doğru uygulanıyor")
+
+
+def test_rebuild_stats_matches_incremental():
+    print("🔄 rebuild_stats ile artımlı sayaçlar karşılaştırılıyor...")
+    with temp_database():
+        questions = ["Sınav ne zaman?", "Kayıt nasıl yapılır?", "Burs başvurusu", "Yurt ücreti"]
+        for i in range(40):
+            day = 10 + i // 10
+            question_db.add_question(
+                questions[i % len(questions)] if i % 7 else f"Tek seferlik soru {i}",
+                answer=f"yanıt {i}",
+                source_file=f"belge_{i % 3}.pdf" if i % 5 else None,
+                created_at=f"2024-03-{day:02d} 09:{i:02d}:00",
+            )
+        for i in range(15):
+            question_db.track_user_session(f"kullanici_{i % 4}", question_asked=i % 2, day=f"2024-03-{10 + i % 3:02d}")
+
+        incremental = _stats_snapshot()
+        question_db.rebuild_stats()
+        assert _stats_snapshot() == incremental, "rebuild_stats artımlı sayaçlardan farklı"
+
+        # Silme sonrası yeniden hesaplama ana tabloyla tutarlı olmalı
+        with question_db.transaction() as c:
+            c.execute("DELETE FROM questions WHERE source_file = 'belge_1.pdf'")
+            question_db.rebuild_stats()
+            c.execute("SELECT COUNT(*), COUNT(DISTINCT normalized_question) FROM questions")
+            total, unique = c.fetchone()
+        assert question_db.get_total_questions() == total
+        assert question_db.get_total_unique_questions() == unique
+    print("✅ Yeniden hesaplanan özet tablolar artımlı sayaçlarla aynı")
+
+
+@contextmanager
+def local_timezone(tz):
+    """Süreç saat dilimini geçici olarak değiştir (SQLite 'localtime' de bunu kullanır)"""
+    old_tz = os.environ.get("TZ")
+    os.environ["TZ"] = tz
+    time.tzset()
+    try:
+        yield
+    finally:
+        if old_tz is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = old_tz
+        time.tzset()
+
+
+def test_days_use_local_time():
+    print("🔄 Yerel gün sınırı test ediliyor...")
+    if not hasattr(time, "tzset"):
+        print("⚠️ time.tzset yok, test atlandı")
+        return
+    with local_timezone("TRT-3"), temp_database():
+        # UTC 22:30 yerel saatte (UTC+3) ertesi gün 01:30
+        question_id = question_db.add_question("Gece sorusu", created_at="2024-03-10 22:30:00")
+        with question_db.transaction() as c:
+            c.execute("SELECT created_date FROM questions WHERE id = ?", (question_id,))
+            assert c.fetchone()[0] == "2024-03-11"
+
+        # Şimdi sorulan soru ve oturum aynı "bugün" satırına yazılır
+        question_db.add_question("Bugünün sorusu", created_at=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+        question_db.track_user_session("kullanici", question_asked=True)
+        assert question_db.get_daily_question_count() == 1
+        user_stats = question_db.get_daily_user_stats()
+        assert (user_stats["daily_users"], user_stats["daily_questions"]) == (1, 1)
+        daily = question_db.get_daily_questions_paginated(limit=10)
+        assert [q["question"] for q in daily["questions"]] == ["Bugünün sorusu"]
+        assert question_db.clear_questions_by_period("today") >= 0
+        assert question_db.get_daily_question_count() == 0
+        assert question_db.get_total_questions() == 1
+    print("✅ Sorular, oturumlar ve bugün okumaları aynı yerel günü kullanıyor")
+
+
+def test_pagination_cursors():
+    print("🔄 Keyset sayfalama test ediliyor...")
+    with temp_database():
+        # Aynı sayıda sorulan gruplar (eşit count/first_asked) imleçte sıra bozmamalı
+        for i in range(23):
+            for _ in range(1 + i % 4):
+                question_db.add_question(f"Soru {i:02d}", created_at="2024-03-10 09:00:00")
+
+        limit = 5
+        offset_pages = [
+            question_db.get_all_questions_paginated(page=page, limit=limit)
+            for page in range(1, 6)
+        ]
+        assert offset_pages[0]["total_questions"] == 23
+        assert offset_pages[0]["total_pages"] == 5
+
+        cursor_questions = []
+        cursor = None
+        pages = 0
+        while True:
+            result = question_db.get_all_questions_paginated(limit=limit, cursor=cursor)
+            cursor_questions.extend(result["questions"])
+            pages += 1
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+
+        offset_questions = [q for page in offset_pages for q in page["questions"]]
+        assert pages == 5
+        assert len(cursor_questions) == 23
+        assert len({q["question"] for q in cursor_questions}) == 23, "Sayfalar arasında tekrar var"
+        assert [q["question"] for q in cursor_questions] == [q["question"] for q in offset_questions]
+        assert [q["id"] for q in cursor_questions] == list(range(1, 24))
+        counts = [q["count"] for q in cursor_questions]
+        assert counts == sorted(counts, reverse=True)
+
+        try:
+            question_db.get_all_questions_paginated(limit=limit, cursor="bozuk-imlec")
+            raise AssertionError("Geçersiz imleç ValueError vermeli")
+        except ValueError:
+            pass
+    print("✅ İmleçli sayfalar OFFSET sayfalarıyla aynı")
+
+
+def test_audits_do_not_replace_evaluations():
+    print("🔄 Denetim sonuçlarının ayrı tutulması test ediliyor...")
+    with temp_database():
+        question_id = question_db.add_question("Sınav ne zaman?", answer="Haziranda.", evaluation_id="eval-1")
+        question_db.save_evaluation("eval-1", {"overall_score": 0.9, "quality_level": "excellent"})
+        assert question_db.get_questions_for_audit(only_missing=True) == []
+
+        question_db.save_audit_evaluations([(question_id, {"overall_score": 0.4, "quality_level": "poor"})])
+        assert question_db.get_evaluation_summary()["averages"]["overall_score"] == 0.9
+        assert question_db.get_evaluation_summary(audit=True)["averages"]["overall_score"] == 0.4
+
+        # Değerlendirmesi olmayan soru denetime girer; silinen sorunun denetimi de silinir
+        other_id = question_db.add_question("Burs ne zaman yatar?", answer="Ayın 5'inde.")
+        assert [row[0] for row in question_db.get_questions_for_audit(only_missing=True)] == [other_id]
+        question_db.clear_all_questions()
+        assert question_db.get_evaluation_summary(audit=True)["total"] == 0
+    print("✅ Denetim sonuçları arka plan değerlendirmelerini değiştirmiyor")
+
+
+if __name__ == "__main__":
+    test_cluster_assignment()
+    test_cluster_threshold()
+    test_rebuild_stats_matches_incremental()
+    test_days_use_local_time()
+    test_pagination_cursors()
+    test_audits_do_not_replace_evaluations()
+    print("✅ Tüm testler başarılı!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+QuestionLogWriter testleri - toplu yazım ve hata durumunda tek tek yazım
+Geçici questions.db üzerinde çalışır (test_question_db.temp_database).
+
+Kullanım: python test_question_log_writer.py  (ya da pytest test_question_log_writer.py)
+"""
+import question_db
+from question_log_writer import QuestionLogWriter
+from test_question_db import temp_database
+
+
+def _session_rows():
+    with question_db.transaction() as c:
+        c.execute("SELECT user_id, total_questions FROM user_sessions ORDER BY user_id")
+        return c.fetchall()
+
+
+def test_batches_events_into_one_transaction():
+    print("🔄 Toplu yazım test ediliyor...")
+    with temp_database():
+        writer = QuestionLogWriter(flush_interval_ms=500, batch_size=100)
+        try:
+            for i in range(10):
+                writer.log_question(f"Soru {i}", answer="yanıt")
+                writer.track_session("kullanici", question_asked=True)
+            assert writer.flush(timeout=5)
+        finally:
+            writer.stop()
+
+        stats = writer.get_stats()
+        assert stats["written"] == 20 and stats["failed"] == 0, stats
+        assert stats["batches"] <= 2, stats
+        assert question_db.get_total_questions() == 10
+        # Aynı kullanıcı/gün olayları tek satıra indirgenir
+        assert _session_rows() == [("kullanici", 10)]
+    print("✅ Olaylar toplu yazılıyor")
+
+
+def test_failed_batch_falls_back_to_single_writes():
+    print("🔄 Hatalı toplu yazımda tek tek yazım test ediliyor...")
+    original_track = question_db.track_user_session
+
+    def failing_track(user_id, *args, **kwargs):
+        if user_id == "bozuk":
+            raise RuntimeError("oturum yazılamadı")
+        return original_track(user_id, *args, **kwargs)
+
+    with temp_database():
+        writer = QuestionLogWriter(flush_interval_ms=500, batch_size=100)
+        question_db.track_user_session = failing_track
+        try:
+            writer.log_question("Sınav ne zaman?")
+            writer.log_question("Kayıt nasıl yapılır?")
+            writer.track_session("bozuk", question_asked=True)
+            writer.track_session("bozuk")
+            writer.track_session("saglam", question_asked=True)
+            writer.log_evaluation("eval-1", {"overall_score": 0.8, "quality_level": "good"})
+            assert writer.flush(timeout=5)
+        finally:
+            question_db.track_user_session = original_track
+            writer.stop()
+
+        stats = writer.get_stats()
+        # Başarısız oturumun iki olayı yazılmış sayılmaz
+        assert (stats["written"], stats["failed"]) == (4, 2), stats
+        # Geri alınan toplu yazım tekrar eden kayıt bırakmaz
+        assert question_db.get_total_questions() == 2
+        assert _session_rows() == [("saglam", 1)]
+        assert question_db.get_evaluation_summary()["total"] == 1
+    print("✅ Başarısız olaylar ayrı sayılıyor, diğerleri yazılıyor")
+
+
+if __name__ == "__main__":
+    test_batches_events_into_one_transaction()
+    test_failed_batch_falls_back_to_single_writes()
+    print("✅ Tüm testler başarılı!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Aho-Corasick terim eşleştirici testleri - sonuçlar basit alt dizi taramasıyla karşılaştırılır
+
+Kullanım: python test_term_matcher.py  (ya da pytest test_term_matcher.py)
+"""
+import random
+
+from term_matcher import TOPIC_RULES, TermMatcher, first_rule_match, match_terms
+from turkish_analyzer import fold_case
+
+
+def _naive_find(terms, text):
+    text = fold_case(text)
+    matches = []
+    for term, category in terms:
+        term = fold_case(term)
+        start = text.find(term)
+        while start != -1:
+            matches.append((start, start + len(term), term, category))
+            start = text.find(term, start + 1)
+    return sorted(matches)
+
+
+def test_matches_naive_scan():
+    print("🔄 Çakışan terimler alt dizi taramasıyla karşılaştırılıyor...")
+    terms = [("he", "a"), ("she", "b"), ("his", "c"), ("hers", "d"), ("sınav", "e"), ("sınavlar", "f"), ("ı", "g")]
+    matcher = TermMatcher()
+    for term, category in terms:
+        matcher.add(term, category)
+
+    rng = random.Random(7)
+    alphabet = "hersıinavlI "
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        if "I" in text:
+            continue  # ASCII katlama ayrı test ediliyor
+        assert sorted(matcher.find(text)) == _naive_find(terms, text), text
+    assert sorted(matcher.find("SINAVLAR ushers")) == _naive_find(terms, "SINAVLAR ushers")
+    print("✅ Eşleşmeler alt dizi taramasıyla aynı")
+
+
+def test_whole_word_and_ascii_fold():
+    print("🔄 Tam kelime ve ASCII katlama test ediliyor...")
+    matcher = TermMatcher()
+    matcher.add("hi", "greeting", whole_word=True)
+    matcher.add("lab", "topic")
+    assert matcher.match("hi hocam") == {"greeting": ("hi",)}
+    assert matcher.match("bu bilgi şehir hakkında") == {}
+    assert matcher.match("HI") == {"greeting": ("hi",)}
+    assert matcher.match("LABORATUVAR") == {"topic": ("lab",)}
+    print("✅ Tam kelime sınırı ve büyük I doğru eşleşiyor")
+
+
+def test_query_matcher_rules():
+    print("🔄 Sözlük kuralları test ediliyor...")
+    matches = match_terms("Eduroam şifremi unuttum, sınav ne zaman?")
+    assert "şifre" in matches["question_indicator"]
+    assert "sınav" in matches["academic_keyword"]
+    assert "ne zaman" in matches["category:temporal"]
+    # Önceliği yüksek konu önce döner
+    assert first_rule_match(matches, "topic", TOPIC_RULES) == "bilgisayar_laboratuvari"
+    assert first_rule_match(match_terms("eduroam bağlantısı"), "topic", TOPIC_RULES) == "eduroam"
+    assert first_rule_match(match_terms("xyz"), "topic", TOPIC_RULES) is None
+    print("✅ Kategori ve konu kuralları doğru")
+
+
+if __name__ == "__main__":
+    test_matches_naive_scan()
+    test_whole_word_and_ascii_fold()
+    test_query_matcher_rules()
+    print("✅ Tüm testler başarılı!")
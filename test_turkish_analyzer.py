@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Türkçe analyzer testleri - aynı kelimenin çekimli halleri aynı gövdeye inmeli
+
+Kullanım: python test_turkish_analyzer.py  (ya da pytest test_turkish_analyzer.py)
+"""
+from turkish_analyzer import analyze, fold_case, stem
+
+INFLECTIONS = {
+    "şifr": ["şifre", "şifreler", "şifrem", "şifremi", "şifresi", "şifresini", "şifreyi", "şifrenin", "şifreme"],
+    "not": ["not", "notu", "notum", "notun", "notunu", "nota", "notlar", "notları", "notlarım"],
+    "kred": ["kredi", "krediler", "kredisi", "kredimi", "krediye", "kredinin", "kredilerim"],
+    "sınav": ["sınav", "sınavı", "sınava", "sınavda", "sınavım", "sınavına", "sınavlar", "sınavlarda", "sınavlarımızda"],
+}
+
+
+def test_inflections_share_stem():
+    print("🔄 Çekimli hallerin gövdeleri test ediliyor...")
+    for expected, words in INFLECTIONS.items():
+        stems = {word: stem(word) for word in words}
+        assert set(stems.values()) == {expected}, stems
+    # Ünsüz yumuşaması ve n/s/y kaynaştırma kuralı
+    assert stem("yönetmeliğe") == stem("yönetmelik") == "yönetmelik"
+    assert stem("kitabı") == stem("kitap") == "kitap"
+    assert stem("dersi") == stem("dersler") == "ders"
+    print("✅ Gövdeler tutarlı")
+
+
+def test_short_words_keep_minimum_stem():
+    print("🔄 Kısa kelimeler test ediliyor...")
+    for word in ("su", "not", "ad", "2024"):
+        assert stem(word) == word, word
+    assert stem("kira") == stem("kiralar") == stem("kirası")
+    assert len(stem("kira")) >= 3
+    print("✅ Kısa kelimeler en az 3 karakterlik gövdede kalıyor")
+
+
+def test_analyze():
+    print("🔄 analyze test ediliyor...")
+    assert analyze("şifremi unuttum") == ["şifr", "unutt"]
+    assert analyze("Şifre sıfırlama nasıl yapılır?")[0] == stem("şifre")
+    assert analyze("Sınav ne zaman ve nerede?") == ["sınav"]
+    assert fold_case("IĞDIR İSTANBUL") == "ığdır istanbul"
+    # Büyük "I" içeren kelimeler ASCII katlamalı haliyle de eklenir
+    assert analyze("HI") == ["hı", "hi"]
+    assert stem("wifi") in analyze("WIFI şifresi")
+    print("✅ analyze doğru terimleri üretiyor")
+
+
+if __name__ == "__main__":
+    test_inflections_share_stem()
+    test_short_words_keep_minimum_stem()
+    test_analyze()
+    print("✅ Tüm testler başarılı!")
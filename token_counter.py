@@ -0,0 +1,40 @@
+import math
+import logging
+from functools import lru_cache
+from typing import Optional
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Opsiyonel bağımlılık - yoksa karakter tabanlı tahmin kullanılır
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Türkçe metinde GPT-4o tokenizer'ı için ortalama karakter/token oranı (yaklaşık)
+CHARS_PER_TOKEN = 3.5
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """Model için tiktoken encoding'i (yoksa None)"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"⚠️ Tokenizer yüklenemedi, tahmini sayım kullanılacak: {e}")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Metnin hedef modeldeki token sayısı (tiktoken yoksa yaklaşık)"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model or config.LLM_MODEL)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
@@ -0,0 +1,121 @@
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+# Türkçe'ye uygun küçük harf dönüşümü: str.lower() "I" -> "i" ve "İ" -> "i̇" yapar
+_CASE_FOLD_TABLE = str.maketrans({"I": "ı", "İ": "i", "Â": "a", "â": "a", "Î": "i", "î": "i", "Û": "u", "û": "u"})
+# İngilizce/ASCII katlama: "I" -> "i" ("HI" -> "hi", "WIFI" -> "wifi")
+_ASCII_FOLD_TABLE = str.maketrans({"I": "i", "İ": "i", "Â": "a", "â": "a", "Î": "i", "î": "i", "Û": "u", "û": "u"})
+
+# Analyzer çıktısı değiştikçe artar - ingest'te saklanan terim frekansları bu sürümle etiketlenir
+ANALYZER_VERSION = 3
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+STOP_WORDS = frozenset(
+    {
+        "ve", "veya", "ile", "için", "de", "da", "ki", "mi", "mı", "mu", "mü",
+        "bir", "bu", "şu", "o", "ben", "sen", "biz", "siz", "onlar",
+        "olan", "olur", "var", "yok", "gibi", "daha", "çok", "en",
+        "nasıl", "ne", "nedir", "kim", "nerede", "neden", "niçin", "hangi", "kaç", "zaman",
+    }
+)
+
+# Çekim ekleri - uzundan kısaya, böylece en uzun eşleşen ek önce denenir
+_SUFFIXES = tuple(
+    sorted(
+        {
+            # Çoğul + hal ekleri
+            "lerinden", "larından", "lerinde", "larında", "lerine", "larına", "lerini", "larını",
+            "lerin", "ların", "leri", "ları", "ler", "lar",
+            # İyelik ekleri
+            "imiz", "ımız", "umuz", "ümüz", "iniz", "ınız", "unuz", "ünüz",
+            "si", "sı", "su", "sü", "im", "ım", "um", "üm",
+            # Hal ekleri
+            "nden", "ndan", "den", "dan", "ten", "tan", "nde", "nda", "de", "da", "te", "ta",
+            "deki", "daki", "teki", "taki",
+            "nin", "nın", "nun", "nün", "in", "ın", "un", "ün",
+            "yle", "yla", "ne", "na", "ye", "ya", "yi", "yı", "yu", "yü", "ni", "nı", "nu", "nü",
+            # Ünlüden sonra iyelik ("şifrem") ve tek ünlülü ekler / gövde sonu ünlüsü
+            "m", "e", "a", "i", "ı", "u", "ü",
+        },
+        key=len,
+        reverse=True,
+    )
+)
+
+MIN_STEM_LENGTH = 3  # Ek atıldıktan sonra kalması gereken en kısa gövde
+_VOWELS = frozenset("aeıioöuü")
+# Ünsüz yumuşaması geri alınır: "yönetmeliğe" -> "yönetmelik", "kitabı" -> "kitap", "harcı" -> "harç"
+_SOFTENED = {"ğ": "k", "b": "p", "c": "ç"}
+
+
+def fold_case(text: str) -> str:
+    """Türkçe büyük/küçük harf katlama (İ/I doğru şekilde)"""
+    return text.translate(_CASE_FOLD_TABLE).lower()
+
+
+def fold_case_ascii(text: str) -> str:
+    """ASCII büyük/küçük harf katlama - fold_case ile aynı uzunlukta, sadece "I" -> "i" farklı"""
+    return text.translate(_ASCII_FOLD_TABLE).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Metni küçük harfli kelimelere böl"""
+    return _TOKEN_RE.findall(fold_case(text))
+
+
+@lru_cache(maxsize=50000)
+def stem(word: str) -> str:
+    """Hafif Türkçe gövdeleyici - çekim eklerini sondan atar ("sınavlarında" -> "sınav")
+
+    Ekler hiçbiri eşleşmeyene kadar atılır ve gövde en az MIN_STEM_LENGTH karakter
+    kalır. Sondaki ünlü her zaman ek gibi atıldığı için kelimenin yalın hali ile
+    çekimli halleri aynı gövdeye iner ("şifre", "şifremi", "şifresini" -> "şifr";
+    "not", "notu", "notlar" -> "not"). Aynı fonksiyon hem index hem de sorgu
+    tarafında kullanıldığı için kısaltmalar iki tarafta aynıdır.
+    """
+    if len(word) <= MIN_STEM_LENGTH or word.isdigit():
+        return word
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _SUFFIXES:
+            if not word.endswith(suffix) or len(word) - len(suffix) < MIN_STEM_LENGTH:
+                continue
+            # n/s/y/m ile başlayan ekler yalnızca ünlüden sonra gelir ("kredisi", "dersi" değil)
+            if suffix[0] in "nsym" and word[-len(suffix) - 1] not in _VOWELS:
+                continue
+            word = word[: -len(suffix)]
+            stripped = True
+            break
+    if word[-1] in _SOFTENED:
+        word = word[:-1] + _SOFTENED[word[-1]]
+    return word
+
+
+def analyze(text: str, min_length: int = 2) -> List[str]:
+    """Tokenize + stopword temizliği + gövdeleme
+
+    Büyük "I" içeren kelimeler için ASCII katlamalı hali de ayrı terim olarak
+    eklenir ("WIFI" -> "wıfı", "wifi"); Türkçe eşleşme bozulmadan İngilizce
+    kelimeler de eşleşir.
+    """
+    return list(_analyze_cached(text, min_length))
+
+
+@lru_cache(maxsize=4096)
+def _analyze_cached(text: str, min_length: int) -> Tuple[str, ...]:
+    tokens = tokenize(text)
+    if "I" not in text:
+        pairs = ((token, token) for token in tokens)
+    else:
+        pairs = zip(tokens, _TOKEN_RE.findall(fold_case_ascii(text)))
+    terms = []
+    for token, ascii_token in pairs:
+        if token in STOP_WORDS or len(token) < min_length:
+            continue
+        terms.append(stem(token))
+        if ascii_token != token:
+            terms.append(stem(ascii_token))
+    return tuple(terms)
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
-import sqlite3
+from question_db import get_connection
 
 def upgrade_database():
     print("🔄 Veritabanı güncelleniyor...")
     
-    conn = sqlite3.connect("questions.db")
+    conn = get_connection()
     c = conn.cursor()
     
     try:
@@ -39,7 +39,7 @@ def upgrade_database():
         import traceback
         traceback.print_exc()
     finally:
-        conn.close()
+        c.close()
 
 if __name__ == "__main__":
     upgrade_database()